@@ -0,0 +1,74 @@
+"""Notifications de changement (LISTEN/NOTIFY) pour les écrans temps réel
+
+Crée fn_notify_change() et l'attache en AFTER INSERT/UPDATE/DELETE sur
+intervention, intervention_task, intervention_request et purchase_request.
+Chaque mutation publie sur le canal `tunnel_changes` un JSON compact :
+    {"entity", "id", "op", "machine_id", "intervention_id"}
+relayé aux clients SSE par api/events (une seule connexion LISTEN par process).
+
+Revision ID: 014_change_notify
+Revises: 013_supplier_order_seq
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+from typing import Union
+
+from alembic import op
+
+revision: str = "014_change_notify"
+down_revision: Union[str, None] = "013_supplier_order_seq"
+branch_labels: Union[str, tuple[str, ...], None] = None
+depends_on: Union[str, tuple[str, ...], None] = None
+
+_TABLES = ("intervention", "intervention_task", "intervention_request", "purchase_request")
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_notify_change()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            v_row             JSONB;
+            v_intervention_id UUID;
+            v_machine_id      UUID;
+        BEGIN
+            v_row := to_jsonb(CASE WHEN TG_OP = 'DELETE' THEN OLD ELSE NEW END);
+
+            IF TG_TABLE_NAME = 'intervention' THEN
+                v_intervention_id := (v_row->>'id')::uuid;
+            ELSE
+                v_intervention_id := (v_row->>'intervention_id')::uuid;
+            END IF;
+
+            v_machine_id := (v_row->>'machine_id')::uuid;
+            IF v_machine_id IS NULL AND v_intervention_id IS NOT NULL THEN
+                SELECT machine_id INTO v_machine_id
+                FROM intervention WHERE id = v_intervention_id;
+            END IF;
+
+            PERFORM pg_notify('tunnel_changes', json_build_object(
+                'entity',          TG_TABLE_NAME,
+                'id',              v_row->>'id',
+                'op',              lower(TG_OP),
+                'machine_id',      v_machine_id,
+                'intervention_id', v_intervention_id
+            )::text);
+            RETURN NULL;
+        END;
+        $$
+    """)
+    for table in _TABLES:
+        op.execute(f"""
+            CREATE TRIGGER trg_notify_change_{table}
+            AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION fn_notify_change()
+        """)
+
+
+def downgrade() -> None:
+    for table in _TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_notify_change_{table} ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS fn_notify_change()")
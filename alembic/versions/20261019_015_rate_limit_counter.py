@@ -0,0 +1,41 @@
+"""Compteurs du limiteur de débit partagés entre workers
+
+Table UNLOGGED `rate_limit_counter` : une ligne par (clé de limite, fenêtre
+fixe) alimentée par upsert ensembliste depuis api/limiter.py. Non journalisée
+(pas de WAL, vidée après un crash) : des compteurs de quelques minutes n'ont
+pas besoin de durabilité. Les lignes expirées sont purgées par le limiteur.
+
+Revision ID: 015_rate_limit_counter
+Revises: 014_change_notify
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+from typing import Union
+
+from alembic import op
+
+revision: str = "015_rate_limit_counter"
+down_revision: Union[str, None] = "014_change_notify"
+branch_labels: Union[str, tuple[str, ...], None] = None
+depends_on: Union[str, tuple[str, ...], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE UNLOGGED TABLE IF NOT EXISTS rate_limit_counter (
+            key        TEXT        NOT NULL,
+            bucket     BIGINT      NOT NULL,
+            hits       INTEGER     NOT NULL,
+            expires_at TIMESTAMPTZ NOT NULL,
+            PRIMARY KEY (key, bucket)
+        )
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_rate_limit_counter_expires
+        ON rate_limit_counter (expires_at)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS rate_limit_counter")
@@ -0,0 +1,36 @@
+"""État de la dernière synchronisation du catalogue d'endpoints
+
+Table à une ligne `tunnel_endpoint_sync` : empreinte de la table des routes
+FastAPI et signature des rôles lors du dernier sync_endpoints_catalog().
+Au démarrage, si les deux sont identiques, la synchronisation est sautée.
+
+Revision ID: 016_endpoint_sync_state
+Revises: 015_rate_limit_counter
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+from typing import Union
+
+from alembic import op
+
+revision: str = "016_endpoint_sync_state"
+down_revision: Union[str, None] = "015_rate_limit_counter"
+branch_labels: Union[str, tuple[str, ...], None] = None
+depends_on: Union[str, tuple[str, ...], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS tunnel_endpoint_sync (
+            id             BOOLEAN     PRIMARY KEY DEFAULT true CHECK (id),
+            route_hash     TEXT        NOT NULL,
+            role_signature TEXT,
+            endpoint_count INTEGER     NOT NULL DEFAULT 0,
+            synced_at      TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS tunnel_endpoint_sync")
@@ -0,0 +1,235 @@
+"""Partitionnement mensuel des journaux + rétention
+
+`audit_log`, `auth_attempt` et `security_log` deviennent des tables
+partitionnées par mois (RANGE sur logged_at / created_at) :
+
+    <table>_pYYYY_MM   une partition par mois
+    <table>_default    filet de sécurité si la partition du mois manque
+
+La clé primaire devient (id, colonne de date), contrainte PostgreSQL sur les
+tables partitionnées ; id reste un UUID aléatoire, unique en pratique.
+
+Politique par table dans `partition_policy` (modifiable par UPDATE) :
+    retention_months  NULL = conservation illimitée
+    archive           true : partition détachée et déplacée dans le schéma
+                      `archive` ; false : partition supprimée
+    premake_months    partitions créées à l'avance
+
+`fn_partition_maintenance()` applique la politique (idempotente, verrou
+consultatif) : appelée au démarrage de l'API et par
+scripts/partition_maintenance.py (cron mensuel recommandé).
+
+Revision ID: 017_partition_log_tables
+Revises: 016_endpoint_sync_state
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+from typing import Union
+
+from alembic import op
+
+revision: str = "017_partition_log_tables"
+down_revision: Union[str, None] = "016_endpoint_sync_state"
+branch_labels: Union[str, tuple[str, ...], None] = None
+depends_on: Union[str, tuple[str, ...], None] = None
+
+# table -> (colonne de partitionnement, rétention en mois, archivage, index, contraintes)
+_TABLES = {
+    "audit_log": (
+        "logged_at", 24, True,
+        [
+            "CREATE INDEX idx_audit_log_entity ON audit_log (entity_type, entity_id)",
+            "CREATE INDEX idx_audit_log_time   ON audit_log (logged_at DESC)",
+            "CREATE INDEX idx_audit_log_reason ON audit_log (reason_code_id)",
+        ],
+        [
+            "ALTER TABLE audit_log ADD CONSTRAINT audit_log_reason_code_id_fkey "
+            "FOREIGN KEY (reason_code_id) REFERENCES audit_reason_code(id)",
+        ],
+    ),
+    "auth_attempt": (
+        "created_at", 3, False,
+        [
+            # Compteurs antiflood : échecs par email / tentatives par IP sur une fenêtre récente
+            "CREATE INDEX idx_auth_attempt_email_time ON auth_attempt (email, created_at)",
+            "CREATE INDEX idx_auth_attempt_ip_time    ON auth_attempt (ip_address, created_at)",
+        ],
+        [],
+    ),
+    "security_log": (
+        "created_at", 12, True,
+        [
+            "CREATE INDEX idx_security_log_time  ON security_log (created_at DESC)",
+            "CREATE INDEX idx_security_log_event ON security_log (event_type, created_at DESC)",
+        ],
+        [
+            "ALTER TABLE security_log ADD CONSTRAINT security_log_user_id_fkey "
+            "FOREIGN KEY (user_id) REFERENCES tunnel_user(id) ON DELETE SET NULL",
+        ],
+    ),
+}
+
+
+def upgrade() -> None:
+    op.execute("CREATE SCHEMA IF NOT EXISTS archive")
+
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS partition_policy (
+            table_name       TEXT    PRIMARY KEY,
+            partition_key    TEXT    NOT NULL,
+            retention_months INTEGER CHECK (retention_months IS NULL OR retention_months > 0),
+            archive          BOOLEAN NOT NULL DEFAULT true,
+            premake_months   INTEGER NOT NULL DEFAULT 3 CHECK (premake_months >= 0)
+        )
+    """)
+
+    # Crée la partition du mois de p_month si absente ; les lignes déjà tombées
+    # dans la partition par défaut pour ce mois y sont déplacées avant l'attache.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_ensure_month_partition(p_table TEXT, p_month DATE)
+        RETURNS TEXT AS $$
+        DECLARE
+            v_start   TIMESTAMPTZ := date_trunc('month', p_month);
+            v_end     TIMESTAMPTZ := date_trunc('month', p_month) + INTERVAL '1 month';
+            v_name    TEXT := format('%s_p%s', p_table, to_char(p_month, 'YYYY_MM'));
+            v_key     TEXT;
+        BEGIN
+            IF to_regclass(format('public.%I', v_name)) IS NOT NULL THEN
+                RETURN NULL;
+            END IF;
+            SELECT partition_key INTO STRICT v_key
+            FROM partition_policy WHERE table_name = p_table;
+
+            EXECUTE format(
+                'CREATE TABLE public.%I (LIKE public.%I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                v_name, p_table);
+            IF to_regclass(format('public.%I', p_table || '_default')) IS NOT NULL THEN
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM public.%I WHERE %I >= %L AND %I < %L RETURNING *) '
+                    'INSERT INTO public.%I SELECT * FROM moved',
+                    p_table || '_default', v_key, v_start, v_key, v_end, v_name);
+            END IF;
+            EXECUTE format(
+                'ALTER TABLE public.%I ATTACH PARTITION public.%I FOR VALUES FROM (%L) TO (%L)',
+                p_table, v_name, v_start, v_end);
+            RETURN v_name;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_partition_maintenance()
+        RETURNS TABLE (parent_table TEXT, partition_name TEXT, action TEXT) AS $$
+        DECLARE
+            r       RECORD;
+            p       RECORD;
+            v_month DATE;
+            v_name  TEXT;
+        BEGIN
+            -- Un seul exécutant à la fois (workers multiples, cron)
+            PERFORM pg_advisory_xact_lock(hashtext('fn_partition_maintenance'));
+
+            FOR r IN SELECT * FROM partition_policy ORDER BY table_name LOOP
+                parent_table := r.table_name;
+
+                FOR i IN 0..r.premake_months LOOP
+                    v_month := (date_trunc('month', now()) + make_interval(months => i))::date;
+                    v_name := fn_ensure_month_partition(r.table_name, v_month);
+                    IF v_name IS NOT NULL THEN
+                        partition_name := v_name;
+                        action := 'created';
+                        RETURN NEXT;
+                    END IF;
+                END LOOP;
+
+                CONTINUE WHEN r.retention_months IS NULL;
+
+                FOR p IN
+                    SELECT c.relname
+                    FROM pg_inherits inh
+                    JOIN pg_class c  ON c.oid = inh.inhrelid
+                    JOIN pg_class pc ON pc.oid = inh.inhparent
+                    JOIN pg_namespace n ON n.oid = pc.relnamespace
+                    WHERE n.nspname = 'public'
+                      AND pc.relname = r.table_name
+                      AND c.relname ~ ('^' || r.table_name || '_p[0-9]{4}_[0-9]{2}$')
+                      AND to_date(right(c.relname, 7), 'YYYY_MM')
+                          < date_trunc('month', now()) - make_interval(months => r.retention_months)
+                    ORDER BY c.relname
+                LOOP
+                    EXECUTE format('ALTER TABLE public.%I DETACH PARTITION public.%I',
+                                   r.table_name, p.relname);
+                    partition_name := p.relname;
+                    IF r.archive THEN
+                        EXECUTE format('ALTER TABLE public.%I SET SCHEMA archive', p.relname);
+                        action := 'archived';
+                    ELSE
+                        EXECUTE format('DROP TABLE public.%I', p.relname);
+                        action := 'dropped';
+                    END IF;
+                    RETURN NEXT;
+                END LOOP;
+            END LOOP;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    for table, (key, retention, archive, indexes, constraints) in _TABLES.items():
+        op.execute(
+            "INSERT INTO partition_policy (table_name, partition_key, retention_months, archive) "
+            f"VALUES ('{table}', '{key}', {retention}, {str(archive).lower()}) "
+            "ON CONFLICT (table_name) DO NOTHING"
+        )
+
+        # Ancienne table mise de côté : libère les noms de table, clé et index
+        op.execute(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+        op.execute(f"ALTER TABLE {table}_legacy RENAME CONSTRAINT {table}_pkey TO {table}_legacy_pkey")
+        for index in indexes:
+            op.execute(f"DROP INDEX IF EXISTS {index.split()[2]}")
+
+        op.execute(f"""
+            CREATE TABLE {table} (
+                LIKE {table}_legacy INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+                PRIMARY KEY (id, {key})
+            ) PARTITION BY RANGE ({key})
+        """)
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+        # Partitions de l'historique existant jusqu'au mois courant + 3
+        op.execute(f"""
+            SELECT fn_ensure_month_partition('{table}', m::date)
+            FROM generate_series(
+                date_trunc('month', COALESCE((SELECT min({key}) FROM {table}_legacy), now())),
+                date_trunc('month', now()) + INTERVAL '3 months',
+                INTERVAL '1 month') AS m
+        """)
+        op.execute(f"INSERT INTO {table} SELECT * FROM {table}_legacy")
+        op.execute(f"DROP TABLE {table}_legacy")
+
+        for statement in indexes + constraints:
+            op.execute(statement)
+        op.execute(f"ANALYZE {table}")
+
+
+def downgrade() -> None:
+    # Partitions archivées non réintégrées : restent dans le schéma archive
+    for table, (_, _, _, indexes, constraints) in _TABLES.items():
+        op.execute(f"ALTER TABLE {table} RENAME TO {table}_partitioned")
+        op.execute(f"ALTER TABLE {table}_partitioned RENAME CONSTRAINT {table}_pkey TO {table}_partitioned_pkey")
+        for index in indexes:
+            op.execute(f"DROP INDEX IF EXISTS {index.split()[2]}")
+        op.execute(f"""
+            CREATE TABLE {table} (
+                LIKE {table}_partitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+                PRIMARY KEY (id)
+            )
+        """)
+        op.execute(f"INSERT INTO {table} SELECT * FROM {table}_partitioned")
+        op.execute(f"DROP TABLE {table}_partitioned CASCADE")
+        for statement in indexes + constraints:
+            op.execute(statement)
+
+    op.execute("DROP FUNCTION IF EXISTS fn_partition_maintenance()")
+    op.execute("DROP FUNCTION IF EXISTS fn_ensure_month_partition(TEXT, DATE)")
+    op.execute("DROP TABLE IF EXISTS partition_policy")
@@ -0,0 +1,35 @@
+"""Compteurs antiflood en mémoire : index de relecture + notification ip_blocklist
+
+- `idx_auth_attempt_time` : chaque worker relit périodiquement les tentatives
+  récentes écrites par les autres (api/auth/antiflood.py) ;
+- trigger fn_notify_change() sur `ip_blocklist` : les caches de la liste de
+  blocage sont invalidés dès qu'un blocage est ajouté ou retiré.
+
+Revision ID: 018_antiflood_memory
+Revises: 017_partition_log_tables
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+from typing import Union
+
+from alembic import op
+
+revision: str = "018_antiflood_memory"
+down_revision: Union[str, None] = "017_partition_log_tables"
+branch_labels: Union[str, tuple[str, ...], None] = None
+depends_on: Union[str, tuple[str, ...], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE INDEX IF NOT EXISTS idx_auth_attempt_time ON auth_attempt (created_at)")
+    op.execute("""
+        CREATE TRIGGER trg_notify_change_ip_blocklist
+        AFTER INSERT OR UPDATE OR DELETE ON ip_blocklist
+        FOR EACH ROW EXECUTE FUNCTION fn_notify_change()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_notify_change_ip_blocklist ON ip_blocklist")
+    op.execute("DROP INDEX IF EXISTS idx_auth_attempt_time")
@@ -0,0 +1,95 @@
+"""Journal des mouvements de stock
+
+- `stock_movement` : entrées (receipt), sorties (issue), ajustements
+  (adjustment) et réservations (reservation, négatif = libération) ;
+- `stock_item.reserved_quantity` : quantité réservée, tenue à jour avec
+  `quantity` par les mouvements (POST /stock-movements, api/stock_movements) ;
+- trigger `trg_stock_item_quantity_ledger` : toute modification directe de
+  `stock_item.quantity` (création, PUT, PATCH /quantity) est journalisée
+  comme ajustement, sauf pendant l'application d'un lot de mouvements
+  (variable de transaction `tunnel.stock_ledger` = 'on') ;
+- solde d'ouverture : un ajustement par article dont la quantité est non nulle,
+  de sorte que la somme des mouvements égale la quantité en stock.
+
+Revision ID: 019_stock_movement
+Revises: 018_antiflood_memory
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+from typing import Union
+
+from alembic import op
+
+revision: str = "019_stock_movement"
+down_revision: Union[str, None] = "018_antiflood_memory"
+branch_labels: Union[str, tuple[str, ...], None] = None
+depends_on: Union[str, tuple[str, ...], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        ALTER TABLE stock_item
+            ADD COLUMN IF NOT EXISTS reserved_quantity INTEGER NOT NULL DEFAULT 0
+    """)
+
+    op.execute("""
+        CREATE TABLE stock_movement (
+            id            UUID        PRIMARY KEY DEFAULT gen_random_uuid(),
+            stock_item_id UUID        NOT NULL REFERENCES stock_item(id) ON DELETE CASCADE,
+            movement_type VARCHAR(20) NOT NULL
+                CHECK (movement_type IN ('receipt', 'issue', 'adjustment', 'reservation')),
+            delta         INTEGER     NOT NULL CHECK (delta <> 0),
+            reference     TEXT,
+            note          TEXT,
+            created_by    UUID,
+            created_at    TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+    op.execute("CREATE INDEX idx_stock_movement_item ON stock_movement (stock_item_id, created_at DESC)")
+    op.execute("CREATE INDEX idx_stock_movement_time ON stock_movement (created_at DESC)")
+
+    op.execute("""
+        INSERT INTO stock_movement (stock_item_id, movement_type, delta, note)
+        SELECT id, 'adjustment', quantity, 'Solde d''ouverture'
+        FROM stock_item
+        WHERE COALESCE(quantity, 0) <> 0
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_stock_item_quantity_ledger()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            v_delta INTEGER;
+        BEGIN
+            IF current_setting('tunnel.stock_ledger', true) = 'on' THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP = 'INSERT' THEN
+                v_delta := COALESCE(NEW.quantity, 0);
+            ELSE
+                v_delta := COALESCE(NEW.quantity, 0) - COALESCE(OLD.quantity, 0);
+            END IF;
+            IF v_delta <> 0 THEN
+                INSERT INTO stock_movement (stock_item_id, movement_type, delta, note)
+                VALUES (NEW.id, 'adjustment', v_delta,
+                        CASE WHEN TG_OP = 'INSERT' THEN 'Stock initial' ELSE 'Saisie directe de la quantité' END);
+            END IF;
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_stock_item_quantity_ledger
+        AFTER INSERT OR UPDATE OF quantity ON stock_item
+        FOR EACH ROW EXECUTE FUNCTION fn_stock_item_quantity_ledger()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_stock_item_quantity_ledger ON stock_item")
+    op.execute("DROP FUNCTION IF EXISTS fn_stock_item_quantity_ledger()")
+    op.execute("DROP TABLE IF EXISTS stock_movement")
+    op.execute("ALTER TABLE stock_item DROP COLUMN IF EXISTS reserved_quantity")
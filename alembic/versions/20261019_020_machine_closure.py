@@ -0,0 +1,129 @@
+"""Table de fermeture de la hiérarchie des équipements
+
+- `machine_closure` : une ligne par couple (ancêtre, descendant) de
+  `machine.equipement_mere`, profondeur comprise (0 = l'équipement lui-même).
+  Un sous-arbre complet se lit par `ancestor_id = …` (PK), les ancêtres
+  d'un équipement par `descendant_id = …` (index) ;
+- trigger `trg_machine_closure` : création, rattachement (UPDATE OF
+  equipement_mere) et suppression d'un équipement maintiennent la table
+  ensemblistement (tout le sous-arbre déplacé en deux requêtes). Un
+  rattachement qui créerait un cycle est refusé (RAISE → 400) ;
+- remplissage initial par CTE récursive (cycles éventuels ignorés).
+
+Revision ID: 020_machine_closure
+Revises: 019_stock_movement
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+from typing import Union
+
+from alembic import op
+
+revision: str = "020_machine_closure"
+down_revision: Union[str, None] = "019_stock_movement"
+branch_labels: Union[str, tuple[str, ...], None] = None
+depends_on: Union[str, tuple[str, ...], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE machine_closure (
+            ancestor_id   UUID     NOT NULL,
+            descendant_id UUID     NOT NULL,
+            depth         SMALLINT NOT NULL CHECK (depth >= 0),
+            PRIMARY KEY (ancestor_id, descendant_id)
+        )
+    """)
+    op.execute("CREATE INDEX idx_machine_closure_descendant ON machine_closure (descendant_id, depth)")
+
+    op.execute("""
+        INSERT INTO machine_closure (ancestor_id, descendant_id, depth)
+        WITH RECURSIVE walk(ancestor_id, descendant_id, depth, path) AS (
+            SELECT id, id, 0, ARRAY[id]
+            FROM machine
+            UNION ALL
+            SELECT w.ancestor_id, m.id, w.depth + 1, w.path || m.id
+            FROM walk w
+            JOIN machine m ON m.equipement_mere = w.descendant_id
+            WHERE NOT m.id = ANY(w.path)
+        )
+        SELECT ancestor_id, descendant_id, min(depth)
+        FROM walk
+        GROUP BY ancestor_id, descendant_id
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_machine_closure()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            -- Modifications de hiérarchie sérialisées : deux déplacements
+            -- concurrents ne peuvent pas former un cycle à eux deux.
+            PERFORM pg_advisory_xact_lock(hashtext('machine_closure'));
+
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO machine_closure (ancestor_id, descendant_id, depth)
+                VALUES (NEW.id, NEW.id, 0)
+                ON CONFLICT DO NOTHING;
+                IF NEW.equipement_mere IS NOT NULL THEN
+                    INSERT INTO machine_closure (ancestor_id, descendant_id, depth)
+                    SELECT a.ancestor_id, NEW.id, a.depth + 1
+                    FROM machine_closure a
+                    WHERE a.descendant_id = NEW.equipement_mere
+                    ON CONFLICT DO NOTHING;
+                END IF;
+                RETURN NULL;
+            END IF;
+
+            IF TG_OP = 'UPDATE' THEN
+                IF NEW.equipement_mere IS NOT DISTINCT FROM OLD.equipement_mere THEN
+                    RETURN NULL;
+                END IF;
+                IF NEW.equipement_mere IS NOT NULL AND EXISTS (
+                    SELECT 1 FROM machine_closure
+                    WHERE ancestor_id = NEW.id AND descendant_id = NEW.equipement_mere
+                ) THEN
+                    RAISE EXCEPTION 'Un équipement ne peut pas être rattaché à lui-même ou à l''un de ses descendants';
+                END IF;
+            END IF;
+
+            -- Détache le sous-arbre de OLD de ses anciens ancêtres
+            DELETE FROM machine_closure c
+            USING machine_closure a, machine_closure d
+            WHERE a.descendant_id = OLD.id AND a.depth > 0
+              AND d.ancestor_id = OLD.id
+              AND c.ancestor_id = a.ancestor_id
+              AND c.descendant_id = d.descendant_id;
+
+            IF TG_OP = 'DELETE' THEN
+                DELETE FROM machine_closure
+                WHERE ancestor_id = OLD.id OR descendant_id = OLD.id;
+                RETURN NULL;
+            END IF;
+
+            -- Rattache le sous-arbre sous les ancêtres du nouveau parent
+            IF NEW.equipement_mere IS NOT NULL THEN
+                INSERT INTO machine_closure (ancestor_id, descendant_id, depth)
+                SELECT a.ancestor_id, d.descendant_id, a.depth + d.depth + 1
+                FROM machine_closure a
+                CROSS JOIN machine_closure d
+                WHERE a.descendant_id = NEW.equipement_mere
+                  AND d.ancestor_id = NEW.id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_machine_closure
+        AFTER INSERT OR UPDATE OF equipement_mere OR DELETE ON machine
+        FOR EACH ROW EXECUTE FUNCTION fn_machine_closure()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_machine_closure ON machine")
+    op.execute("DROP FUNCTION IF EXISTS fn_machine_closure()")
+    op.execute("DROP TABLE IF EXISTS machine_closure")
@@ -0,0 +1,59 @@
+"""Version du catalogue des plans préventifs
+
+- `preventive_plan_catalogue_version` : une ligne, `version` incrémentée à
+  chaque écriture sur `preventive_plan` ou `preventive_plan_gamme_step`
+  (trigger par instruction, TRUNCATE compris) ;
+- le catalogue en mémoire (api/preventive_plans/repo.py) compare cette
+  version, lue en un accès par clé, à celle de sa copie avant de la réutiliser.
+
+Revision ID: 021_preventive_plan_catalogue
+Revises: 020_machine_closure
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+from typing import Union
+
+from alembic import op
+
+revision: str = "021_preventive_plan_catalogue"
+down_revision: Union[str, None] = "020_machine_closure"
+branch_labels: Union[str, tuple[str, ...], None] = None
+depends_on: Union[str, tuple[str, ...], None] = None
+
+_TABLES = ("preventive_plan", "preventive_plan_gamme_step")
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE preventive_plan_catalogue_version (
+            id      BOOLEAN PRIMARY KEY DEFAULT true CHECK (id),
+            version BIGINT  NOT NULL DEFAULT 0
+        )
+    """)
+    op.execute("INSERT INTO preventive_plan_catalogue_version (id, version) VALUES (true, 0)")
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_bump_preventive_plan_catalogue()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            UPDATE preventive_plan_catalogue_version SET version = version + 1;
+            RETURN NULL;
+        END;
+        $$
+    """)
+    for table in _TABLES:
+        op.execute(f"""
+            CREATE TRIGGER trg_catalogue_version_{table}
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION fn_bump_preventive_plan_catalogue()
+        """)
+
+
+def downgrade() -> None:
+    for table in _TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_catalogue_version_{table} ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS fn_bump_preventive_plan_catalogue()")
+    op.execute("DROP TABLE IF EXISTS preventive_plan_catalogue_version")
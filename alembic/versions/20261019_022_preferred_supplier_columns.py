@@ -0,0 +1,208 @@
+"""Fournisseur préféré et références dénormalisés sur stock_item et part
+
+Les listes du catalogue lisaient le préféré par jointure ou LATERAL et
+filtraient la recherche par EXISTS corrélés, pour chaque ligne de chaque page.
+Les valeurs sont désormais tenues à jour sur la ligne article, dans la
+transaction qui les modifie (même principe que `supplier_refs_count`) :
+
+- `stock_item.preferred_*` : référence, fournisseur, prix et délai de la ligne
+  `stock_item_supplier` préférée ;
+- `stock_item.supplier_refs_search` : références fournisseurs et fabricants de
+  l'article (une par ligne), pour la recherche par ILIKE ;
+- `part.preferred_manufacturer_*` : référence fabricant préférée (à défaut la
+  plus ancienne) de la pièce ;
+- triggers AFTER sur `stock_item_supplier`, `manufacturer_item` (référence
+  modifiée) et `part_manufacturer_ref` ; remplissage initial.
+
+Revision ID: 022_preferred_supplier_columns
+Revises: 021_preventive_plan_catalogue
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+from typing import Union
+
+from alembic import op
+
+revision: str = "022_preferred_supplier_columns"
+down_revision: Union[str, None] = "021_preventive_plan_catalogue"
+branch_labels: Union[str, tuple[str, ...], None] = None
+depends_on: Union[str, tuple[str, ...], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        ALTER TABLE stock_item
+            ADD COLUMN IF NOT EXISTS preferred_supplier_ref_id    UUID,
+            ADD COLUMN IF NOT EXISTS preferred_supplier_id        UUID,
+            ADD COLUMN IF NOT EXISTS preferred_supplier_ref       TEXT,
+            ADD COLUMN IF NOT EXISTS preferred_unit_price         NUMERIC(10, 2),
+            ADD COLUMN IF NOT EXISTS preferred_delivery_time_days INTEGER,
+            ADD COLUMN IF NOT EXISTS supplier_refs_search         TEXT NOT NULL DEFAULT ''
+    """)
+    op.execute("""
+        ALTER TABLE part
+            ADD COLUMN IF NOT EXISTS preferred_manufacturer_name TEXT,
+            ADD COLUMN IF NOT EXISTS preferred_manufacturer_ref  TEXT,
+            ADD COLUMN IF NOT EXISTS preferred_label             TEXT
+    """)
+
+    # ── stock_item ───────────────────────────────────────────────────────────
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_refresh_stock_item_supplier_summary(p_stock_item_ids UUID[])
+        RETURNS void
+        LANGUAGE sql
+        AS $$
+            UPDATE stock_item si
+            SET preferred_supplier_ref_id    = pref.id,
+                preferred_supplier_id        = pref.supplier_id,
+                preferred_supplier_ref       = pref.supplier_ref,
+                preferred_unit_price         = pref.unit_price,
+                preferred_delivery_time_days = pref.delivery_time_days,
+                supplier_refs_search         = COALESCE(refs.search, '')
+            FROM unnest(p_stock_item_ids) AS t(id)
+            LEFT JOIN LATERAL (
+                SELECT sis.id, sis.supplier_id, sis.supplier_ref, sis.unit_price, sis.delivery_time_days
+                FROM stock_item_supplier sis
+                WHERE sis.stock_item_id = t.id AND sis.is_preferred = true
+                ORDER BY sis.updated_at DESC NULLS LAST
+                LIMIT 1
+            ) pref ON true
+            LEFT JOIN LATERAL (
+                SELECT string_agg(r.ref, E'\\n') AS search
+                FROM (
+                    SELECT sis.supplier_ref AS ref
+                    FROM stock_item_supplier sis
+                    WHERE sis.stock_item_id = t.id
+                    UNION
+                    SELECT mi.manufacturer_ref
+                    FROM stock_item_supplier sis
+                    JOIN manufacturer_item mi ON mi.id = sis.manufacturer_item_id
+                    WHERE sis.stock_item_id = t.id AND mi.manufacturer_ref IS NOT NULL
+                ) r
+            ) refs ON true
+            WHERE si.id = t.id
+        $$
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_sync_stock_item_supplier_summary()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            v_ids UUID[];
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                v_ids := ARRAY[NEW.stock_item_id];
+            ELSIF TG_OP = 'DELETE' THEN
+                v_ids := ARRAY[OLD.stock_item_id];
+            ELSIF NEW.stock_item_id IS DISTINCT FROM OLD.stock_item_id THEN
+                v_ids := ARRAY[NEW.stock_item_id, OLD.stock_item_id];
+            ELSE
+                v_ids := ARRAY[NEW.stock_item_id];
+            END IF;
+            PERFORM fn_refresh_stock_item_supplier_summary(v_ids);
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_sync_stock_item_supplier_summary
+        AFTER INSERT OR DELETE OR UPDATE OF stock_item_id, supplier_id, supplier_ref, unit_price,
+            delivery_time_days, is_preferred, manufacturer_item_id
+        ON stock_item_supplier
+        FOR EACH ROW EXECUTE FUNCTION fn_sync_stock_item_supplier_summary()
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_sync_manufacturer_item_refs_search()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            IF NEW.manufacturer_ref IS DISTINCT FROM OLD.manufacturer_ref THEN
+                PERFORM fn_refresh_stock_item_supplier_summary(ARRAY(
+                    SELECT DISTINCT stock_item_id FROM stock_item_supplier
+                    WHERE manufacturer_item_id = NEW.id));
+            END IF;
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_sync_manufacturer_item_refs_search
+        AFTER UPDATE OF manufacturer_ref ON manufacturer_item
+        FOR EACH ROW EXECUTE FUNCTION fn_sync_manufacturer_item_refs_search()
+    """)
+    op.execute("SELECT fn_refresh_stock_item_supplier_summary(ARRAY(SELECT id FROM stock_item))")
+
+    # ── part ─────────────────────────────────────────────────────────────────
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_refresh_part_preferred_ref(p_part_ids UUID[])
+        RETURNS void
+        LANGUAGE sql
+        AS $$
+            UPDATE part p
+            SET preferred_manufacturer_name = pmr.manufacturer_name,
+                preferred_manufacturer_ref  = pmr.manufacturer_ref,
+                preferred_label             = pmr.label
+            FROM unnest(p_part_ids) AS t(id)
+            LEFT JOIN LATERAL (
+                SELECT manufacturer_name, manufacturer_ref, label
+                FROM part_manufacturer_ref
+                WHERE part_id = t.id
+                ORDER BY is_preferred DESC, created_at ASC
+                LIMIT 1
+            ) pmr ON true
+            WHERE p.id = t.id
+        $$
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_sync_part_preferred_ref()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM fn_refresh_part_preferred_ref(ARRAY[NEW.part_id]);
+            ELSIF TG_OP = 'DELETE' THEN
+                PERFORM fn_refresh_part_preferred_ref(ARRAY[OLD.part_id]);
+            ELSE
+                PERFORM fn_refresh_part_preferred_ref(ARRAY[NEW.part_id, OLD.part_id]);
+            END IF;
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_sync_part_preferred_ref
+        AFTER INSERT OR DELETE OR UPDATE OF part_id, manufacturer_name, manufacturer_ref, label, is_preferred
+        ON part_manufacturer_ref
+        FOR EACH ROW EXECUTE FUNCTION fn_sync_part_preferred_ref()
+    """)
+    op.execute("SELECT fn_refresh_part_preferred_ref(ARRAY(SELECT id FROM part))")
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_sync_part_preferred_ref ON part_manufacturer_ref")
+    op.execute("DROP FUNCTION IF EXISTS fn_sync_part_preferred_ref()")
+    op.execute("DROP FUNCTION IF EXISTS fn_refresh_part_preferred_ref(UUID[])")
+    op.execute("DROP TRIGGER IF EXISTS trg_sync_manufacturer_item_refs_search ON manufacturer_item")
+    op.execute("DROP FUNCTION IF EXISTS fn_sync_manufacturer_item_refs_search()")
+    op.execute("DROP TRIGGER IF EXISTS trg_sync_stock_item_supplier_summary ON stock_item_supplier")
+    op.execute("DROP FUNCTION IF EXISTS fn_sync_stock_item_supplier_summary()")
+    op.execute("DROP FUNCTION IF EXISTS fn_refresh_stock_item_supplier_summary(UUID[])")
+    op.execute("""
+        ALTER TABLE part
+            DROP COLUMN IF EXISTS preferred_manufacturer_name,
+            DROP COLUMN IF EXISTS preferred_manufacturer_ref,
+            DROP COLUMN IF EXISTS preferred_label
+    """)
+    op.execute("""
+        ALTER TABLE stock_item
+            DROP COLUMN IF EXISTS preferred_supplier_ref_id,
+            DROP COLUMN IF EXISTS preferred_supplier_id,
+            DROP COLUMN IF EXISTS preferred_supplier_ref,
+            DROP COLUMN IF EXISTS preferred_unit_price,
+            DROP COLUMN IF EXISTS preferred_delivery_time_days,
+            DROP COLUMN IF EXISTS supplier_refs_search
+    """)
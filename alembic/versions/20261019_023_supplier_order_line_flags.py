@@ -0,0 +1,163 @@
+"""Indicateurs de consultation précalculés des lignes de commande fournisseur
+
+- `supplier_order_line_flags` : une ligne par ligne de commande liée à au
+  moins une demande d'achat — nombre de DA liées, `is_consultation` (une DA
+  liée est aussi sur une ligne d'un autre panier) et `consultation_resolved`
+  (une ligne sœur ou la ligne elle-même est sélectionnée). Absence de ligne =
+  0 DA, pas de consultation, résolue ;
+- trigger `trg_sol_flags_link` sur `supplier_order_line_purchase_request`
+  (liaison, déliaison, suppression en cascade d'une ligne) et
+  `trg_sol_flags_line` sur `supplier_order_line` (UPDATE OF is_selected,
+  supplier_order_id) : recalcul des lignes partageant une DA avec la ligne
+  touchée, dans la même transaction ;
+- table à part plutôt que colonnes sur la ligne : le recalcul ne déclenche
+  pas `updated_at` des lignes sœurs ;
+- remplissage initial.
+
+Revision ID: 023_supplier_order_line_flags
+Revises: 022_preferred_supplier_columns
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+from typing import Union
+
+from alembic import op
+
+revision: str = "023_supplier_order_line_flags"
+down_revision: Union[str, None] = "022_preferred_supplier_columns"
+branch_labels: Union[str, tuple[str, ...], None] = None
+depends_on: Union[str, tuple[str, ...], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE supplier_order_line_flags (
+            supplier_order_line_id UUID    PRIMARY KEY
+                REFERENCES supplier_order_line (id) ON DELETE CASCADE,
+            purchase_request_count INTEGER NOT NULL DEFAULT 0,
+            is_consultation        BOOLEAN NOT NULL DEFAULT false,
+            consultation_resolved  BOOLEAN NOT NULL DEFAULT true
+        )
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_refresh_supplier_order_line_flags(p_line_ids UUID[])
+        RETURNS void
+        LANGUAGE sql
+        AS $$
+            INSERT INTO supplier_order_line_flags AS f (
+                supplier_order_line_id, purchase_request_count, is_consultation, consultation_resolved
+            )
+            SELECT sol.id, c.pr_count, c.is_consultation,
+                   NOT c.is_consultation OR c.has_selected_sister
+            FROM supplier_order_line sol
+            CROSS JOIN LATERAL (
+                SELECT
+                    count(DISTINCT own.purchase_request_id)::int AS pr_count,
+                    COALESCE(bool_or(sister.supplier_order_id <> sol.supplier_order_id), false)
+                        AS is_consultation,
+                    COALESCE(bool_or(sister.is_selected), false) AS has_selected_sister
+                FROM supplier_order_line_purchase_request own
+                JOIN supplier_order_line_purchase_request link
+                    ON link.purchase_request_id = own.purchase_request_id
+                JOIN supplier_order_line sister ON sister.id = link.supplier_order_line_id
+                WHERE own.supplier_order_line_id = sol.id
+            ) c
+            WHERE sol.id = ANY(p_line_ids)
+            ON CONFLICT (supplier_order_line_id) DO UPDATE
+            SET purchase_request_count = EXCLUDED.purchase_request_count,
+                is_consultation        = EXCLUDED.is_consultation,
+                consultation_resolved  = EXCLUDED.consultation_resolved
+            WHERE (f.purchase_request_count, f.is_consultation, f.consultation_resolved)
+                IS DISTINCT FROM
+                  (EXCLUDED.purchase_request_count, EXCLUDED.is_consultation, EXCLUDED.consultation_resolved)
+        $$
+    """)
+
+    # Lignes partageant une DA avec les lignes / DA données, plus ces lignes
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_refresh_supplier_order_line_flags_around(
+            p_line_ids UUID[], p_purchase_request_ids UUID[]
+        )
+        RETURNS void
+        LANGUAGE sql
+        AS $$
+            SELECT fn_refresh_supplier_order_line_flags(ARRAY(
+                SELECT unnest(p_line_ids)
+                UNION
+                SELECT link.supplier_order_line_id
+                FROM supplier_order_line_purchase_request link
+                WHERE link.purchase_request_id = ANY(p_purchase_request_ids)
+                   OR link.purchase_request_id IN (
+                        SELECT own.purchase_request_id
+                        FROM supplier_order_line_purchase_request own
+                        WHERE own.supplier_order_line_id = ANY(p_line_ids)
+                   )
+            ))
+        $$
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_sol_flags_link()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM fn_refresh_supplier_order_line_flags_around(
+                    ARRAY[NEW.supplier_order_line_id], ARRAY[NEW.purchase_request_id]);
+            ELSIF TG_OP = 'DELETE' THEN
+                PERFORM fn_refresh_supplier_order_line_flags_around(
+                    ARRAY[OLD.supplier_order_line_id], ARRAY[OLD.purchase_request_id]);
+            ELSE
+                PERFORM fn_refresh_supplier_order_line_flags_around(
+                    ARRAY[NEW.supplier_order_line_id, OLD.supplier_order_line_id],
+                    ARRAY[NEW.purchase_request_id, OLD.purchase_request_id]);
+            END IF;
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_sol_flags_link
+        AFTER INSERT OR DELETE OR UPDATE OF supplier_order_line_id, purchase_request_id
+        ON supplier_order_line_purchase_request
+        FOR EACH ROW EXECUTE FUNCTION fn_sol_flags_link()
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fn_sol_flags_line()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            IF NEW.is_selected IS DISTINCT FROM OLD.is_selected
+               OR NEW.supplier_order_id IS DISTINCT FROM OLD.supplier_order_id THEN
+                PERFORM fn_refresh_supplier_order_line_flags_around(ARRAY[NEW.id], '{}'::uuid[]);
+            END IF;
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_sol_flags_line
+        AFTER UPDATE OF is_selected, supplier_order_id ON supplier_order_line
+        FOR EACH ROW EXECUTE FUNCTION fn_sol_flags_line()
+    """)
+
+    op.execute("""
+        SELECT fn_refresh_supplier_order_line_flags(ARRAY(
+            SELECT DISTINCT supplier_order_line_id FROM supplier_order_line_purchase_request
+        ))
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_sol_flags_line ON supplier_order_line")
+    op.execute("DROP FUNCTION IF EXISTS fn_sol_flags_line()")
+    op.execute("DROP TRIGGER IF EXISTS trg_sol_flags_link ON supplier_order_line_purchase_request")
+    op.execute("DROP FUNCTION IF EXISTS fn_sol_flags_link()")
+    op.execute("DROP FUNCTION IF EXISTS fn_refresh_supplier_order_line_flags_around(UUID[], UUID[])")
+    op.execute("DROP FUNCTION IF EXISTS fn_refresh_supplier_order_line_flags(UUID[])")
+    op.execute("DROP TABLE IF EXISTS supplier_order_line_flags")
@@ -0,0 +1,39 @@
+"""Curseur de relecture des tentatives de connexion
+
+- `auth_attempt.seq` : numéro attribué par la base à l'insertion (séquence
+  `auth_attempt_seq_seq`). Chaque worker relit les tentatives des autres par
+  `seq > dernier lu` au lieu de relire une fenêtre de temps à chaque passe
+  (api/auth/antiflood.py) ;
+- `idx_auth_attempt_seq` : index de cette relecture (créé sur chaque partition) ;
+- les lignes existantes gardent `seq` NULL : elles ne sont lues que par le
+  chargement initial d'un worker (fenêtre d'une heure sur created_at).
+
+Revision ID: 024_auth_attempt_seq
+Revises: 023_supplier_order_line_flags
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+from typing import Union
+
+from alembic import op
+
+revision: str = "024_auth_attempt_seq"
+down_revision: Union[str, None] = "023_supplier_order_line_flags"
+branch_labels: Union[str, tuple[str, ...], None] = None
+depends_on: Union[str, tuple[str, ...], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE SEQUENCE IF NOT EXISTS auth_attempt_seq_seq")
+    # Colonne ajoutée sans défaut puis défaut posé : pas de réécriture des partitions
+    op.execute("ALTER TABLE auth_attempt ADD COLUMN IF NOT EXISTS seq BIGINT")
+    op.execute("ALTER TABLE auth_attempt ALTER COLUMN seq SET DEFAULT nextval('auth_attempt_seq_seq')")
+    op.execute("ALTER SEQUENCE auth_attempt_seq_seq OWNED BY auth_attempt.seq")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_auth_attempt_seq ON auth_attempt (seq)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_auth_attempt_seq")
+    op.execute("ALTER TABLE auth_attempt DROP COLUMN IF EXISTS seq")
+    op.execute("DROP SEQUENCE IF EXISTS auth_attempt_seq_seq")
@@ -5,7 +5,7 @@ from typing import Any, Dict, List, Optional
 import bcrypt
 
 from api.db import get_connection, release_connection
-from api.errors.exceptions import DatabaseError, NotFoundError, ConflictError
+from api.errors.exceptions import DatabaseError, NotFoundError, ConflictError, ValidationError
 from api.utils.sanitizer import strip_html
 
 logger = logging.getLogger(__name__)
@@ -16,6 +16,60 @@ def _raise(e: Exception, context: str):
     raise_db_error(e, context)
 
 
+# Lot de permissions : une seule requête (voir bulk_patch_permissions)
+_BULK_PERMISSIONS_SQL = """
+    WITH req AS (
+        SELECT DISTINCT ON (r.role_id, r.endpoint_id) r.role_id, r.endpoint_id, r.allowed
+        FROM unnest(%s::uuid[], %s::uuid[], %s::bool[]) WITH ORDINALITY
+            AS r(role_id, endpoint_id, allowed, ord)
+        ORDER BY r.role_id, r.endpoint_id, r.ord DESC
+    ),
+    cells AS (
+        SELECT req.role_id, req.endpoint_id, req.allowed,
+               tr.code AS role_code, te.code AS endpoint_code,
+               tp.allowed AS old_allowed
+        FROM req
+        LEFT JOIN tunnel_role       tr ON tr.id = req.role_id
+        LEFT JOIN tunnel_endpoint   te ON te.id = req.endpoint_id
+        LEFT JOIN tunnel_permission tp ON tp.role_id = req.role_id
+                                      AND tp.endpoint_id = req.endpoint_id
+    ),
+    changed AS (
+        INSERT INTO tunnel_permission (role_id, endpoint_id, allowed)
+        SELECT role_id, endpoint_id, allowed
+        FROM cells
+        WHERE role_code IS NOT NULL AND endpoint_code IS NOT NULL
+          AND old_allowed IS DISTINCT FROM allowed
+        ON CONFLICT (role_id, endpoint_id) DO UPDATE SET allowed = EXCLUDED.allowed
+        RETURNING role_id, endpoint_id
+    ),
+    audited AS (
+        INSERT INTO permission_audit_log
+            (changed_by, role_id, endpoint_id, old_allowed, new_allowed)
+        SELECT %s::uuid, c.role_id, c.endpoint_id, c.old_allowed, c.allowed
+        FROM cells c
+        JOIN changed USING (role_id, endpoint_id)
+    ),
+    logged AS (
+        INSERT INTO security_log (event_type, user_id, detail)
+        SELECT 'PERMISSION_CHANGED', %s::uuid, jsonb_build_object(
+            'bulk', true,
+            'count', count(*),
+            'changes', jsonb_agg(jsonb_build_object(
+                'role', c.role_code, 'endpoint', c.endpoint_code,
+                'old_allowed', c.old_allowed, 'new_allowed', c.allowed)))
+        FROM cells c
+        JOIN changed USING (role_id, endpoint_id)
+        HAVING count(*) > 0
+    )
+    SELECT c.role_id, c.endpoint_id, c.role_code, c.endpoint_code,
+           c.old_allowed, c.allowed, changed.role_id IS NOT NULL AS changed
+    FROM cells c
+    LEFT JOIN changed USING (role_id, endpoint_id)
+    ORDER BY c.role_code, c.endpoint_code
+"""
+
+
 class AdminUserRepository:
     """Accès BDD pour la gestion admin des utilisateurs tunnel_user."""
 
@@ -344,13 +398,19 @@ class AdminRoleRepository:
             conn = get_connection()
             with conn.cursor() as cur:
                 cur.execute(
-                    "SELECT role_id, endpoint_id, allowed FROM tunnel_permission WHERE id = %s::uuid",
+                    """
+                    SELECT tp.role_id, tp.endpoint_id, tp.allowed, tr.code, te.code
+                    FROM tunnel_permission tp
+                    JOIN tunnel_role     tr ON tr.id = tp.role_id
+                    JOIN tunnel_endpoint te ON te.id = tp.endpoint_id
+                    WHERE tp.id = %s::uuid
+                    """,
                     (permission_id,),
                 )
                 row = cur.fetchone()
             if not row:
                 raise NotFoundError(f"Permission {permission_id} non trouvée")
-            role_id, endpoint_id, old_allowed = row
+            role_id, endpoint_id, old_allowed, role_code, endpoint_code = row
 
             with conn.cursor() as cur:
                 cur.execute(
@@ -376,11 +436,13 @@ class AdminRoleRepository:
                         "new_allowed": allowed,
                     })),
                 )
+                from api.auth.permissions import publish_permission_changes
+                publish_permission_changes(cur, [(role_code, endpoint_code, allowed)])
             conn.commit()
 
-            # Invalider le cache permissions
-            from api.auth.permissions import reload_permissions
-            reload_permissions()
+            # Mise à jour ciblée du cache permissions (les autres workers : par NOTIFY)
+            from api.auth.permissions import permission_cache
+            permission_cache.apply([(role_code, endpoint_code, allowed)])
 
             return {"id": permission_id, "allowed": allowed}
         except NotFoundError:
@@ -393,6 +455,68 @@ class AdminRoleRepository:
             if conn:
                 release_connection(conn)
 
+    def bulk_patch_permissions(self, changes: List[Dict[str, Any]],
+                               changed_by: str) -> Dict[str, Any]:
+        """
+        Applique un lot de permissions rôle × endpoint en une seule requête :
+        upsert des seules cellules modifiées, une ligne permission_audit_log par
+        cellule modifiée et une seule entrée security_log pour tout le lot.
+        La dernière occurrence d'une même cellule l'emporte.
+        """
+        conn = None
+        try:
+            conn = get_connection()
+            with conn.cursor() as cur:
+                cur.execute(
+                    _BULK_PERMISSIONS_SQL,
+                    (
+                        [str(c["role_id"]) for c in changes],
+                        [str(c["endpoint_id"]) for c in changes],
+                        [c["allowed"] for c in changes],
+                        changed_by,
+                        changed_by,
+                    ),
+                )
+                rows = cur.fetchall()
+
+            unknown = [r for r in rows if r[2] is None or r[3] is None]
+            if unknown:
+                conn.rollback()
+                raise ValidationError(
+                    f"{len(unknown)} couple(s) rôle × endpoint inconnu(s) : "
+                    + ", ".join(f"{r[0]} × {r[1]}" for r in unknown[:10])
+                )
+
+            applied = [
+                {"role_code": role_code, "endpoint_code": endpoint_code,
+                 "old_allowed": old_allowed, "allowed": allowed}
+                for _, _, role_code, endpoint_code, old_allowed, allowed, changed in rows
+                if changed
+            ]
+            from api.auth.permissions import permission_cache, publish_permission_changes
+            cells = [(c["role_code"], c["endpoint_code"], c["allowed"]) for c in applied]
+            with conn.cursor() as cur:
+                publish_permission_changes(cur, cells)
+            conn.commit()
+
+            # Ce worker tout de suite, les autres par NOTIFY
+            permission_cache.apply(cells)
+
+            return {
+                "updated": len(applied),
+                "unchanged": len(rows) - len(applied),
+                "changes": applied,
+            }
+        except ValidationError:
+            raise
+        except Exception as e:
+            if conn:
+                conn.rollback()
+            _raise(e, "modification groupée des permissions")
+        finally:
+            if conn:
+                release_connection(conn)
+
     def get_audit_log(self, role_id: Optional[str] = None,
                       start_date=None, end_date=None) -> List[Dict[str, Any]]:
         conn = None
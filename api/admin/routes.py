@@ -11,7 +11,8 @@ from api.admin.repo import (
 from api.admin.schemas import (
     AdminUserCreate, AdminUserUpdate, AdminUserRolePatch, AdminUserActivePatch,
     AdminUserOut, AdminUserListItem, PasswordResetOut,
-    RoleOut, PermissionOut, PermissionPatch, EndpointOut, EndpointPatch, AuditLogOut,
+    RoleOut, PermissionOut, PermissionPatch, PermissionBulkPatch, PermissionBulkOut,
+    EndpointOut, EndpointPatch, AuditLogOut,
     ActionCategoryPatch, ActionCategoryActivePatch,
     ActionSubcategoryCreate, ActionSubcategoryPatch, ActionSubcategoryActivePatch,
     ComplexityFactorPatch, ComplexityFactorActivePatch,
@@ -19,8 +20,10 @@ from api.admin.schemas import (
     InterventionStatusPatch,
     SecurityLogOut, IpBlocklistCreate, IpBlocklistOut,
     EmailDomainRuleCreate, EmailDomainRuleOut,
-    MailSettingsOut,
+    MailSettingsOut, SlowQueryListOut,
 )
+from api import slow_queries
+from api.auth.antiflood import ip_blocklist_cache
 from api.auth.permissions import require_role
 from api.db import get_connection, release_connection
 from api.errors.exceptions import ValidationError, NotFoundError
@@ -127,6 +130,13 @@ def get_role_permissions(role_id: str):
     return AdminRoleRepository().get_role_permissions(role_id)
 
 
+@router.patch("/permissions", response_model=PermissionBulkOut, status_code=200)
+def bulk_patch_permissions(payload: PermissionBulkPatch, request: Request, _=_admin_only):
+    """Modifie un lot de cellules rôle × endpoint en une requête (cellules inchangées ignorées)."""
+    return AdminRoleRepository().bulk_patch_permissions(
+        [c.model_dump() for c in payload.changes], _get_user_id(request))
+
+
 @router.patch("/permissions/{permission_id}", status_code=200)
 def patch_permission(permission_id: str, payload: PermissionPatch,
                      request: Request, _=_admin_only):
@@ -176,9 +186,8 @@ def patch_endpoint(endpoint_id: str, payload: EndpointPatch):
 @router.post("/endpoints/sync", status_code=200, dependencies=[_admin_only])
 async def sync_endpoints(request: Request):
     """Force un rescan des routes FastAPI et UPSERT dans tunnel_endpoint."""
-    from api.app import app as fastapi_app
     from api.app import sync_endpoints_catalog
-    await sync_endpoints_catalog()
+    await sync_endpoints_catalog(force=True)
     return {"message": "Catalogue synchronisé"}
 
 
@@ -528,17 +537,21 @@ def list_ip_blocklist():
 
 @router.post("/ip-blocklist", response_model=IpBlocklistOut, status_code=201)
 def add_ip_block(payload: IpBlocklistCreate, request: Request, _=_admin_only):
-    return AdminSecurityRepository().add_ip_block(
+    block = AdminSecurityRepository().add_ip_block(
         ip_address=payload.ip_address,
         reason=payload.reason,
         blocked_until=payload.blocked_until,
         created_by=_get_user_id(request),
     )
+    # Autres workers : invalidés par le trigger NOTIFY sur ip_blocklist
+    ip_blocklist_cache.invalidate()
+    return block
 
 
 @router.delete("/ip-blocklist/{block_id}", status_code=200, dependencies=[_admin_only])
 def remove_ip_block(block_id: str):
     AdminSecurityRepository().remove_ip_block(block_id)
+    ip_blocklist_cache.invalidate()
     return {"message": "Blocage supprimé"}
 
 
@@ -560,6 +573,32 @@ def remove_email_domain_rule(rule_id: str):
     return {"message": "Règle supprimée"}
 
 
+# ------------------------------------------------------------------ #
+# Requêtes lentes                                                     #
+# ------------------------------------------------------------------ #
+
+@router.get("/slow-queries", response_model=SlowQueryListOut, dependencies=[_admin_only])
+def list_slow_queries(
+    fingerprint: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+):
+    """Requêtes SQL ayant dépassé SLOW_QUERY_MS, avec leur plan (plus récentes d'abord)."""
+    items = slow_queries.get_entries()
+    if fingerprint:
+        items = [e for e in items if e["fingerprint"] == fingerprint]
+    return SlowQueryListOut(
+        enabled=settings.SLOW_QUERY_MS > 0,
+        threshold_ms=settings.SLOW_QUERY_MS,
+        items=items[:limit],
+    )
+
+
+@router.delete("/slow-queries", status_code=200, dependencies=[_admin_only])
+def clear_slow_queries():
+    count = slow_queries.clear()
+    return {"message": f"{count} requête(s) lente(s) effacée(s)"}
+
+
 # ------------------------------------------------------------------ #
 # Configuration mail                                                  #
 # ------------------------------------------------------------------ #
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, ConfigDict
+from pydantic import BaseModel, EmailStr, ConfigDict, Field
 from typing import Optional, Any
 from uuid import UUID
 from datetime import datetime
@@ -99,6 +99,29 @@ class PermissionPatch(BaseModel):
     allowed: bool
 
 
+class PermissionBulkItem(BaseModel):
+    role_id: UUID
+    endpoint_id: UUID
+    allowed: bool
+
+
+class PermissionBulkPatch(BaseModel):
+    changes: list[PermissionBulkItem] = Field(..., min_length=1, max_length=5000)
+
+
+class PermissionChangeOut(BaseModel):
+    role_code: str
+    endpoint_code: str
+    old_allowed: Optional[bool] = None
+    allowed: bool
+
+
+class PermissionBulkOut(BaseModel):
+    updated: int
+    unchanged: int
+    changes: list[PermissionChangeOut]
+
+
 class EndpointPatch(BaseModel):
     description: Optional[str] = None
     module: Optional[str] = None
@@ -224,3 +247,23 @@ class MailSettingsOut(BaseModel):
     smtp_from: str
     smtp_from_name: str
     smtp_starttls: bool
+
+
+# --- Requêtes lentes ---
+
+class SlowQueryOut(BaseModel):
+    fingerprint: str
+    sql: str
+    param_shapes: Optional[Any] = None
+    duration_ms: float
+    route: Optional[str] = None
+    captured_at: datetime
+    plan: Optional[Any] = None
+    analyzed: bool = False
+    plan_error: Optional[str] = None
+
+
+class SlowQueryListOut(BaseModel):
+    enabled: bool
+    threshold_ms: int
+    items: list[SlowQueryOut]
@@ -3,14 +3,16 @@ import logging
 import sys
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
 from slowapi.errors import RateLimitExceeded
 from slowapi import _rate_limit_exceeded_handler
 from api.limiter import limiter
 from api.settings import settings
-from api.db import init_pool, close_pool
+from api.db import init_pool, init_replica_pool, close_pool, worker_pool_bounds
 from api.auth.middleware import JWTMiddleware
+from api.auth.antiflood import attempt_tracker, ip_blocklist_cache
 from api.auth.routes import router as auth_router
 from api.interventions.routes import router as intervention_router
 from api.intervention_actions.routes import router as intervention_action_router
@@ -25,6 +27,7 @@ from api.equipement_statuts.routes import router as equipement_statut_router
 from api.stats.routes import router as stats_router
 from api.purchase_requests.routes import router as purchase_request_router
 from api.stock_items.routes import router as stock_item_router
+from api.stock_movements.routes import router as stock_movement_router
 from api.parts.routes import router as parts_router
 from api.stock_families.routes import router as stock_family_router
 from api.stock_sub_families.routes import router as stock_sub_family_router
@@ -45,9 +48,14 @@ from api.dashboard.routes import router as dashboard_router
 from api.admin.routes import router as admin_router
 from api.api_keys.routes import router as api_keys_router
 from api.audits.routes import router as audit_router
+from api.events.routes import router as events_router
+from api.events.listener import change_feed
 from api.audits.middleware import AuditMiddleware
 from api.errors.handlers import register_error_handlers
 from api.health import health_check
+from api.utils.http_cache import CompressionETagMiddleware
+from api.metrics import MetricsMiddleware, render_metrics
+from api.partitions import run_partition_maintenance
 
 
 class ColoredFormatter(logging.Formatter):
@@ -81,19 +89,70 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# Connexions ouvertes hors pool par chaque worker : flux de changements,
+# antiflood, limiteur (+ EXPLAIN des requêtes lentes si activé)
+_DEDICATED_CONNECTIONS = 3
+
+
+def _pool_bounds() -> tuple[int, int]:
+    """Taille du pool de ce worker : part du budget global, sinon DB_POOL_MIN / DB_POOL_MAX."""
+    if not settings.DB_CONNECTION_BUDGET:
+        return settings.DB_POOL_MIN, settings.DB_POOL_MAX
+    dedicated = _DEDICATED_CONNECTIONS + (1 if settings.SLOW_QUERY_MS > 0 else 0)
+    return worker_pool_bounds(
+        settings.DB_CONNECTION_BUDGET, settings.API_WORKERS, dedicated, settings.DB_POOL_MIN)
+
+
+def run_startup_tasks() -> None:
+    """Travaux de démarrage à faire une fois par déploiement (pas par worker) :
+    catalogue d'endpoints et maintenance des partitions. Pool initialisé requis."""
+    asyncio.run(sync_endpoints_catalog())
+    try:
+        run_partition_maintenance()
+    except Exception as e:
+        logger.warning("Maintenance des partitions impossible au démarrage : %s", e)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialise le pool DB, charge les permissions et synchronise le catalogue d'endpoints."""
+    """Initialise le pool DB, charge les permissions, synchronise le catalogue d'endpoints, entretient les partitions des journaux et démarre le flux de changements.
+
+    Sous api/server.py (plusieurs workers), le catalogue et les partitions sont
+    traités une fois par le superviseur (RUN_STARTUP_TASKS=false ici) ; le cache
+    de permissions, propre à chaque processus, reste chargé par chaque worker.
+    """
     loop = asyncio.get_event_loop()
+    minconn, maxconn = _pool_bounds()
     await loop.run_in_executor(
         None,
-        lambda: init_pool(settings.DATABASE_URL, settings.DB_POOL_MIN, settings.DB_POOL_MAX),
+        lambda: init_pool(settings.DATABASE_URL, minconn, maxconn),
     )
+    if settings.DATABASE_REPLICA_URL:
+        await loop.run_in_executor(
+            None,
+            lambda: init_replica_pool(
+                settings.DATABASE_REPLICA_URL,
+                settings.DB_REPLICA_POOL_MIN, settings.DB_REPLICA_POOL_MAX),
+        )
     # Import lazy pour éviter la circularité avec auth au niveau module
     from api.auth.permissions import permission_cache
     permission_cache.load()
-    await sync_endpoints_catalog()
+    if settings.RUN_STARTUP_TASKS:
+        await sync_endpoints_catalog()
+        try:
+            await loop.run_in_executor(None, run_partition_maintenance)
+        except Exception as e:
+            logger.warning("Maintenance des partitions impossible au démarrage : %s", e)
+    # Antiflood : tentatives de la dernière heure en mémoire, liste de blocage invalidée par NOTIFY
+    await loop.run_in_executor(None, attempt_tracker.start)
+    change_feed.add_listener("ip_blocklist", ip_blocklist_cache.invalidate)
+    # Permissions modifiées sur un autre worker (publish_permission_changes)
+    change_feed.add_listener("tunnel_permission", permission_cache.on_change)
+    change_feed.start(loop)
     yield
+    change_feed.stop()
+    # Dernier lot de tentatives écrit dans auth_attempt avant la fermeture
+    await loop.run_in_executor(None, attempt_tracker.stop)
     close_pool()
 
 
@@ -131,6 +190,9 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
 
 app.add_middleware(SecurityHeadersMiddleware)
 
+# ETag / 304 et compression gzip-brotli des routes marquées Depends(http_cache)
+app.add_middleware(CompressionETagMiddleware)
+
 # Inclusion des routes métier (PostgreSQL)
 app.include_router(intervention_router)
 app.include_router(intervention_action_router)
@@ -145,6 +207,7 @@ app.include_router(stats_router)
 app.include_router(complexity_factor_router)
 app.include_router(purchase_request_router)
 app.include_router(stock_item_router)
+app.include_router(stock_movement_router)
 app.include_router(parts_router)
 app.include_router(stock_family_router)
 app.include_router(stock_sub_family_router)
@@ -166,80 +229,133 @@ app.include_router(auth_router)
 app.include_router(admin_router)
 app.include_router(api_keys_router)
 app.include_router(audit_router)
+app.include_router(events_router)
+
+
+_SYNC_CHECK_SQL = """
+    SELECT s.route_hash = %s
+       AND s.role_signature = (
+           SELECT md5(string_agg(id::text, ',' ORDER BY id)) FROM tunnel_role)
+    FROM tunnel_endpoint_sync s
+"""
+
+_SYNC_CATALOG_SQL = """
+    WITH routes AS (
+        SELECT *
+        FROM unnest(%s::text[], %s::text[], %s::text[], %s::text[], %s::text[], %s::bool[])
+            AS r(code, method, path, description, module, is_sensitive)
+    ), upserted AS (
+        INSERT INTO tunnel_endpoint (code, method, path, description, module, is_sensitive)
+        SELECT code, method, path, description, module, is_sensitive FROM routes
+        ON CONFLICT (code) DO UPDATE SET
+            method       = EXCLUDED.method,
+            path         = EXCLUDED.path,
+            description  = EXCLUDED.description,
+            module       = EXCLUDED.module,
+            is_sensitive = EXCLUDED.is_sensitive
+        WHERE (tunnel_endpoint.method, tunnel_endpoint.path, tunnel_endpoint.description,
+               tunnel_endpoint.module, tunnel_endpoint.is_sensitive)
+          IS DISTINCT FROM (EXCLUDED.method, EXCLUDED.path, EXCLUDED.description,
+                            EXCLUDED.module, EXCLUDED.is_sensitive)
+        RETURNING id
+    ), endpoints AS (
+        -- Nouveaux endpoints (RETURNING) + existants (instantané avant l'INSERT)
+        SELECT id FROM upserted
+        UNION
+        SELECT te.id FROM tunnel_endpoint te JOIN routes r ON r.code = te.code
+    ), perms AS (
+        INSERT INTO tunnel_permission (role_id, endpoint_id, allowed)
+        SELECT tr.id, e.id, false
+        FROM tunnel_role tr CROSS JOIN endpoints e
+        ON CONFLICT (role_id, endpoint_id) DO NOTHING
+        RETURNING 1
+    )
+    SELECT (SELECT count(*) FROM upserted), (SELECT count(*) FROM perms)
+"""
+
+_SYNC_STORE_SQL = """
+    INSERT INTO tunnel_endpoint_sync (id, route_hash, role_signature, endpoint_count, synced_at)
+    SELECT true, %s, md5(string_agg(id::text, ',' ORDER BY id)), %s, now() FROM tunnel_role
+    ON CONFLICT (id) DO UPDATE SET
+        route_hash     = EXCLUDED.route_hash,
+        role_signature = EXCLUDED.role_signature,
+        endpoint_count = EXCLUDED.endpoint_count,
+        synced_at      = EXCLUDED.synced_at
+"""
+
+
+def _collect_endpoint_rows() -> list[tuple]:
+    """Table des routes : (code, method, path, description, module, is_sensitive), une par code."""
+    import re
+
+    rows: dict[str, tuple] = {}
+    for route in app.routes:
+        if not hasattr(route, "methods") or not hasattr(route, "path"):
+            continue
+        path = route.path
+        tags = getattr(route, "tags", None) or []
+        module = tags[0] if tags else None
+        summary = getattr(route, "summary", None) or getattr(
+            route, "name", None)
+        operation_id = getattr(route, "name", None) or ""
+        is_sensitive = path.startswith("/admin")
+
+        # code = "{module}:{operation_id}" normalisé
+        prefix = module or (path.split(
+            "/")[1] if path.count("/") >= 1 else "root")
+        code_raw = f"{prefix}:{operation_id}"
+        code = re.sub(r"[^a-z0-9:_\-]", "_", code_raw.lower())[:100]
+
+        for method in sorted(route.methods or {"GET"}):
+            endpoint_code = f"{code}_{method.lower()}" if len(
+                route.methods or set()) > 1 else code
+            # Même code rencontré deux fois : la dernière route l'emporte
+            rows[endpoint_code] = (endpoint_code, method, path,
+                                   summary, module, is_sensitive)
+    return sorted(rows.values())
 
 
 @app.on_event("startup")
-async def sync_endpoints_catalog():
+async def sync_endpoints_catalog(force: bool = False):
     """
-    Scanne toutes les routes FastAPI et fait un UPSERT dans tunnel_endpoint.
+    Synchronise la table des routes FastAPI avec tunnel_endpoint.
     Maintient le catalogue à jour après chaque déploiement.
     Les routes /admin/* sont marquées is_sensitive=True par défaut.
     Crée également les entrées tunnel_permission manquantes (allowed=False) pour chaque rôle.
+
+    Une seule requête ensembliste (unnest) pour endpoints + permissions. Passe
+    entière sautée si l'empreinte des routes et la liste des rôles n'ont pas
+    changé depuis la dernière synchronisation (sauf `force`).
     """
+    import hashlib
+    import json
     from api.db import get_connection, release_connection
-    import re
+
+    rows = _collect_endpoint_rows()
+    route_hash = hashlib.sha256(
+        json.dumps(rows, default=str).encode()).hexdigest()
 
     conn = None
     try:
         conn = get_connection()
-        upserted = 0
-        for route in app.routes:
-            if not hasattr(route, "methods") or not hasattr(route, "path"):
-                continue
-            path = route.path
-            tags = getattr(route, "tags", None) or []
-            module = tags[0] if tags else None
-            summary = getattr(route, "summary", None) or getattr(
-                route, "name", None)
-            operation_id = getattr(route, "name", None) or ""
-            is_sensitive = path.startswith("/admin")
-
-            # code = "{module}:{operation_id}" normalisé
-            prefix = module or (path.split(
-                "/")[1] if path.count("/") >= 1 else "root")
-            code_raw = f"{prefix}:{operation_id}"
-            code = re.sub(r"[^a-z0-9:_\-]", "_", code_raw.lower())[:100]
-
-            for method in (route.methods or {"GET"}):
-                endpoint_code = f"{code}_{method.lower()}" if len(
-                    route.methods or set()) > 1 else code
-                with conn.cursor() as cur:
-                    cur.execute(
-                        """
-                        INSERT INTO tunnel_endpoint
-                            (code, method, path, description, module, is_sensitive)
-                        VALUES (%s, %s, %s, %s, %s, %s)
-                        ON CONFLICT (code) DO UPDATE SET
-                            method       = EXCLUDED.method,
-                            path         = EXCLUDED.path,
-                            description  = EXCLUDED.description,
-                            module       = EXCLUDED.module,
-                            is_sensitive = EXCLUDED.is_sensitive
-                        RETURNING id
-                        """,
-                        (endpoint_code, method, path,
-                         summary, module, is_sensitive),
-                    )
-                    row = cur.fetchone()
-                    if row:
-                        endpoint_id = row[0]
-                        # Créer les permissions manquantes pour chaque rôle (allowed=False par défaut)
-                        cur.execute(
-                            """
-                            INSERT INTO tunnel_permission (role_id, endpoint_id, allowed)
-                            SELECT tr.id, %s::uuid, false
-                            FROM tunnel_role tr
-                            WHERE NOT EXISTS (
-                                SELECT 1 FROM tunnel_permission tp
-                                WHERE tp.role_id = tr.id AND tp.endpoint_id = %s::uuid
-                            )
-                            """,
-                            (endpoint_id, endpoint_id),
-                        )
-                upserted += 1
+        with conn.cursor() as cur:
+            if not force:
+                cur.execute(_SYNC_CHECK_SQL, (route_hash,))
+                row = cur.fetchone()
+                if row and row[0]:
+                    conn.rollback()
+                    logger.info(
+                        "sync_endpoints_catalog : %d endpoints inchangés, synchronisation ignorée",
+                        len(rows))
+                    return
+            columns = list(zip(*rows)) if rows else [()] * 6
+            cur.execute(_SYNC_CATALOG_SQL, tuple(list(c) for c in columns))
+            changed, permissions = cur.fetchone()
+            cur.execute(_SYNC_STORE_SQL, (route_hash, len(rows)))
         conn.commit()
         logger.info(
-            "sync_endpoints_catalog : %d endpoints synchronisés", upserted)
+            "sync_endpoints_catalog : %d endpoints synchronisés (%d modifiés, %d permissions créées)",
+            len(rows), changed, permissions)
     except Exception as e:
         logger.error("Erreur sync_endpoints_catalog : %s", e)
     finally:
@@ -259,6 +375,15 @@ async def ping_endpoint():
     return "pong"
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Histogrammes Prometheus par route (durée, requêtes SQL, temps DB, attente pool).
+
+    Authentifiée comme les autres routes : le scraper utilise une clé X-API-Key.
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 # Middleware JWT (appliqué à toutes les routes sauf exceptions publiques)
 # Vérifie que le JWT Directus est valide et extrait user_id + role
 app.add_middleware(JWTMiddleware)
@@ -266,6 +391,10 @@ app.add_middleware(JWTMiddleware)
 # Middleware Audit — s'exécute après JWT (user_id disponible dans request.state)
 app.add_middleware(AuditMiddleware)
 
+# Middleware Metrics — enveloppe JWT/Audit : leurs requêtes SQL sont imputées
+# à la requête HTTP (Server-Timing + histogrammes /metrics)
+app.add_middleware(MetricsMiddleware)
+
 # Middleware CORS — ajouté en dernier = plus externe = enveloppe tout,
 # y compris les réponses d'erreur de JWTMiddleware
 app.add_middleware(
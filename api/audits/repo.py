@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import base64
 import json
 import logging
 from datetime import datetime
@@ -10,11 +11,30 @@ from uuid import UUID
 
 from psycopg2.extras import RealDictCursor
 
-from api.db import get_connection, release_connection
-from api.errors.exceptions import raise_db_error
+from api.db import get_connection, get_read_connection, release_connection
+from api.errors.exceptions import ValidationError, raise_db_error
 
 logger = logging.getLogger(__name__)
 
+# Décisions par page du briefing (défaut / maximum)
+BRIEFING_PAGE_SIZE = 500
+BRIEFING_MAX_PAGE_SIZE = 1000
+
+
+def _encode_briefing_cursor(logged_at: datetime, log_id: Any) -> str:
+    """Curseur opaque (logged_at, id) de la dernière décision d'une page."""
+    raw = f"{logged_at.isoformat()}|{log_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_briefing_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        logged_at, log_id = raw.split("|", 1)
+        return datetime.fromisoformat(logged_at), UUID(log_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValidationError("Curseur de briefing invalide")
+
 
 def _shape_log_row(row: Dict[str, Any]) -> Dict[str, Any]:
     """Transforme une ligne plate SQL en dict conforme à AuditLogOut (reason et changed_by imbriqués)."""
@@ -57,6 +77,10 @@ class AuditRepository:
     def _get_connection(self):
         return get_connection()
 
+    def _get_read_connection(self):
+        # Journal consulté en lecture seule : réplica si disponible et à jour
+        return get_read_connection()
+
     # ── Raisons ──────────────────────────────────────────────────────────────
 
     def get_all_reasons(
@@ -193,7 +217,7 @@ class AuditRepository:
         """Requête paginée sur audit_log avec filtres optionnels et facettes optionnelles."""
         conn = None
         try:
-            conn = self._get_connection()
+            conn = self._get_read_connection()
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 where_clauses: List[str] = []
                 params: List[Any] = []
@@ -338,45 +362,89 @@ class AuditRepository:
         from_dt: datetime,
         to_dt: datetime,
         exclude_system: bool = False,
+        limit: int = BRIEFING_PAGE_SIZE,
+        cursor: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Génère un rapport de briefing sur une fenêtre temporelle."""
-        rows = self.get_logs(
-            from_dt=from_dt,
-            to_dt=to_dt,
-            exclude_system=exclude_system,
-            limit=1000,
-        )["items"]
-
-        decisions = []
-        by_entity: Dict[str, int] = {}
-        by_decision: Dict[str, int] = {}
+        """
+        Génère un rapport de briefing sur une fenêtre temporelle.
+
+        Les décisions sont paginées par clé (logged_at, id) décroissante : au
+        plus `limit` par appel, `truncated` / `next_cursor` indiquent la suite.
+        Les compteurs (entité, décision, auteur, période) portent sur toute la
+        fenêtre, agrégés en SQL en une requête GROUPING SETS, et ne sont
+        calculés qu'à la première page (sans `cursor`) : `summary` vaut None
+        ensuite, plutôt que de reparcourir la fenêtre à chaque page. Compteurs
+        et première page partagent le même instantané (REPEATABLE READ) ; les
+        pages suivantes sont lues chacune dans le leur.
+        """
+        limit = max(1, min(limit, BRIEFING_MAX_PAGE_SIZE))
+        where_clauses = ["al.logged_at >= %s", "al.logged_at <= %s"]
+        params: List[Any] = [from_dt, to_dt]
+        if exclude_system:
+            where_clauses.append("al.is_system = FALSE")
+        where_sql = " AND ".join(where_clauses)
+
+        page_clauses = list(where_clauses)
+        page_params = list(params)
+        if cursor:
+            page_clauses.append("(al.logged_at, al.id) < (%s, %s)")
+            page_params.extend(_decode_briefing_cursor(cursor))
+        page_where_sql = " AND ".join(page_clauses)
+
+        # Granularité des périodes : heure jusqu'à deux jours, jour au-delà
+        granularity = "hour" if (to_dt - from_dt).total_seconds() <= 48 * 3600 else "day"
 
-        for row in rows:
-            old_v = row.get("old_value") or {}
-            new_v = row.get("new_value") or {}
-            from_val = next(iter(old_v.values()), None) if old_v else None
-            to_val = next(iter(new_v.values()), None) if new_v else None
-
-            reason = row["reason"]
-            decisions.append({
-                "timestamp": row["logged_at"],
-                "entity_type": row["entity_type"],
-                "entity_id": row["entity_id"],
-                "decision_type": row["decision_type"],
-                "from_value": from_val,
-                "to_value": to_val,
-                "reason_code": reason["code"],
-                "reason_label": reason["label"],
-                "reason_color": reason.get("color"),
-                "reason_text": row.get("reason_text"),
-                "changed_by": row.get("changed_by"),
-                "is_system": row["is_system"],
-            })
-
-            et = row["entity_type"]
-            dt = row["decision_type"]
-            by_entity[et] = by_entity.get(et, 0) + 1
-            by_decision[dt] = by_decision.get(dt, 0) + 1
+        conn = None
+        try:
+            conn = self._get_read_connection()
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                summary = None
+                if cursor is None:
+                    summary = self._get_briefing_summary(cur, where_sql, params, granularity)
+
+                cur.execute(
+                    f"""
+                    SELECT
+                        al.id,
+                        al.logged_at AS timestamp,
+                        al.entity_type,
+                        al.entity_id,
+                        al.decision_type,
+                        CASE WHEN jsonb_typeof(al.old_value) = 'object'
+                             THEN (SELECT value FROM jsonb_each(al.old_value) LIMIT 1)
+                        END AS from_value,
+                        CASE WHEN jsonb_typeof(al.new_value) = 'object'
+                             THEN (SELECT value FROM jsonb_each(al.new_value) LIMIT 1)
+                        END AS to_value,
+                        arc.code  AS reason_code,
+                        arc.label AS reason_label,
+                        arc.color AS reason_color,
+                        al.reason_text,
+                        al.changed_by,
+                        al.is_system
+                    FROM audit_log al
+                    LEFT JOIN audit_reason_code arc ON al.reason_code_id = arc.id
+                    WHERE {page_where_sql}
+                    ORDER BY al.logged_at DESC, al.id DESC
+                    LIMIT %s
+                    """,
+                    [*page_params, limit + 1],
+                )
+                decisions = [dict(row) for row in cur.fetchall()]
+        except Exception as e:
+            raise_db_error(e, "briefing audit")
+        finally:
+            if conn:
+                release_connection(conn)
+
+        truncated = len(decisions) > limit
+        decisions = decisions[:limit]
+        next_cursor = None
+        if truncated:
+            last = decisions[-1]
+            next_cursor = _encode_briefing_cursor(last["timestamp"], last["id"])
+        for d in decisions:
+            d.pop("id", None)
 
         duration = (to_dt - from_dt).total_seconds() / 60
 
@@ -385,9 +453,62 @@ class AuditRepository:
             "session_end": to_dt,
             "duration_minutes": round(duration, 2),
             "decisions": decisions,
-            "summary": {
-                "total_decisions": len(decisions),
-                "by_entity_type": by_entity,
-                "by_decision_type": by_decision,
-            },
+            "truncated": truncated,
+            "next_cursor": next_cursor,
+            "summary": summary,
+        }
+
+    @staticmethod
+    def _get_briefing_summary(cur, where_sql: str, params: List[Any], granularity: str) -> Dict[str, Any]:
+        """Compteurs du briefing sur toute la fenêtre, dans la transaction de `cur`."""
+        cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        cur.execute(
+            f"""
+            SELECT
+                GROUPING(al.entity_type)   AS g_entity,
+                GROUPING(al.decision_type) AS g_decision,
+                GROUPING(al.changed_by)    AS g_actor,
+                GROUPING(date_trunc(%s, al.logged_at)) AS g_period,
+                al.entity_type,
+                al.decision_type,
+                al.changed_by,
+                date_trunc(%s, al.logged_at) AS period_start,
+                COUNT(*) AS count
+            FROM audit_log al
+            WHERE {where_sql}
+            GROUP BY GROUPING SETS (
+                (al.entity_type),
+                (al.decision_type),
+                (al.changed_by),
+                (date_trunc(%s, al.logged_at)),
+                ()
+            )
+            """,
+            [granularity, granularity, *params, granularity],
+        )
+        total = 0
+        by_entity: Dict[str, int] = {}
+        by_decision: Dict[str, int] = {}
+        by_actor: List[Dict[str, Any]] = []
+        by_period: List[Dict[str, Any]] = []
+        for row in cur.fetchall():
+            if not row["g_entity"]:
+                by_entity[row["entity_type"]] = row["count"]
+            elif not row["g_decision"]:
+                by_decision[row["decision_type"]] = row["count"]
+            elif not row["g_actor"]:
+                by_actor.append({"changed_by": row["changed_by"], "count": row["count"]})
+            elif not row["g_period"]:
+                by_period.append({"period_start": row["period_start"], "count": row["count"]})
+            else:
+                total = row["count"]
+        by_actor.sort(key=lambda a: a["count"], reverse=True)
+        by_period.sort(key=lambda p: p["period_start"])
+        return {
+            "total_decisions": total,
+            "by_entity_type": by_entity,
+            "by_decision_type": by_decision,
+            "by_changed_by": by_actor,
+            "period_granularity": granularity,
+            "by_period": by_period,
         }
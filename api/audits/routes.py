@@ -7,7 +7,9 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, Query, Request
 
 from api.auth.permissions import require_authenticated
-from api.audits.repo import AuditRepository
+from api.audits.repo import BRIEFING_MAX_PAGE_SIZE, BRIEFING_PAGE_SIZE, AuditRepository
+from api.utils.http_cache import http_cache
+from api.utils.response import FastJSONResponse
 from api.audits.schemas import AuditLogCreate, AuditLogOut, AuditReasonOut, BriefingReport
 
 router = APIRouter(prefix="/audit", tags=["Audit"])
@@ -37,13 +39,16 @@ def get_briefing(
     from_dt: datetime = Query(..., description="Début de la fenêtre (ISO 8601)"),
     to_dt: datetime = Query(..., description="Fin de la fenêtre (ISO 8601)"),
     exclude_system: bool = Query(False, description="Exclure les mutations système"),
+    limit: int = Query(BRIEFING_PAGE_SIZE, ge=1, le=BRIEFING_MAX_PAGE_SIZE, description="Décisions par page"),
+    cursor: Optional[str] = Query(None, description="next_cursor de la page précédente"),
     repo: AuditRepository = Depends(_repo),
 ):
-    """Rapport de toutes les décisions sur une fenêtre temporelle."""
-    return repo.get_briefing(from_dt=from_dt, to_dt=to_dt, exclude_system=exclude_system)
+    """Rapport des décisions sur une fenêtre temporelle : compteurs sur toute la fenêtre, décisions paginées."""
+    return repo.get_briefing(
+        from_dt=from_dt, to_dt=to_dt, exclude_system=exclude_system, limit=limit, cursor=cursor)
 
 
-@router.get("/logs", dependencies=[Depends(require_authenticated)])
+@router.get("/logs", response_class=FastJSONResponse, dependencies=[Depends(require_authenticated), Depends(http_cache)])
 def get_logs(
     from_dt: Optional[datetime] = Query(None),
     to_dt: Optional[datetime] = Query(None),
@@ -59,7 +64,7 @@ def get_logs(
     repo: AuditRepository = Depends(_repo),
 ):
     """Requête paginée sur les entrées d'audit log. Retourne { items, pagination, facets }."""
-    return repo.get_logs(
+    return FastJSONResponse(repo.get_logs(
         from_dt=from_dt,
         to_dt=to_dt,
         entity_type=entity_type,
@@ -71,7 +76,7 @@ def get_logs(
         limit=limit,
         offset=offset,
         include_facets=include_facets,
-    )
+    ))
 
 
 @router.post("/log", status_code=201, dependencies=[Depends(require_authenticated)])
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, ConfigDict, Field
@@ -60,10 +60,23 @@ class BriefingDecision(BaseModel):
     is_system: bool
 
 
+class BriefingActorCount(BaseModel):
+    changed_by: Optional[UUID] = None
+    count: int
+
+
+class BriefingPeriodCount(BaseModel):
+    period_start: datetime
+    count: int
+
+
 class BriefingSummary(BaseModel):
     total_decisions: int
     by_entity_type: Dict[str, int]
     by_decision_type: Dict[str, int]
+    by_changed_by: List[BriefingActorCount] = []
+    period_granularity: Literal["hour", "day"] = "hour"
+    by_period: List[BriefingPeriodCount] = []
 
 
 class BriefingReport(BaseModel):
@@ -71,7 +84,10 @@ class BriefingReport(BaseModel):
     session_end: datetime
     duration_minutes: float
     decisions: List[BriefingDecision]
-    summary: BriefingSummary
+    truncated: bool = Field(default=False, description="D'autres décisions suivent (voir next_cursor)")
+    next_cursor: Optional[str] = Field(default=None, description="À repasser en `cursor` pour la page suivante")
+    summary: Optional[BriefingSummary] = Field(
+        default=None, description="Compteurs de toute la fenêtre, première page seulement (sans `cursor`)")
 
 
 class AuditRuleReason(BaseModel):
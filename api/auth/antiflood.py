@@ -1,71 +1,363 @@
+"""
+Protection antiflood du login, servie depuis la mémoire du process.
+
+Avant la vérification du mot de passe, aucun accès base :
+
+    - `ip_blocklist_cache` : copie des blocages actifs, invalidée à chaque
+      modification (trigger fn_notify_change → change_feed, migration 018)
+      et rechargée au plus tard toutes les _BLOCKLIST_TTL secondes ;
+    - `attempt_tracker` : fenêtres glissantes par email (échecs, 15 min) et
+      par IP (tentatives, 1 h), tenues en mémoire.
+
+Les tentatives sont écrites dans `auth_attempt` par lots, par un thread
+(toutes les _SYNC_INTERVAL secondes), qui relit dans la même passe les
+tentatives enregistrées par les autres workers : les compteurs de chaque
+process couvrent tous les workers, à un intervalle de synchronisation près.
+La relecture part du dernier `seq` lu (numéro attribué par la base, migration
+024) : chaque tentative d'un autre worker n'est lue qu'une fois, celles du
+process sont exclues par la requête.
+Base injoignable : les tentatives restent en attente (bornées) et le
+comptage local continue de protéger le process.
+"""
+
 import logging
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
 from fastapi import HTTPException, status
-from api.db import get_connection, release_connection
+
+from api.db import db_connection, open_dedicated_connection
 
 logger = logging.getLogger(__name__)
 
 _MSG_BLOCKED = "Trop de tentatives. Réessayez plus tard."
 
+EMAIL_MAX_FAILURES = 5
+EMAIL_WINDOW_S = 15 * 60
+IP_MAX_ATTEMPTS = 20
+IP_WINDOW_S = 60 * 60
+
+_SYNC_INTERVAL = 0.5
+_RETRY_DELAY = 5.0
+# Un seq manquant sous des seq déjà lus est une insertion d'un autre worker pas
+# encore commitée : le curseur l'attend au plus ce délai (au-delà, lot annulé).
+_GAP_GRACE_S = 5.0
+_SWEEP_INTERVAL = 60.0
+_MAX_PENDING = 10_000
+_BLOCKLIST_TTL = 60.0
+
+_INSERT_SQL = """
+    INSERT INTO auth_attempt (id, email, ip_address, success, created_at)
+    SELECT i, e, ip, s, to_timestamp(t)
+    FROM unnest(%s::uuid[], %s::text[], %s::text[], %s::bool[], %s::float8[]) AS a(i, e, ip, s, t)
+    RETURNING seq
+"""
+
+# Chargement initial : la dernière heure jusqu'au seq courant (lignes d'avant
+# la migration 024 comprises, seq NULL), hors tentatives du process
+_LOAD_SQL = """
+    SELECT seq, email, ip_address, success, EXTRACT(EPOCH FROM created_at)::float8
+    FROM auth_attempt
+    WHERE created_at > to_timestamp(%s)
+      AND (seq IS NULL OR (seq <= %s AND seq <> ALL(%s::bigint[])))
+"""
+
+# Relecture incrémentale ; la borne created_at limite les partitions parcourues
+_TAIL_SQL = """
+    SELECT seq, email, ip_address, success, EXTRACT(EPOCH FROM created_at)::float8
+    FROM auth_attempt
+    WHERE seq > %s AND seq <> ALL(%s::bigint[]) AND created_at > to_timestamp(%s)
+"""
+
+# (id, email, ip, success, horodatage)
+Attempt = Tuple[str, Optional[str], str, bool, float]
+
+
+class AttemptTracker:
+    """Fenêtres glissantes des tentatives de connexion, synchronisées avec auth_attempt."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._email_failures: Dict[str, Deque[float]] = {}
+        self._ip_attempts: Dict[str, Deque[float]] = {}
+        self._pending: List[Attempt] = []
+        self._cursor: Optional[int] = None    # tous les seq ≤ curseur sont comptés
+        self._ahead: Set[int] = set()         # seq > curseur déjà comptés (locaux ou relus)
+        self._stuck_since: Optional[float] = None
+        self._healthy = True
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # ── Comptage ─────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _recent(window: Optional[Deque[float]], span: float, now: float) -> int:
+        if not window:
+            return 0
+        while window and window[0] <= now - span:
+            window.popleft()
+        return len(window)
+
+    def email_failures(self, email: str) -> int:
+        with self._lock:
+            return self._recent(self._email_failures.get(email.lower()), EMAIL_WINDOW_S, time.time())
+
+    def ip_attempts(self, ip: str) -> int:
+        with self._lock:
+            return self._recent(self._ip_attempts.get(ip), IP_WINDOW_S, time.time())
+
+    def _count(self, email: Optional[str], ip: str, success: bool, ts: float) -> None:
+        """Ajoute une tentative aux fenêtres (horodatages maintenus triés)."""
+        targets = [self._ip_attempts.setdefault(ip, deque())]
+        if email and not success:
+            targets.append(self._email_failures.setdefault(email.lower(), deque()))
+        for window in targets:
+            if not window or window[-1] <= ts:
+                window.append(ts)
+            else:
+                # Tentative relue d'un autre worker, légèrement antérieure
+                items = sorted([*window, ts])
+                window.clear()
+                window.extend(items)
+
+    def record(self, email: Optional[str], ip: str, success: bool) -> None:
+        attempt_id = str(uuid.uuid4())
+        now = time.time()
+        with self._lock:
+            self._count(email, ip, success, now)
+            if len(self._pending) >= _MAX_PENDING:
+                # Base injoignable depuis longtemps : les plus anciennes ne seront pas écrites
+                del self._pending[0]
+            self._pending.append((attempt_id, email, ip, success, now))
+        self._ensure_thread()
+
+    # ── Synchronisation avec auth_attempt ────────────────────────────────────
+
+    def start(self) -> None:
+        """Charge la dernière heure de tentatives puis démarre le thread (lifespan)."""
+        conn = None
+        try:
+            conn = open_dedicated_connection()
+            self._sync(conn)
+        except Exception as e:
+            self._healthy = False
+            logger.warning("Antiflood : chargement initial impossible, comptage local — %s", e)
+        finally:
+            if conn is not None:
+                conn.close()
+        self._ensure_thread()
 
-def check_ip_blocklist(ip: str, conn) -> None:
+    def stop(self) -> None:
+        """Arrête le thread puis écrit les tentatives en attente (arrêt du lifespan).
+
+        Sans ce dernier passage, le lot en attente (jusqu'à un intervalle de
+        synchronisation) serait perdu à chaque redémarrage ou déploiement.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=_RETRY_DELAY + 1)
+        with self._lock:
+            if not self._pending:
+                return
+        conn = None
+        try:
+            conn = open_dedicated_connection()
+            self._sync(conn)
+        except Exception as e:
+            logger.warning("Antiflood : %d tentatives non écrites à l'arrêt — %s", len(self._pending), e)
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None or self._stop.is_set():
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._sync_loop, name="antiflood-sync", daemon=True)
+                self._thread.start()
+
+    def _sync(self, conn) -> None:
+        """Écrit les tentatives en attente puis relit celles des autres workers."""
+        horizon = time.time() - IP_WINDOW_S
+        with self._lock:
+            batch, self._pending = self._pending, []
+        with conn.cursor() as cur:
+            written: List[int] = []
+            if batch:
+                try:
+                    cur.execute(_INSERT_SQL, tuple(map(list, zip(*batch))))
+                    written = [row[0] for row in cur.fetchall()]
+                except Exception:
+                    with self._lock:
+                        self._pending = batch + self._pending
+                    raise
+            if self._cursor is None:
+                cur.execute("SELECT COALESCE(max(seq), 0) FROM auth_attempt")
+                cursor = cur.fetchone()[0]
+                cur.execute(_LOAD_SQL, (horizon, cursor, written))
+            else:
+                cursor = None
+                cur.execute(_TAIL_SQL, (self._cursor, [*self._ahead, *written], horizon))
+            rows = cur.fetchall()
+        with self._lock:
+            for _seq, email, ip, success, ts in rows:
+                self._count(email, ip, success, ts)
+            if cursor is not None:
+                self._cursor = cursor
+                self._ahead = {seq for seq in written if seq > cursor}
+            else:
+                self._ahead.update(written)
+                self._ahead.update(row[0] for row in rows)
+            self._advance()
+
+    def _advance(self) -> None:
+        """Avance le curseur sur les seq consécutifs déjà comptés (sous verrou)."""
+        while self._ahead:
+            following = self._cursor + 1
+            if following in self._ahead:
+                self._ahead.discard(following)
+                self._cursor = following
+                self._stuck_since = None
+                continue
+            # Trou : insertion concurrente pas encore visible, ou lot annulé
+            now = time.monotonic()
+            if self._stuck_since is None:
+                self._stuck_since = now
+            if now - self._stuck_since < _GAP_GRACE_S:
+                break
+            self._cursor = min(self._ahead) - 1
+            self._stuck_since = None
+
+    def _sweep(self) -> None:
+        """Oublie les clés sans tentative récente."""
+        now = time.time()
+        with self._lock:
+            for windows, span in ((self._email_failures, EMAIL_WINDOW_S),
+                                  (self._ip_attempts, IP_WINDOW_S)):
+                for key in [k for k, w in windows.items() if not self._recent(w, span, now)]:
+                    del windows[key]
+
+    def _sync_loop(self) -> None:
+        conn = None
+        last_sweep = time.monotonic()
+        # Base injoignable : nouvel essai espacé plutôt qu'à chaque intervalle
+        while not self._stop.wait(_SYNC_INTERVAL if self._healthy else _RETRY_DELAY):
+            try:
+                if conn is None or conn.closed:
+                    conn = open_dedicated_connection()
+                self._sync(conn)
+                if not self._healthy:
+                    logger.info("Antiflood : tentatives de nouveau synchronisées")
+                self._healthy = True
+            except Exception as e:
+                if self._healthy:
+                    logger.warning("Antiflood : base injoignable, comptage local au process — %s", e)
+                self._healthy = False
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+                    conn = None
+            if time.monotonic() - last_sweep >= _SWEEP_INTERVAL:
+                last_sweep = time.monotonic()
+                self._sweep()
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+class IpBlocklistCache:
+    """Blocages IP actifs en mémoire : ip → fin du blocage (None = permanent)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._blocked: Dict[str, Optional[float]] = {}
+        self._version = 0                     # incrémenté à chaque invalidation
+        self._loaded_version = -1
+        self._expires_at = 0.0                # monotonic : rechargement au-delà
+        self._last_success: Optional[float] = None
+
+    def invalidate(self, event: Optional[dict] = None) -> None:
+        """Force un rechargement au prochain contrôle (callback change_feed)."""
+        self._version += 1
+
+    def _load(self) -> None:
+        with db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT ip_address, EXTRACT(EPOCH FROM blocked_until)::float8
+                    FROM ip_blocklist
+                    WHERE blocked_until IS NULL OR blocked_until > now()
+                    """
+                )
+                self._blocked = dict(cur.fetchall())
+        logger.debug("Liste de blocage IP chargée : %d entrées", len(self._blocked))
+
+    def _stale(self) -> bool:
+        return self._loaded_version != self._version or time.monotonic() >= self._expires_at
+
+    def is_blocked(self, ip: str) -> bool:
+        if self._stale():
+            with self._lock:
+                if self._stale():
+                    # Version lue avant la requête : une invalidation concurrente n'est pas perdue
+                    version = self._version
+                    try:
+                        self._load()
+                        self._last_success = time.monotonic()
+                        self._loaded_version = version
+                        self._expires_at = time.monotonic() + _BLOCKLIST_TTL
+                    except Exception as e:
+                        if self._last_success is None \
+                                or time.monotonic() - self._last_success > 10 * _BLOCKLIST_TTL:
+                            raise
+                        # Copie récente conservée, nouvel essai dans _RETRY_DELAY secondes
+                        logger.warning("Liste de blocage IP non rechargée : %s", e)
+                        self._loaded_version = version
+                        self._expires_at = time.monotonic() + _RETRY_DELAY
+        until = self._blocked.get(ip, 0.0)
+        return until is None or until > time.time()
+
+
+attempt_tracker = AttemptTracker()
+ip_blocklist_cache = IpBlocklistCache()
+
+
+def check_ip_blocklist(ip: str) -> None:
     """Lève 429 si l'IP est dans ip_blocklist (permanente ou non expirée)."""
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT id FROM ip_blocklist
-            WHERE ip_address = %s
-              AND (blocked_until IS NULL OR blocked_until > now())
-            LIMIT 1
-            """,
-            (ip,),
-        )
-        if cur.fetchone():
-            logger.warning("IP bloquée : %s", ip)
-            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                                detail=_MSG_BLOCKED)
-
-
-def check_email_flood(email: str, conn) -> None:
+    if ip_blocklist_cache.is_blocked(ip):
+        logger.warning("IP bloquée : %s", ip)
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                            detail=_MSG_BLOCKED)
+
+
+def check_email_flood(email: str) -> None:
     """Lève 429 si ≥ 5 échecs pour cet email dans les 15 dernières minutes."""
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT COUNT(*) FROM auth_attempt
-            WHERE email = %s
-              AND success = false
-              AND created_at > now() - INTERVAL '15 minutes'
-            """,
-            (email,),
-        )
-        count = cur.fetchone()[0]
-    if count >= 5:
+    count = attempt_tracker.email_failures(email)
+    if count >= EMAIL_MAX_FAILURES:
         logger.warning("Flood email détecté : %s (%d tentatives)", email, count)
         raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                             detail=_MSG_BLOCKED)
 
 
-def check_ip_flood(ip: str, conn) -> None:
+def check_ip_flood(ip: str) -> None:
     """Lève 429 si ≥ 20 tentatives depuis cette IP dans la dernière heure."""
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT COUNT(*) FROM auth_attempt
-            WHERE ip_address = %s
-              AND created_at > now() - INTERVAL '1 hour'
-            """,
-            (ip,),
-        )
-        count = cur.fetchone()[0]
-    if count >= 20:
+    count = attempt_tracker.ip_attempts(ip)
+    if count >= IP_MAX_ATTEMPTS:
         logger.warning("Flood IP détecté : %s (%d tentatives)", ip, count)
         raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                             detail=_MSG_BLOCKED)
 
 
-def record_attempt(email: str | None, ip: str, success: bool, conn) -> None:
-    """Enregistre une tentative de connexion."""
-    with conn.cursor() as cur:
-        cur.execute(
-            "INSERT INTO auth_attempt (email, ip_address, success) VALUES (%s, %s, %s)",
-            (email, ip, success),
-        )
+def record_attempt(email: str | None, ip: str, success: bool) -> None:
+    """Enregistre une tentative de connexion (écrite en base par lot, en différé)."""
+    attempt_tracker.record(email, ip, success)
@@ -1,17 +1,26 @@
+import json
 import logging
-from typing import Dict, Set
+from typing import Any, Dict, Iterable, List, Set, Tuple
 from fastapi import Depends, Request
 
 from api.db import get_connection, release_connection
 from api.errors.exceptions import UnauthorizedError, ForbiddenError
+from api.events.listener import CHANNEL
 
 logger = logging.getLogger(__name__)
 
+# Entité des notifications de permissions sur le flux de changements
+PERMISSION_ENTITY = "tunnel_permission"
+# Cellules par NOTIFY : la charge utile reste sous la limite de 8000 octets
+_NOTIFY_BATCH = 50
+
 
 class PermissionCache:
     """
     Cache mémoire de la matrice role_code → {endpoint_code}.
     Chargé depuis tunnel_permission au démarrage, invalidable explicitement.
+    Les autres workers reçoivent les modifications par le flux de changements
+    (publish_permission_changes → on_change).
     """
 
     def __init__(self):
@@ -48,6 +57,32 @@ class PermissionCache:
         self._loaded = False
         self.load()
 
+    def apply(self, changes: Iterable[Tuple[str, str, bool]]) -> None:
+        """
+        Met à jour les seules entrées (role_code, endpoint_code, allowed) modifiées,
+        sans recharger la matrice. Cache non chargé : rien à faire (chargé au besoin).
+        """
+        if not self._loaded:
+            return
+        for role_code, endpoint_code, allowed in changes:
+            if allowed:
+                self._cache.setdefault(role_code, set()).add(endpoint_code)
+            else:
+                self._cache.get(role_code, set()).discard(endpoint_code)
+
+    def on_change(self, event: Dict[str, Any]) -> None:
+        """
+        Callback change_feed : applique les cellules publiées par un worker ;
+        sans cellules (reconnexion du flux, notifications peut-être perdues),
+        recharge toute la matrice.
+        """
+        changes = event.get("changes")
+        if changes is None:
+            self.reload()
+            return
+        self.apply((role_code, endpoint_code, bool(allowed))
+                   for role_code, endpoint_code, allowed in changes)
+
     def check(self, role_code: str, endpoint_code: str) -> bool:
         if not self._loaded:
             self.load()
@@ -62,6 +97,24 @@ class PermissionCache:
 permission_cache = PermissionCache()
 
 
+def publish_permission_changes(cur, changes: Iterable[Tuple[str, str, bool]]) -> None:
+    """
+    Publie les cellules (role_code, endpoint_code, allowed) modifiées sur le
+    flux de changements. À appeler dans la transaction de la modification :
+    NOTIFY n'est délivré qu'au commit, à tous les workers (y compris l'émetteur).
+    """
+    cells: List[Tuple[str, str, bool]] = list(changes)
+    for start in range(0, len(cells), _NOTIFY_BATCH):
+        cur.execute(
+            "SELECT pg_notify(%s, %s)",
+            (CHANNEL, json.dumps({
+                "entity": PERMISSION_ENTITY,
+                "op": "update",
+                "changes": cells[start:start + _NOTIFY_BATCH],
+            })),
+        )
+
+
 # --- Dépendances FastAPI ---
 
 def _is_authenticated(request: Request) -> bool:
@@ -82,11 +82,12 @@ async def login(request: Request, payload: LoginPayload):
 
     conn = None
     try:
-        conn = get_connection()
+        # Contrôles antiflood servis depuis la mémoire : aucun accès base
+        check_ip_blocklist(ip)
+        check_email_flood(payload.email)
+        check_ip_flood(ip)
 
-        check_ip_blocklist(ip, conn)
-        check_email_flood(payload.email, conn)
-        check_ip_flood(ip, conn)
+        conn = get_connection()
 
         # Vérification whitelist domaine email (si des règles existent)
         with conn.cursor() as cur:
@@ -101,7 +102,7 @@ async def login(request: Request, payload: LoginPayload):
                 )
                 row = cur.fetchone()
             if row is None or not row[0]:
-                record_attempt(payload.email, ip, False, conn)
+                record_attempt(payload.email, ip, False)
                 conn.commit()
                 # Même message que les autres erreurs
                 raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
@@ -146,7 +147,7 @@ async def login(request: Request, payload: LoginPayload):
                 password_ok = False
 
         if not user or not password_ok or not user[2]:
-            record_attempt(payload.email, ip, False, conn)
+            record_attempt(payload.email, ip, False)
             _log_security_event(conn, "LOGIN_FAIL", None, ip,
                                  {"email": payload.email, "reason": "invalid_credentials"})
             conn.commit()
@@ -180,7 +181,7 @@ async def login(request: Request, payload: LoginPayload):
                 (user_id, token_hash, expires_at, ip),
             )
 
-        record_attempt(payload.email, ip, True, conn)
+        record_attempt(payload.email, ip, True)
         _log_security_event(conn, "LOGIN_SUCCESS", user_id, ip, {"email": email})
         conn.commit()
 
@@ -1,14 +1,43 @@
 """Repository pour les données de dashboard/menu."""
-from typing import Dict, Any
-from api.db import get_connection, release_connection
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
+from api.db import get_read_connection, release_connection
 from api.errors.exceptions import raise_db_error
 
 
+# Durée de vie du résumé partagé entre tous les utilisateurs (secondes)
+SUMMARY_TTL_SECONDS = 5.0
+
+_summary_lock = threading.Lock()
+_summary_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+
+
+def get_cached_summary() -> Dict[str, Any]:
+    """Résumé dashboard mis en cache process-wide pendant SUMMARY_TTL_SECONDS.
+
+    Single-flight : un seul thread recalcule à expiration, les requêtes
+    concurrentes attendent le verrou puis réutilisent son résultat.
+    """
+    global _summary_cache
+    cached = _summary_cache
+    if cached and time.monotonic() - cached[0] < SUMMARY_TTL_SECONDS:
+        return cached[1]
+    with _summary_lock:
+        cached = _summary_cache
+        if cached and time.monotonic() - cached[0] < SUMMARY_TTL_SECONDS:
+            return cached[1]
+        summary = DashboardRepository().get_summary()
+        _summary_cache = (time.monotonic(), summary)
+        return summary
+
+
 class DashboardRepository:
     """Requêtes pour agrégations de dashboard (compteurs pour badges menu)"""
 
     def _get_connection(self):
-        return get_connection()
+        # Lectures seules : réplica si disponible et à jour
+        return get_read_connection()
 
     def get_summary(self) -> Dict[str, Any]:
         """Retourne un résumé des comptages pour les badges du menu.
@@ -20,51 +49,46 @@ class DashboardRepository:
         try:
             cur = conn.cursor()
 
-            # Interventions ouvertes
-            cur.execute(
-                """SELECT COUNT(*) FROM intervention 
-                   WHERE status_actual = (SELECT id FROM intervention_status_ref WHERE code = 'ouvert' LIMIT 1)"""
-            )
-            interventions_open = cur.fetchone()[0] or 0
-
-            # Tâches non terminées
-            cur.execute(
-                """SELECT COUNT(*) FROM intervention_task 
-                   WHERE status IN ('todo', 'in_progress')"""
-            )
-            tasks_pending = cur.fetchone()[0] or 0
-
-            # Équipements (total)
-            cur.execute("SELECT COUNT(*) FROM machine")
-            equipements_total = cur.fetchone()[0] or 0
-
-            # Plans préventifs actifs
-            cur.execute(
-                """SELECT COUNT(*) FROM preventive_plan WHERE active = TRUE"""
-            )
-            preventive_plans_active = cur.fetchone()[0] or 0
-
-            # Stock items (total)
-            cur.execute("SELECT COUNT(*) FROM stock_item")
-            stock_items_total = cur.fetchone()[0] or 0
-
-            # Demandes d'achat ouvertes
-            cur.execute(
-                """SELECT COUNT(*) FROM intervention_request 
-                   WHERE statut IN ('nouvelle', 'en_attente', 'acceptee')"""
-            )
-            purchase_requests_open = cur.fetchone()[0] or 0
-
-            # Fournisseurs
-            cur.execute("SELECT COUNT(*) FROM supplier")
-            suppliers_total = cur.fetchone()[0] or 0
-
-            # Occurrence préventives en attente (générées mais pas acceptées)
+            # Un seul aller-retour : un agrégat (avec FILTER) par table
             cur.execute(
-                """SELECT COUNT(*) FROM preventive_occurrence 
-                   WHERE status = 'pending' AND di_id IS NOT NULL"""
+                """
+                SELECT
+                    i.open,
+                    t.pending,
+                    (SELECT COUNT(*) FROM machine)    AS equipements_total,
+                    pp.active,
+                    (SELECT COUNT(*) FROM stock_item) AS stock_items_total,
+                    ir.open,
+                    (SELECT COUNT(*) FROM supplier)   AS suppliers_total,
+                    po.pending
+                FROM
+                    (SELECT COUNT(*) FILTER (
+                         WHERE status_actual = (SELECT id FROM intervention_status_ref
+                                                WHERE code = 'ouvert' LIMIT 1)
+                     ) AS open
+                     FROM intervention) i,
+                    (SELECT COUNT(*) FILTER (WHERE status IN ('todo', 'in_progress')) AS pending
+                     FROM intervention_task) t,
+                    (SELECT COUNT(*) FILTER (WHERE active = TRUE) AS active
+                     FROM preventive_plan) pp,
+                    (SELECT COUNT(*) FILTER (
+                         WHERE statut IN ('nouvelle', 'en_attente', 'acceptee')
+                     ) AS open
+                     FROM intervention_request) ir,
+                    (SELECT COUNT(*) FILTER (WHERE status = 'pending' AND di_id IS NOT NULL) AS pending
+                     FROM preventive_occurrence) po
+                """
             )
-            preventive_pending = cur.fetchone()[0] or 0
+            (
+                interventions_open,
+                tasks_pending,
+                equipements_total,
+                preventive_plans_active,
+                stock_items_total,
+                purchase_requests_open,
+                suppliers_total,
+                preventive_pending,
+            ) = (v or 0 for v in cur.fetchone())
 
             return {
                 "interventions": {
@@ -1,7 +1,10 @@
 """Endpoints pour le dashboard et les badges de menu."""
-from fastapi import APIRouter
+import asyncio
+import json
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
 from typing import Dict, Any
-from api.dashboard.repo import DashboardRepository
+from api.dashboard.repo import SUMMARY_TTL_SECONDS, get_cached_summary
 
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
@@ -15,7 +18,37 @@ def get_dashboard_summary():
     pour afficher des badges dans les sections du menu (Interventions,
     Tâches, Équipements, Stock, etc.).
 
+    Résumé calculé en une requête et partagé entre utilisateurs pendant
+    quelques secondes (SUMMARY_TTL_SECONDS).
+
     Aucune authentification requise (endpoint instrumental).
     """
-    repo = DashboardRepository()
-    return repo.get_summary()
+    return get_cached_summary()
+
+
+@router.get("/summary/stream")
+async def stream_dashboard_summary(request: Request):
+    """Flux SSE du résumé : un événement `summary` à la connexion puis à chaque changement.
+
+    Remplace le polling de GET /dashboard/summary : tous les clients
+    connectés lisent le même résumé en cache, un seul calcul par TTL.
+    """
+    async def event_stream():
+        loop = asyncio.get_event_loop()
+        last_payload = None
+        while not await request.is_disconnected():
+            summary = await loop.run_in_executor(None, get_cached_summary)
+            payload = json.dumps(summary, ensure_ascii=False)
+            if payload != last_payload:
+                last_payload = payload
+                yield f"event: summary\ndata: {payload}\n\n"
+            else:
+                # Commentaire SSE : maintient la connexion ouverte (proxies)
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(SUMMARY_TTL_SECONDS)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
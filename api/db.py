@@ -10,10 +10,16 @@ Usage dans les repos :
         cur.execute(...)
     finally:
         release_connection(conn)
+
+Lectures lourdes (stats, dashboard, audit, exports) : `get_read_connection()`
+emprunte au pool du réplica en lecture seule (DATABASE_REPLICA_URL) tant que
+son retard de réplication reste sous DB_REPLICA_MAX_LAG_SECONDS, sinon au
+pool principal. `release_connection` restitue au bon pool dans les deux cas.
 """
 
 from api.errors.exceptions import DatabaseError
 import logging
+import threading
 import time
 from contextlib import contextmanager
 from urllib.parse import urlparse
@@ -22,6 +28,9 @@ import psycopg2
 from psycopg2 import pool
 from psycopg2.extras import RealDictCursor, register_uuid
 
+from api.metrics import InstrumentedConnection, record_pool_wait
+from api.settings import settings
+
 # Enable native UUID adaptation for all connections
 register_uuid()
 
@@ -29,6 +38,36 @@ register_uuid()
 logger = logging.getLogger(__name__)
 
 _pool: pool.ThreadedConnectionPool | None = None
+_conn_params: dict | None = None
+
+# Réplica en lecture seule (optionnel)
+_replica_pool: pool.ThreadedConnectionPool | None = None
+_replica_conn_ids: set[int] = set()
+_replica_lock = threading.Lock()
+_replica_check_lock = threading.Lock()
+_replica_state = {"lag": None, "checked_at": 0.0, "usable": False, "error": None}
+
+_REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def _connection_params(database_url: str) -> dict:
+    """Paramètres psycopg2 communs à toutes les connexions depuis DATABASE_URL."""
+    parsed = urlparse(database_url)
+    return dict(
+        host=parsed.hostname,
+        port=parsed.port or 5432,
+        user=parsed.username,
+        password=parsed.password,
+        dbname=parsed.path.lstrip("/"),
+        connect_timeout=5,
+        options="-c statement_timeout=30000",  # 30s max par requête
+    )
 
 
 def init_pool(
@@ -37,24 +76,21 @@ def init_pool(
     maxconn: int = 10,
     retries: int = 10,
     retry_delay: float = 3.0,
+    connection_factory: type | None = None,
 ) -> None:
     """Initialise le pool au démarrage de l'application.
 
     Réessaie jusqu'à `retries` fois avec un délai de `retry_delay` secondes
     entre chaque tentative, afin de tolérer un démarrage tardif de PostgreSQL.
+    `connection_factory` : sous-classe de psycopg2 connection, par défaut
+    InstrumentedConnection (requêtes imputées à la requête HTTP, voir api/metrics.py).
     """
-    global _pool
-    parsed = urlparse(database_url)
+    global _pool, _conn_params
+    _conn_params = _connection_params(database_url)
     conn_kwargs = dict(
-        minconn=minconn,
-        maxconn=maxconn,
-        host=parsed.hostname,
-        port=parsed.port or 5432,
-        user=parsed.username,
-        password=parsed.password,
-        dbname=parsed.path.lstrip("/"),
-        connect_timeout=5,
-        options="-c statement_timeout=30000",  # 30s max par requête
+        minconn=minconn, maxconn=maxconn,
+        connection_factory=connection_factory or InstrumentedConnection,
+        **_conn_params,
     )
     last_error: Exception | None = None
     for attempt in range(1, retries + 1):
@@ -74,26 +110,156 @@ def init_pool(
     raise DatabaseError(f"Connexion PostgreSQL impossible : {last_error}") from last_error
 
 
+def worker_pool_bounds(
+    budget: int,
+    workers: int,
+    dedicated_per_worker: int,
+    minconn: int,
+) -> tuple[int, int]:
+    """Taille (min, max) du pool d'un worker pour tenir dans un budget global.
+
+    Chaque worker reçoit budget // workers connexions, moins ses connexions
+    dédiées hors pool (flux de changements, antiflood, limiteur…). Lève
+    DatabaseError si la part restante est nulle : mieux vaut refuser de
+    démarrer que saturer max_connections en production.
+    """
+    share = budget // max(workers, 1) - dedicated_per_worker
+    if share < 1:
+        raise DatabaseError(
+            f"Budget de {budget} connexions insuffisant pour {workers} workers "
+            f"({dedicated_per_worker} connexions dédiées chacun)")
+    return min(minconn, share), share
+
+
 def get_connection() -> psycopg2.extensions.connection:
     """Emprunte une connexion du pool."""
     if _pool is None:
         raise DatabaseError("Pool DB non initialisé")
+    started = time.perf_counter()
     try:
         conn = _pool.getconn()
         conn.autocommit = False
         return conn
     except pool.PoolError as e:
         raise DatabaseError(f"Pool saturé ou indisponible : {e}") from e
+    finally:
+        record_pool_wait(time.perf_counter() - started)
+
+
+def init_replica_pool(database_url: str, minconn: int = 1, maxconn: int = 5) -> None:
+    """Initialise le pool du réplica. Une seule tentative : en cas d'échec,
+    les lectures restent sur le pool principal (jamais bloquant au démarrage).
+    """
+    global _replica_pool
+    try:
+        _replica_pool = pool.ThreadedConnectionPool(
+            minconn=minconn, maxconn=maxconn,
+            connection_factory=InstrumentedConnection,
+            **_connection_params(database_url),
+        )
+        logger.info("Pool réplica initialisé (%d-%d connexions)", minconn, maxconn)
+    except psycopg2.OperationalError as e:
+        _replica_pool = None
+        _replica_state["error"] = type(e).__name__
+        logger.warning("Réplica indisponible, lectures sur le primaire — %s", e)
+
+
+def _measure_replica_lag() -> None:
+    """Mesure le retard du réplica ; appelé par un seul thread à la fois."""
+    conn = None
+    try:
+        conn = _replica_pool.getconn()
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(_REPLICA_LAG_SQL)
+            lag = float(cur.fetchone()[0])
+        _replica_state.update(lag=lag, usable=lag <= settings.DB_REPLICA_MAX_LAG_SECONDS, error=None)
+        if lag > settings.DB_REPLICA_MAX_LAG_SECONDS:
+            logger.warning("Réplica en retard de %.1fs : lectures basculées sur le primaire", lag)
+    except (psycopg2.Error, pool.PoolError) as e:
+        _replica_state.update(lag=None, usable=False, error=type(e).__name__)
+        logger.warning("Réplica injoignable, lectures sur le primaire — %s", e)
+    finally:
+        if conn is not None:
+            try:
+                _replica_pool.putconn(conn, close=conn.closed != 0)
+            except Exception:
+                pass
+
+
+def _replica_usable() -> bool:
+    """Retard connu et acceptable ; revérifié au plus toutes les DB_REPLICA_LAG_CHECK_INTERVAL s."""
+    if _replica_pool is None:
+        return False
+    now = time.monotonic()
+    if now - _replica_state["checked_at"] >= settings.DB_REPLICA_LAG_CHECK_INTERVAL:
+        # Un seul thread mesure, les autres gardent l'état précédent
+        if _replica_check_lock.acquire(blocking=False):
+            try:
+                _replica_state["checked_at"] = now
+                _measure_replica_lag()
+            finally:
+                _replica_check_lock.release()
+    return _replica_state["usable"]
+
+
+def get_read_connection() -> psycopg2.extensions.connection:
+    """Emprunte une connexion pour une lecture seule : réplica si à jour, sinon primaire."""
+    if _replica_usable():
+        started = time.perf_counter()
+        try:
+            conn = _replica_pool.getconn()
+            conn.autocommit = False
+            conn.readonly = True
+            with _replica_lock:
+                _replica_conn_ids.add(id(conn))
+            return conn
+        except (psycopg2.Error, pool.PoolError) as e:
+            logger.warning("Réplica saturé ou indisponible, lecture sur le primaire — %s", e)
+        finally:
+            record_pool_wait(time.perf_counter() - started)
+    return get_connection()
+
+
+def get_replica_status() -> str:
+    """État du réplica pour /health : disabled, connected (lag Xs), lagging, error."""
+    if _replica_pool is None:
+        return f"error: {_replica_state['error']}" if _replica_state["error"] else "disabled"
+    lag = _replica_state["lag"]
+    if _replica_state["error"]:
+        return f"error: {_replica_state['error']}"
+    if lag is None:
+        return "connected"
+    status = "connected" if _replica_state["usable"] else "lagging"
+    return f"{status} (lag {lag:.1f}s)"
+
+
+def open_dedicated_connection() -> psycopg2.extensions.connection:
+    """Ouvre une connexion hors pool (autocommit), pour les usages longue durée (LISTEN).
+
+    L'appelant est responsable de sa fermeture.
+    """
+    if _conn_params is None:
+        raise DatabaseError("Pool DB non initialisé")
+    conn = psycopg2.connect(**_conn_params)
+    conn.autocommit = True
+    return conn
 
 
 def release_connection(conn: psycopg2.extensions.connection) -> None:
-    """Restitue la connexion au pool (même en cas d'erreur)."""
-    if _pool is None or conn is None:
+    """Restitue la connexion à son pool, principal ou réplica (même en cas d'erreur)."""
+    if conn is None:
+        return
+    with _replica_lock:
+        from_replica = id(conn) in _replica_conn_ids
+        _replica_conn_ids.discard(id(conn))
+    target = _replica_pool if from_replica else _pool
+    if target is None:
         return
     try:
         if conn.status == psycopg2.extensions.STATUS_IN_TRANSACTION:
             conn.rollback()
-        _pool.putconn(conn)
+        target.putconn(conn)
     except Exception:
         # En dernier recours, ferme la connexion
         try:
@@ -123,12 +289,16 @@ def db_connection():
 
 
 def close_pool() -> None:
-    """Ferme toutes les connexions du pool (arrêt de l'application)."""
-    global _pool
+    """Ferme toutes les connexions des pools (arrêt de l'application)."""
+    global _pool, _replica_pool
     if _pool:
         _pool.closeall()
         _pool = None
         logger.info("Pool DB fermé")
+    if _replica_pool:
+        _replica_pool.closeall()
+        _replica_pool = None
+        logger.info("Pool réplica fermé")
 
 
 def check_connection() -> str:
@@ -10,6 +10,151 @@ from api.constants import PRIORITY_TYPES, CLOSED_STATUS_CODE, INTERVENTION_TYPES
 
 logger = logging.getLogger(__name__)
 
+# Métriques de santé pour un ensemble d'équipements `target(machine_id)` :
+# `{target}` est une liste d'ids (unnest) ou un sous-arbre lu dans machine_closure.
+# Paramètres : ceux de `{target}`, puis CLOSED_STATUS_CODE deux fois.
+_HEALTH_INPUTS_SQL = """
+    WITH target AS (
+        {target}
+    ),
+    interventions_agg AS (
+        SELECT
+            i.machine_id,
+            COUNT(*) FILTER (WHERE i.status_actual != %s) AS open_interventions_count,
+            COUNT(*) FILTER (WHERE i.status_actual != %s AND i.priority = 'urgent') AS urgent_count
+        FROM intervention i
+        JOIN target t ON t.machine_id = i.machine_id
+        GROUP BY i.machine_id
+    ),
+    requests_agg AS (
+        SELECT
+            ir.machine_id,
+            COUNT(*) FILTER (WHERE ir.statut NOT IN ('rejetee', 'cloturee')) AS open_requests_count,
+            COUNT(*) FILTER (WHERE ir.statut = 'nouvelle') AS new_requests_count
+        FROM intervention_request ir
+        JOIN target t ON t.machine_id = ir.machine_id
+        GROUP BY ir.machine_id
+    ),
+    request_status_agg AS (
+        SELECT
+            x.machine_id,
+            COALESCE(jsonb_object_agg(x.statut, x.cnt), '{}'::jsonb) AS request_status_counts
+        FROM (
+            SELECT
+                ir.machine_id,
+                ir.statut,
+                COUNT(*)::int AS cnt
+            FROM intervention_request ir
+            JOIN target t ON t.machine_id = ir.machine_id
+            WHERE ir.statut NOT IN ('rejetee', 'cloturee')
+            GROUP BY ir.machine_id, ir.statut
+        ) x
+        GROUP BY x.machine_id
+    ),
+    tasks_agg AS (
+        SELECT
+            i.machine_id,
+            COUNT(*) FILTER (WHERE it.status NOT IN ('done', 'skipped')) AS open_tasks_count,
+            COUNT(*) FILTER (
+                WHERE it.status NOT IN ('done', 'skipped')
+                  AND it.due_date IS NOT NULL
+                  AND it.due_date < CURRENT_DATE
+            ) AS overdue_tasks_count,
+            COUNT(*) FILTER (
+                WHERE it.status NOT IN ('done', 'skipped')
+                  AND it.assigned_to IS NULL
+            ) AS unassigned_tasks_count
+        FROM intervention_task it
+        JOIN intervention i ON i.id = it.intervention_id
+        JOIN target t ON t.machine_id = i.machine_id
+        GROUP BY i.machine_id
+    ),
+    purchase_request_machine AS (
+        SELECT DISTINCT
+            pr.id AS purchase_request_id,
+            i.machine_id,
+            pr.status
+        FROM purchase_request pr
+        JOIN intervention_action_purchase_request iapr ON iapr.purchase_request_id = pr.id
+        JOIN intervention_action ia ON ia.id = iapr.intervention_action_id
+        JOIN intervention i ON i.id = ia.intervention_id
+        JOIN target t ON t.machine_id = i.machine_id
+    ),
+    purchase_agg AS (
+        SELECT
+            prm.machine_id,
+            COUNT(*) FILTER (
+                WHERE LOWER(COALESCE(prm.status, '')) NOT IN ('closed', 'cloturee', 'cancelled', 'annulee')
+            ) AS open_purchase_requests_count
+        FROM purchase_request_machine prm
+        GROUP BY prm.machine_id
+    ),
+    purchase_status_agg AS (
+        SELECT
+            y.machine_id,
+            COALESCE(jsonb_object_agg(y.status, y.cnt), '{}'::jsonb) AS purchase_request_status_counts
+        FROM (
+            SELECT
+                prm.machine_id,
+                UPPER(COALESCE(prm.status, 'UNKNOWN')) AS status,
+                COUNT(*)::int AS cnt
+            FROM purchase_request_machine prm
+            WHERE LOWER(COALESCE(prm.status, '')) NOT IN ('closed', 'cloturee', 'cancelled', 'annulee')
+            GROUP BY prm.machine_id, UPPER(COALESCE(prm.status, 'UNKNOWN'))
+        ) y
+        GROUP BY y.machine_id
+    )
+    SELECT
+        t.machine_id,
+        COALESCE(i.open_interventions_count, 0) AS open_interventions_count,
+        COALESCE(i.urgent_count, 0) AS urgent_count,
+        COALESCE(r.open_requests_count, 0) AS open_requests_count,
+        COALESCE(r.new_requests_count, 0) AS new_requests_count,
+        COALESCE(rs.request_status_counts, '{}'::jsonb) AS request_status_counts,
+        COALESCE(ts.open_tasks_count, 0) AS open_tasks_count,
+        COALESCE(ts.overdue_tasks_count, 0) AS overdue_tasks_count,
+        COALESCE(ts.unassigned_tasks_count, 0) AS unassigned_tasks_count,
+        COALESCE(p.open_purchase_requests_count, 0) AS open_purchase_requests_count,
+        COALESCE(ps.purchase_request_status_counts, '{}'::jsonb) AS purchase_request_status_counts,
+        CASE
+            WHEN NULLIF(BTRIM(COALESCE(m.affectation::text, '')), '') IS NULL THEN FALSE
+            ELSE TRUE
+        END AS has_affectation
+    FROM target t
+    JOIN machine m ON m.id = t.machine_id
+    LEFT JOIN interventions_agg i ON i.machine_id = t.machine_id
+    LEFT JOIN requests_agg r ON r.machine_id = t.machine_id
+    LEFT JOIN request_status_agg rs ON rs.machine_id = t.machine_id
+    LEFT JOIN tasks_agg ts ON ts.machine_id = t.machine_id
+    LEFT JOIN purchase_agg p ON p.machine_id = t.machine_id
+    LEFT JOIN purchase_status_agg ps ON ps.machine_id = t.machine_id
+"""
+
+# Sous-arbre d'un équipement avec les métriques de santé de chaque nœud.
+# Paramètres : ceux de `{health}` (racine, profondeurs, statut fermé ×2), puis racine et profondeurs.
+_SUBTREE_SQL = """
+    SELECT
+        c.depth,
+        m.id,
+        m.code,
+        m.name,
+        m.equipement_mere AS parent_id,
+        ec.id AS equipement_class_id,
+        ec.code AS equipement_class_code,
+        ec.label AS equipement_class_label,
+        h.*
+    FROM machine_closure c
+    JOIN machine m ON m.id = c.descendant_id
+    LEFT JOIN equipement_class ec ON ec.id = m.equipement_class_id
+    JOIN ({health}) h ON h.machine_id = c.descendant_id
+    WHERE c.ancestor_id = %s AND c.depth BETWEEN %s AND %s
+    ORDER BY c.depth, h.urgent_count DESC, h.open_interventions_count DESC, m.name ASC
+"""
+
+# Niveaux de health, du moins au plus grave
+_HEALTH_LEVELS = ('ok', 'maintenance', 'warning', 'critical')
+_MAX_TREE_DEPTH = 32767
+
 
 class EquipementRepository:
     """Requêtes pour le domaine equipement avec statistiques interventions"""
@@ -451,6 +596,9 @@ class EquipementRepository:
             conn.commit()
         except Exception as e:
             conn.rollback()
+            if getattr(e, "pgcode", None) == "P0001":
+                # Rattachement refusé par trg_machine_closure (cycle) → 400
+                raise_db_error(e, "hiérarchie équipement")
             raise DatabaseError(
                 f"Erreur lors de la creation de l'equipement: {str(e)}") from e
         finally:
@@ -502,6 +650,9 @@ class EquipementRepository:
             conn.commit()
         except Exception as e:
             conn.rollback()
+            if getattr(e, "pgcode", None) == "P0001":
+                # Rattachement refusé par trg_machine_closure (cycle) → 400
+                raise_db_error(e, "hiérarchie équipement")
             raise DatabaseError(
                 f"Erreur lors de la mise a jour de l'equipement: {str(e)}") from e
         finally:
@@ -526,78 +677,93 @@ class EquipementRepository:
         finally:
             release_connection(conn)
 
+    def _fetch_subtree(self, cur, root_id: str, min_depth: int, max_depth: int) -> List[Dict[str, Any]]:
+        """
+        Nœuds du sous-arbre de root_id entre deux profondeurs, avec health,
+        en une requête (machine_closure : un parcours d'index, quelle que soit
+        la profondeur). Tri : profondeur, urgences, interventions ouvertes, nom.
+        """
+        health_sql = _HEALTH_INPUTS_SQL.replace(
+            "{target}",
+            """SELECT descendant_id AS machine_id
+               FROM machine_closure
+               WHERE ancestor_id = %s AND depth BETWEEN %s AND %s""",
+        )
+        cur.execute(
+            _SUBTREE_SQL.replace("{health}", health_sql),
+            (root_id, min_depth, max_depth, CLOSED_STATUS_CODE, CLOSED_STATUS_CODE,
+             root_id, min_depth, max_depth),
+        )
+        nodes = []
+        for row in cur.fetchall():
+            depth, machine_id, code, name, parent_id, ec_id, ec_code, ec_label = row[:8]
+            nodes.append({
+                'id': machine_id,
+                'code': code,
+                'name': name,
+                'parent_id': parent_id,
+                'depth': depth,
+                'equipement_class': (
+                    {'id': ec_id, 'code': ec_code, 'label': ec_label} if ec_id else None
+                ),
+                'health': self._calculate_health(self._health_inputs_from_row(row[8:])),
+            })
+        return nodes
+
     def get_by_equipement_mere(self, equipement_mere_id: str) -> List[Dict[str, Any]]:
-        """Récupère les sous-équipements d'un équipement parent avec health"""
+        """Récupère les sous-équipements directs d'un équipement parent avec health"""
         conn = self._get_connection()
         try:
             cur = conn.cursor()
-            csq = self._closed_status_subquery()
-
-            query = f"""
-                SELECT
-                    m.id,
-                    m.code,
-                    m.name,
-                    m.equipement_mere,
-                    ec.id as equipement_class_id,
-                    ec.code as equipement_class_code,
-                    ec.label as equipement_class_label,
-                    COUNT(CASE WHEN i.status_actual != {csq} THEN i.id END) as open_interventions_count,
-                    COUNT(CASE WHEN i.status_actual != {csq} AND i.priority = 'urgent' THEN i.id END) as urgent_count,
-                    (SELECT COUNT(*) FROM intervention_request WHERE machine_id = m.id AND statut = 'nouvelle') as new_requests_count
-                FROM machine m
-                LEFT JOIN intervention i ON i.machine_id = m.id
-                LEFT JOIN equipement_class ec ON ec.id = m.equipement_class_id
-                WHERE m.equipement_mere = %s
-                GROUP BY m.id, ec.id, ec.code, ec.label
-                ORDER BY urgent_count DESC, open_interventions_count DESC, m.name ASC
-            """
-
-            cur.execute(query, (CLOSED_STATUS_CODE,
-                        CLOSED_STATUS_CODE, equipement_mere_id))
-            rows = cur.fetchall()
-            cols = [desc[0] for desc in cur.description]
-            equipements = [dict(zip(cols, row)) for row in rows]
-
-            equipement_ids = [str(e.get('id'))
-                              for e in equipements if e.get('id')]
-            health_inputs_map = self._fetch_health_inputs(cur, equipement_ids)
-
-            # Enrichir avec health et restructurer equipement_class
-            for equipement in equipements:
-                open_count = equipement.pop('open_interventions_count', 0) or 0
-                urgent_count = equipement.pop('urgent_count', 0) or 0
-                new_requests_count = equipement.pop(
-                    'new_requests_count', 0) or 0
-                metrics = health_inputs_map.get(str(equipement.get('id')), {})
-                metrics.setdefault('open_interventions_count', int(open_count))
-                metrics.setdefault('urgent_count', int(urgent_count))
-                metrics.setdefault('new_requests_count',
-                                   int(new_requests_count))
-
-                equipement['health'] = self._calculate_health(metrics)
-                equipement['parent_id'] = equipement.pop(
-                    'equipement_mere', None)
-
-                # Restructurer equipement_class
-                ec_id = equipement.pop('equipement_class_id', None)
-                ec_code = equipement.pop('equipement_class_code', None)
-                ec_label = equipement.pop('equipement_class_label', None)
+            return self._fetch_subtree(cur, equipement_mere_id, 1, 1)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise_db_error(e, "opération")
+        finally:
+            release_connection(conn)
 
-                if ec_id:
-                    equipement['equipement_class'] = {
-                        'id': ec_id,
-                        'code': ec_code,
-                        'label': ec_label
-                    }
-                else:
-                    equipement['equipement_class'] = None
+    def get_subtree(self, equipement_id: str, max_depth: int | None = None) -> Dict[str, Any]:
+        """
+        Récupère tout le sous-arbre d'un équipement (descendants à toute
+        profondeur, ou jusqu'à max_depth) avec le health de chaque nœud et
+        une synthèse de l'ensemble : une requête, quel que soit le nombre de niveaux.
+        """
+        conn = self._get_connection()
+        try:
+            cur = conn.cursor()
+            nodes = self._fetch_subtree(
+                cur, equipement_id, 0, max_depth if max_depth is not None else _MAX_TREE_DEPTH)
+            if not nodes:
+                raise NotFoundError(f"Équipement {equipement_id} non trouvé")
 
-            return equipements
+            root, descendants = nodes[0], nodes[1:]
+            levels = {level: 0 for level in _HEALTH_LEVELS}
+            totals = dict.fromkeys(
+                ('open_interventions_count', 'urgent_count', 'open_requests_count',
+                 'new_requests_count', 'overdue_tasks_count'), 0)
+            for node in nodes:
+                health = node['health']
+                levels[health['level']] = levels.get(health['level'], 0) + 1
+                for key in totals:
+                    totals[key] += health[key]
+            worst = max((lvl for lvl, n in levels.items() if n),
+                        key=_HEALTH_LEVELS.index, default='ok')
+
+            root.pop('depth')
+            return {
+                'equipement': root,
+                'descendants_count': len(descendants),
+                'depth': max((n['depth'] for n in descendants), default=0),
+                'summary': {'level': worst, 'levels': levels, **totals},
+                'items': descendants,
+            }
+        except NotFoundError:
+            raise
         except HTTPException:
             raise
         except Exception as e:
-            raise_db_error(e, "opération")
+            raise_db_error(e, "sous-arbre équipement")
         finally:
             release_connection(conn)
 
@@ -832,145 +998,27 @@ class EquipementRepository:
         if not equipement_ids:
             return {}
 
-        query = """
-            WITH target AS (
-                SELECT UNNEST(%s::uuid[]) AS machine_id
-            ),
-            interventions_agg AS (
-                SELECT
-                    i.machine_id,
-                    COUNT(*) FILTER (WHERE i.status_actual != %s) AS open_interventions_count,
-                    COUNT(*) FILTER (WHERE i.status_actual != %s AND i.priority = 'urgent') AS urgent_count
-                FROM intervention i
-                JOIN target t ON t.machine_id = i.machine_id
-                GROUP BY i.machine_id
-            ),
-            requests_agg AS (
-                SELECT
-                    ir.machine_id,
-                    COUNT(*) FILTER (WHERE ir.statut NOT IN ('rejetee', 'cloturee')) AS open_requests_count,
-                    COUNT(*) FILTER (WHERE ir.statut = 'nouvelle') AS new_requests_count
-                FROM intervention_request ir
-                JOIN target t ON t.machine_id = ir.machine_id
-                GROUP BY ir.machine_id
-            ),
-            request_status_agg AS (
-                SELECT
-                    x.machine_id,
-                    COALESCE(jsonb_object_agg(x.statut, x.cnt), '{}'::jsonb) AS request_status_counts
-                FROM (
-                    SELECT
-                        ir.machine_id,
-                        ir.statut,
-                        COUNT(*)::int AS cnt
-                    FROM intervention_request ir
-                    JOIN target t ON t.machine_id = ir.machine_id
-                    WHERE ir.statut NOT IN ('rejetee', 'cloturee')
-                    GROUP BY ir.machine_id, ir.statut
-                ) x
-                GROUP BY x.machine_id
-            ),
-            tasks_agg AS (
-                SELECT
-                    i.machine_id,
-                    COUNT(*) FILTER (WHERE it.status NOT IN ('done', 'skipped')) AS open_tasks_count,
-                    COUNT(*) FILTER (
-                        WHERE it.status NOT IN ('done', 'skipped')
-                          AND it.due_date IS NOT NULL
-                          AND it.due_date < CURRENT_DATE
-                    ) AS overdue_tasks_count,
-                    COUNT(*) FILTER (
-                        WHERE it.status NOT IN ('done', 'skipped')
-                          AND it.assigned_to IS NULL
-                    ) AS unassigned_tasks_count
-                FROM intervention_task it
-                JOIN intervention i ON i.id = it.intervention_id
-                JOIN target t ON t.machine_id = i.machine_id
-                GROUP BY i.machine_id
-            ),
-            purchase_request_machine AS (
-                SELECT DISTINCT
-                    pr.id AS purchase_request_id,
-                    i.machine_id,
-                    pr.status
-                FROM purchase_request pr
-                JOIN intervention_action_purchase_request iapr ON iapr.purchase_request_id = pr.id
-                JOIN intervention_action ia ON ia.id = iapr.intervention_action_id
-                JOIN intervention i ON i.id = ia.intervention_id
-                JOIN target t ON t.machine_id = i.machine_id
-            ),
-            purchase_agg AS (
-                SELECT
-                    prm.machine_id,
-                    COUNT(*) FILTER (
-                        WHERE LOWER(COALESCE(prm.status, '')) NOT IN ('closed', 'cloturee', 'cancelled', 'annulee')
-                    ) AS open_purchase_requests_count
-                FROM purchase_request_machine prm
-                GROUP BY prm.machine_id
-            ),
-            purchase_status_agg AS (
-                SELECT
-                    y.machine_id,
-                    COALESCE(jsonb_object_agg(y.status, y.cnt), '{}'::jsonb) AS purchase_request_status_counts
-                FROM (
-                    SELECT
-                        prm.machine_id,
-                        UPPER(COALESCE(prm.status, 'UNKNOWN')) AS status,
-                        COUNT(*)::int AS cnt
-                    FROM purchase_request_machine prm
-                    WHERE LOWER(COALESCE(prm.status, '')) NOT IN ('closed', 'cloturee', 'cancelled', 'annulee')
-                    GROUP BY prm.machine_id, UPPER(COALESCE(prm.status, 'UNKNOWN'))
-                ) y
-                GROUP BY y.machine_id
-            )
-            SELECT
-                t.machine_id,
-                COALESCE(i.open_interventions_count, 0) AS open_interventions_count,
-                COALESCE(i.urgent_count, 0) AS urgent_count,
-                COALESCE(r.open_requests_count, 0) AS open_requests_count,
-                COALESCE(r.new_requests_count, 0) AS new_requests_count,
-                COALESCE(rs.request_status_counts, '{}'::jsonb) AS request_status_counts,
-                COALESCE(ts.open_tasks_count, 0) AS open_tasks_count,
-                COALESCE(ts.overdue_tasks_count, 0) AS overdue_tasks_count,
-                COALESCE(ts.unassigned_tasks_count, 0) AS unassigned_tasks_count,
-                COALESCE(p.open_purchase_requests_count, 0) AS open_purchase_requests_count,
-                COALESCE(ps.purchase_request_status_counts, '{}'::jsonb) AS purchase_request_status_counts,
-                CASE
-                    WHEN NULLIF(BTRIM(COALESCE(m.affectation::text, '')), '') IS NULL THEN FALSE
-                    ELSE TRUE
-                END AS has_affectation
-            FROM target t
-            JOIN machine m ON m.id = t.machine_id
-            LEFT JOIN interventions_agg i ON i.machine_id = t.machine_id
-            LEFT JOIN requests_agg r ON r.machine_id = t.machine_id
-            LEFT JOIN request_status_agg rs ON rs.machine_id = t.machine_id
-            LEFT JOIN tasks_agg ts ON ts.machine_id = t.machine_id
-            LEFT JOIN purchase_agg p ON p.machine_id = t.machine_id
-            LEFT JOIN purchase_status_agg ps ON ps.machine_id = t.machine_id
-        """
-
+        query = _HEALTH_INPUTS_SQL.replace(
+            "{target}", "SELECT UNNEST(%s::uuid[]) AS machine_id")
         cur.execute(
             query, (equipement_ids, CLOSED_STATUS_CODE, CLOSED_STATUS_CODE))
-        rows = cur.fetchall()
-
-        health_inputs: Dict[str, Dict[str, Any]] = {}
-        for row in rows:
-            machine_id = str(row[0])
-            health_inputs[machine_id] = {
-                'open_interventions_count': int(row[1] or 0),
-                'urgent_count': int(row[2] or 0),
-                'open_requests_count': int(row[3] or 0),
-                'new_requests_count': int(row[4] or 0),
-                'request_status_counts': self._normalize_status_counts(row[5]),
-                'open_tasks_count': int(row[6] or 0),
-                'overdue_tasks_count': int(row[7] or 0),
-                'unassigned_tasks_count': int(row[8] or 0),
-                'open_purchase_requests_count': int(row[9] or 0),
-                'purchase_request_status_counts': self._normalize_status_counts(row[10]),
-                'has_affectation': bool(row[11]),
-            }
+        return {str(row[0]): self._health_inputs_from_row(row) for row in cur.fetchall()}
 
-        return health_inputs
+    def _health_inputs_from_row(self, row) -> Dict[str, Any]:
+        """Convertit une ligne de _HEALTH_INPUTS_SQL (machine_id en tête) en métriques."""
+        return {
+            'open_interventions_count': int(row[1] or 0),
+            'urgent_count': int(row[2] or 0),
+            'open_requests_count': int(row[3] or 0),
+            'new_requests_count': int(row[4] or 0),
+            'request_status_counts': self._normalize_status_counts(row[5]),
+            'open_tasks_count': int(row[6] or 0),
+            'overdue_tasks_count': int(row[7] or 0),
+            'unassigned_tasks_count': int(row[8] or 0),
+            'open_purchase_requests_count': int(row[9] or 0),
+            'purchase_request_status_counts': self._normalize_status_counts(row[10]),
+            'has_affectation': bool(row[11]),
+        }
 
     def get_health_map(self, cur, equipement_ids: List[str]) -> Dict[str, Dict[str, Any]]:
         """Retourne le health calculé pour une liste d'équipements (clé = machine_id)."""
@@ -12,12 +12,13 @@ from api.equipements.schemas import (
 )
 from api.auth.permissions import require_authenticated
 from api.utils.response import paginated, single
+from api.utils.http_cache import http_cache
 
 router = APIRouter(prefix="/equipements",
                    tags=["equipements"], dependencies=[Depends(require_authenticated)])
 
 
-@router.get("", response_model=EquipementListPaginated)
+@router.get("", response_model=EquipementListPaginated, dependencies=[Depends(http_cache)])
 def list_equipements(
     search: str | None = Query(
         None, description="Recherche insensible à la casse sur code, nom ou affectation"),
@@ -103,6 +104,17 @@ def get_equipement_stats(
     return single(repo.get_stats_by_id(equipement_id, start_date=start_date, end_date=end_date))
 
 
+@router.get("/{equipement_id}/subtree")
+def get_equipement_subtree(
+    equipement_id: str,
+    max_depth: int | None = Query(
+        None, ge=1, le=50, description="Profondeur maximale (défaut : tout le sous-arbre)"),
+):
+    """Récupère tout le sous-arbre d'un équipement avec le health de chaque descendant"""
+    repo = EquipementRepository()
+    return single(repo.get_subtree(equipement_id, max_depth=max_depth))
+
+
 @router.get("/{equipement_id}/health")
 def get_equipement_health(equipement_id: str):
     """Récupère uniquement le health d'un équipement (ultra-léger)"""
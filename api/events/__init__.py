@@ -0,0 +1 @@
+"""Flux de changements temps réel (LISTEN/NOTIFY → SSE)"""
@@ -0,0 +1,184 @@
+"""
+Flux de changements temps réel (PostgreSQL LISTEN/NOTIFY → abonnés SSE).
+
+Une seule connexion LISTEN par process, tenue par un thread dédié, reçoit
+les notifications émises par fn_notify_change() (migration 014) et les
+distribue aux files asyncio des abonnés dont le filtre correspond.
+
+Usage :
+    from api.events.listener import change_feed
+
+    sub = change_feed.subscribe(entities={"intervention"}, machine_id=None)
+    try:
+        event = await sub.queue.get()
+    finally:
+        change_feed.unsubscribe(sub)
+
+Les caches internes s'abonnent par `change_feed.add_listener(entity, callback)` :
+le callback est appelé dans le thread d'écoute, y compris pour les entités
+internes (ex. `ip_blocklist`, `tunnel_permission`) jamais relayées aux clients
+SSE. Après une reconnexion, chaque callback reçoit `{"entity", "op": "resync"}` :
+les notifications émises pendant la coupure sont perdues, le cache se recharge.
+"""
+
+import asyncio
+import json
+import logging
+import select
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import psycopg2
+
+from api.db import open_dedicated_connection
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "tunnel_changes"
+ENTITIES = frozenset({"intervention", "intervention_task",
+                      "intervention_request", "purchase_request"})
+
+# Événements en attente par abonné avant de lui demander un rechargement complet
+_QUEUE_SIZE = 200
+_RECONNECT_DELAY = 5.0
+
+
+class Subscription:
+    """Abonné SSE : filtre + file d'événements propre à la connexion HTTP."""
+
+    def __init__(self, entities: Optional[Set[str]], machine_id: Optional[str]):
+        self.entities = entities
+        self.machine_id = machine_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=_QUEUE_SIZE)
+        # Passe à True si des événements ont été perdus (file pleine)
+        self.overflowed = False
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        if self.entities and event.get("entity") not in self.entities:
+            return False
+        if self.machine_id and event.get("machine_id") != self.machine_id:
+            return False
+        return True
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        """Appelé dans la boucle asyncio : dépose l'événement sans jamais bloquer."""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class ChangeFeed:
+    """Connexion LISTEN partagée et répartition des notifications aux abonnés."""
+
+    def __init__(self):
+        self._subscribers: Set[Subscription] = set()
+        self._listeners: Dict[str, List[Callable[[Dict[str, Any]], None]]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Démarre le thread d'écoute (appelé dans le lifespan de l'app)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._loop = loop
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="change-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=_RECONNECT_DELAY + 1)
+            self._thread = None
+
+    def subscribe(self, entities: Optional[Set[str]] = None,
+                  machine_id: Optional[str] = None) -> Subscription:
+        sub = Subscription(entities, machine_id)
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def add_listener(self, entity: str, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """Callback interne (thread d'écoute) pour chaque changement de `entity`."""
+        with self._lock:
+            self._listeners.setdefault(entity, []).append(callback)
+
+    def _resync(self) -> None:
+        """Reconnexion : les écouteurs internes rechargent ce qu'ils ont pu manquer."""
+        with self._lock:
+            listeners = [(entity, list(callbacks)) for entity, callbacks in self._listeners.items()]
+        for entity, callbacks in listeners:
+            for callback in callbacks:
+                try:
+                    callback({"entity": entity, "op": "resync"})
+                except Exception as e:
+                    logger.error("Flux de changements : resynchronisation %s en échec — %s",
+                                 entity, e)
+
+    def _dispatch(self, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning("Notification %s illisible : %s", CHANNEL, payload)
+            return
+        with self._lock:
+            listeners = list(self._listeners.get(event.get("entity"), ()))
+            targets = [s for s in self._subscribers if s.matches(event)] \
+                if event.get("entity") in ENTITIES else []
+        for callback in listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error("Flux de changements : écouteur %s en échec — %s",
+                             event.get("entity"), e)
+        for sub in targets:
+            self._loop.call_soon_threadsafe(sub.offer, event)
+
+    def _run(self) -> None:
+        """Boucle du thread : (re)connexion, LISTEN, attente des notifications."""
+        reconnecting = False                  # coupure depuis le chargement des caches
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = open_dedicated_connection()
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {CHANNEL}")
+                logger.info("Flux de changements : écoute du canal %s", CHANNEL)
+                if reconnecting:
+                    self._resync()
+                    reconnecting = False
+                while not self._stop.is_set():
+                    # Timeout court : permet de vérifier régulièrement _stop
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self._dispatch(conn.notifies.pop(0).payload)
+            except (psycopg2.Error, OSError) as e:
+                logger.warning(
+                    "Flux de changements interrompu, reconnexion dans %.0fs — %s",
+                    _RECONNECT_DELAY, e,
+                )
+                reconnecting = True
+                self._stop.wait(_RECONNECT_DELAY)
+            except Exception as e:
+                logger.error("Flux de changements : erreur inattendue — %s", e)
+                reconnecting = True
+                self._stop.wait(_RECONNECT_DELAY)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+
+change_feed = ChangeFeed()
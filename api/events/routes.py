@@ -0,0 +1,67 @@
+"""Endpoint SSE du flux de changements (remplace le polling des écrans live)."""
+import asyncio
+import json
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+
+from api.auth.permissions import require_authenticated
+from api.errors.exceptions import ValidationError
+from api.events.listener import ENTITIES, change_feed
+
+router = APIRouter(prefix="/events", tags=["events"], dependencies=[Depends(require_authenticated)])
+
+# Intervalle des commentaires keep-alive (proxies, Wi-Fi atelier)
+_KEEPALIVE_SECONDS = 15.0
+
+
+@router.get("/stream")
+async def stream_changes(
+    request: Request,
+    entities: Optional[str] = Query(
+        None, description="Valeurs CSV : intervention,intervention_task,intervention_request,purchase_request"),
+    machine_id: Optional[str] = Query(None, description="Ne recevoir que les changements de cet équipement"),
+):
+    """Flux SSE des changements : un événement par ligne créée, modifiée ou supprimée.
+
+    Le client refetch uniquement l'entité signalée au lieu de re-poller ses listes.
+    Un événement `resync` signale que des changements ont été perdus (client trop lent) :
+    le client doit alors tout recharger.
+    """
+    entity_set = None
+    if entities:
+        entity_set = {e.strip() for e in entities.split(",") if e.strip()}
+        unknown = entity_set - ENTITIES
+        if unknown:
+            raise ValidationError(f"Entités inconnues : {', '.join(sorted(unknown))}")
+    if machine_id:
+        try:
+            machine_id = str(UUID(machine_id))
+        except ValueError:
+            raise ValidationError("Format UUID invalide pour machine_id")
+
+    sub = change_feed.subscribe(entity_set, machine_id)
+
+    async def event_stream():
+        try:
+            yield ": connected\n\n"
+            while not await request.is_disconnected():
+                if sub.overflowed:
+                    sub.overflowed = False
+                    yield "event: resync\ndata: {}\n\n"
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), timeout=_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['entity']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            change_feed.unsubscribe(sub)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
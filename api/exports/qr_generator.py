@@ -1,24 +1,63 @@
+from functools import lru_cache
+from io import BytesIO
+from typing import Optional
+
 import qrcode
 from PIL import Image
 from pathlib import Path
 from api.settings import settings
 
+# Nombre de QR codes PNG conservés en mémoire (≈ 1-2 Ko chacun)
+QR_CACHE_SIZE = 2048
+
+
+@lru_cache(maxsize=8)
+def _load_logo(logo_path: str, logo_size: int) -> Optional[Image.Image]:
+    """Charge et redimensionne le logo une seule fois par (chemin, taille)."""
+    path = Path(logo_path)
+    if not path.exists():
+        return None
+    try:
+        with Image.open(path) as logo:
+            logo = logo.resize((logo_size, logo_size), Image.Resampling.LANCZOS)
+            # Convertir logo en RGB si nécessaire
+            if logo.mode != 'RGB':
+                logo = logo.convert('RGB')
+            return logo
+    except Exception:
+        # Si erreur logo, continuer sans (QR code reste valide)
+        return None
+
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def render_qr_png(entity_id: str, base_url: str) -> bytes:
+    """
+    Rendu PNG mémoïsé d'un QR code pointant vers `{base_url}/{entity_id}`.
+
+    Le contenu ne dépend que de ces deux valeurs : un QR déjà rendu est
+    resservi depuis le cache sans régénération ni relecture du logo.
+    """
+    buffer = BytesIO()
+    QRGenerator().generate_qr_code(entity_id, base_url).save(buffer, format="PNG")
+    return buffer.getvalue()
+
 
 class QRGenerator:
     """Génération QR codes avec overlay logo optionnel"""
 
-    def generate_qr_code(self, intervention_id: str) -> Image.Image:
+    def generate_qr_code(self, intervention_id: str, base_url: Optional[str] = None) -> Image.Image:
         """
         Génère QR code pointant vers intervention
 
         Args:
-            intervention_id: UUID intervention
+            intervention_id: UUID intervention (ou équipement si base_url fourni)
+            base_url: URL frontend de base (défaut: EXPORT_QR_BASE_URL)
 
         Returns:
             PIL Image object
         """
         # URL QR code
-        qr_data = f"{settings.EXPORT_QR_BASE_URL}/{intervention_id}"
+        qr_data = f"{base_url or settings.EXPORT_QR_BASE_URL}/{intervention_id}"
 
         # Créer QR code
         qr = qrcode.QRCode(
@@ -32,26 +71,13 @@ class QRGenerator:
 
         qr_img = qr.make_image(fill_color="black", back_color="white").convert('RGB')
 
-        # Overlay logo si configuré
-        logo_path = Path(settings.EXPORT_QR_LOGO_PATH)
-        if logo_path.exists():
-            try:
-                logo = Image.open(logo_path)
-
-                # Redimensionner logo (20% taille QR)
-                qr_width, qr_height = qr_img.size
-                logo_size = int(qr_width * 0.2)
-                logo = logo.resize((logo_size, logo_size), Image.Resampling.LANCZOS)
-
-                # Convertir logo en RGB si nécessaire
-                if logo.mode != 'RGB':
-                    logo = logo.convert('RGB')
-
-                # Centrer logo
-                logo_pos = ((qr_width - logo_size) // 2, (qr_height - logo_size) // 2)
-                qr_img.paste(logo, logo_pos)
-            except Exception:
-                # Si erreur logo, continuer sans (QR code reste valide)
-                pass
+        # Overlay logo si configuré (20% taille QR, préchargé et redimensionné une fois)
+        qr_width, qr_height = qr_img.size
+        logo_size = int(qr_width * 0.2)
+        logo = _load_logo(settings.EXPORT_QR_LOGO_PATH, logo_size)
+        if logo is not None:
+            # Centrer logo
+            logo_pos = ((qr_width - logo_size) // 2, (qr_height - logo_size) // 2)
+            qr_img.paste(logo, logo_pos)
 
         return qr_img
@@ -1,7 +1,8 @@
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, List
 from api.errors.exceptions import NotFoundError, DatabaseError
 from api.settings import settings
-from api.db import get_connection, release_connection
+from api.db import get_read_connection, release_connection
 from api.constants import INTERVENTION_TYPES_MAP
 
 
@@ -9,7 +10,8 @@ class ExportRepository:
     """Repository spécialisé pour données d'export"""
 
     def _get_connection(self):
-        return get_connection()
+        # Lectures seules : réplica si disponible et à jour
+        return get_read_connection()
 
     def get_intervention_code(self, intervention_id: str) -> str:
         """Récupère uniquement le code intervention (lightweight pour QR)"""
@@ -28,6 +30,42 @@ class ExportRepository:
         finally:
             release_connection(conn)
 
+    def get_label_data(self, entity_type: str, ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Récupère en une requête les données des étiquettes QR (planche d'impression).
+
+        Args:
+            entity_type: 'intervention' ou 'equipement'
+            ids: UUIDs des entités, dans l'ordre d'impression souhaité
+
+        Returns:
+            [{id, code, label, sublabel}] dans l'ordre de `ids`, entités inconnues ignorées
+        """
+        if entity_type == "intervention":
+            query = """
+                SELECT i.id::text AS id, i.code, i.title AS label, m.code AS sublabel
+                FROM intervention i
+                LEFT JOIN machine m ON m.id = i.machine_id
+                WHERE i.id = ANY(%s::uuid[])
+            """
+        else:
+            query = """
+                SELECT m.id::text AS id, m.code, m.name AS label, m.affectation AS sublabel
+                FROM machine m
+                WHERE m.id = ANY(%s::uuid[])
+            """
+        conn = self._get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(query, (ids,))
+            cols = [d[0] for d in cur.description]
+            by_id = {row[0]: dict(zip(cols, row)) for row in cur.fetchall()}
+            return [by_id[i] for i in ids if i in by_id]
+        except Exception as e:
+            raise DatabaseError(f"Erreur DB: {str(e)}")
+        finally:
+            release_connection(conn)
+
     def get_intervention_export_data(self, intervention_id: str) -> Dict[str, Any]:
         """
         Récupère données complètes pour export PDF v9.
@@ -326,3 +364,14 @@ class ExportRepository:
             raise DatabaseError(f"Erreur lors de la récupération des données export: {str(e)}")
         finally:
             release_connection(conn)
+
+
+@lru_cache(maxsize=2048)
+def get_cached_intervention_code(intervention_id: str) -> str:
+    """
+    Code intervention mémoïsé pour le nom de fichier du QR.
+
+    Le code est généré à l'insertion (trg_interv_code) et ne change plus :
+    seules les interventions introuvables (404, non mises en cache) refont la requête.
+    """
+    return ExportRepository().get_intervention_code(intervention_id)
@@ -1,18 +1,21 @@
 from fastapi import APIRouter, Request, Response, Depends, Query
 from fastapi.responses import StreamingResponse
-from io import BytesIO
+import base64
 import hashlib
 import re
 from uuid import UUID
 from typing import Optional
 from datetime import datetime, timedelta, date
 
-from api.exports.repo import ExportRepository
+from api.exports.repo import ExportRepository, get_cached_intervention_code
 from api.exports.pdf_generator import PDFGenerator
-from api.exports.qr_generator import QRGenerator
+from api.exports.qr_generator import render_qr_png
+from api.exports.schemas import QRSheetRequest
 from api.exports.planning_repo import PlanningRepository
-from api.errors.exceptions import ValidationError
+from api.exports.stream_repo import ExportDataset, ExportFormat, StreamExportRepository
+from api.errors.exceptions import NotFoundError, ValidationError
 from api.limiter import limiter
+from api.settings import settings
 
 from api.auth.permissions import require_authenticated
 
@@ -76,28 +79,19 @@ def export_intervention_qrcode(intervention_id: str):
     Returns:
         Image PNG du QR code
     """
-    # Validate UUID format
+    # Validate UUID format (forme canonique = clé de cache stable)
     try:
-        UUID(intervention_id)
+        intervention_id = str(UUID(intervention_id))
     except ValueError:
         raise ValidationError("Format UUID invalide")
 
-    # Get intervention code for filename
-    repo = ExportRepository()
-    code = repo.get_intervention_code(intervention_id)
-
-    # Generate QR code
-    generator = QRGenerator()
-    qr_img = generator.generate_qr_code(intervention_id)
-
-    # Convert to bytes
-    buffer = BytesIO()
-    qr_img.save(buffer, format="PNG")
-    buffer.seek(0)
+    # Code (immuable) et PNG sont mémoïsés : aucune requête DB ni rendu après le 1er appel
+    code = get_cached_intervention_code(intervention_id)
+    png_bytes = render_qr_png(intervention_id, settings.EXPORT_QR_BASE_URL)
 
     safe_code = re.sub(r'[^\w\-]', '_', str(code))
-    return StreamingResponse(
-        buffer,
+    return Response(
+        content=png_bytes,
         media_type="image/png",
         headers={
             "Content-Disposition": f'inline; filename="{safe_code}.png"',
@@ -106,6 +100,51 @@ def export_intervention_qrcode(intervention_id: str):
     )
 
 
+@router.post("/qrcodes/sheet")
+@limiter.limit("5/minute")
+def export_qrcode_sheet(payload: QRSheetRequest, request: Request):
+    """
+    Export PDF d'une planche d'étiquettes QR (interventions ou équipements).
+
+    Un seul appel pour une campagne d'impression : les QR sont issus du
+    même cache que GET /exports/interventions/{id}/qrcode.
+
+    Returns:
+        PDF A4 avec une étiquette (QR + code + libellé) par entité trouvée
+    """
+    ids = list(dict.fromkeys(str(i) for i in payload.ids))
+    base_url = (
+        settings.EXPORT_QR_BASE_URL if payload.entity_type == "intervention"
+        else settings.EXPORT_QR_EQUIPEMENT_BASE_URL
+    )
+
+    repo = ExportRepository()
+    labels = repo.get_label_data(payload.entity_type, ids)
+    if not labels:
+        raise NotFoundError("Aucune entité trouvée pour les identifiants fournis")
+
+    for label in labels:
+        png_b64 = base64.b64encode(render_qr_png(label["id"], base_url)).decode("ascii")
+        label["qr"] = f"data:image/png;base64,{png_b64}"
+
+    generator = PDFGenerator()
+    html = generator.render_html({"labels": labels}, template_file="planche_qr_v1.html")
+    pdf_bytes = generator.generate_pdf(html)
+
+    filename = f"etiquettes_qr_{payload.entity_type}_{datetime.now():%Y%m%d}.pdf"
+    etag = hashlib.md5(pdf_bytes).hexdigest()
+
+    return Response(
+        content=pdf_bytes,
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "ETag": etag,
+            "Cache-Control": "no-cache, no-store, must-revalidate",
+        },
+    )
+
+
 # ── Helpers pour le calcul des bornes de semaine ISO ──────────────────────────
 
 _FR_DAYS = ["Lundi", "Mardi", "Mercredi", "Jeudi", "Vendredi", "Samedi", "Dimanche"]
@@ -146,6 +185,35 @@ def _day_label(d: date) -> str:
     return f"{_FR_DAYS[d.weekday()]} {d.day} {_FR_MONTHS[d.month - 1]}"
 
 
+# ── Exports en flux des grandes listes ────────────────────────────────────────
+
+_STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+@router.get("/lists/{dataset}")
+@limiter.limit("5/minute")
+def export_list_stream(
+    request: Request,
+    dataset: ExportDataset,
+    format: ExportFormat = Query("ndjson", description="ndjson (une ligne JSON par objet) ou csv (séparateur ;)"),
+    from_dt: Optional[datetime] = Query(None, description="Début de fenêtre (ignoré pour stock-items)"),
+    to_dt: Optional[datetime] = Query(None, description="Fin de fenêtre (ignoré pour stock-items)"),
+):
+    """
+    Export complet d'une grande liste en flux (NDJSON ou CSV), sans pagination.
+
+    Lu par curseur serveur et envoyé au fil de l'eau : mémoire constante côté
+    API, un seul appel pour une année de données.
+    """
+    chunks = StreamExportRepository().stream(dataset, format, from_dt=from_dt, to_dt=to_dt)
+    filename = f"{dataset}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
+    return StreamingResponse(
+        chunks,
+        media_type=_STREAM_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
 # ── Route fiche de semaine ────────────────────────────────────────────────────
 
 
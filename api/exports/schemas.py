@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 from uuid import UUID
 
 
@@ -21,3 +21,15 @@ class QRExportInfo(BaseModel):
     """Info export QR (pour docs OpenAPI)"""
     content_type: str = "image/png"
     requires_auth: bool = False
+
+
+class QRSheetRequest(BaseModel):
+    """Planche d'étiquettes QR à imprimer"""
+    entity_type: Literal["intervention", "equipement"] = Field(
+        default="intervention",
+        description="Type d'entité ciblée par les QR codes",
+    )
+    ids: List[UUID] = Field(
+        ..., min_length=1, max_length=200,
+        description="UUIDs des entités, dans l'ordre d'impression",
+    )
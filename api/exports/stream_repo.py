@@ -0,0 +1,276 @@
+"""
+Exports en flux des grandes listes (NDJSON ou CSV).
+
+Lecture par curseur nommé (côté serveur, lots de _ITERSIZE lignes) et
+sérialisation lot par lot : la mémoire reste constante quelle que soit la
+taille de l'export, sans pagination LIMIT/OFFSET. La connexion est gardée
+pendant tout le flux et rendue au pool par _ExportStream : à la fin, à
+l'abandon du client, ou au ramasse-miettes si la réponse est annulée avant
+même le premier morceau.
+"""
+import csv
+import io
+import logging
+import weakref
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Literal, Optional, Tuple
+
+import orjson
+
+from api.db import get_read_connection, release_connection
+from api.errors.exceptions import raise_db_error
+from api.utils.response import _orjson_default
+
+logger = logging.getLogger(__name__)
+
+ExportDataset = Literal[
+    "interventions", "purchase-requests", "stock-items", "supplier-order-lines", "audit-logs"]
+ExportFormat = Literal["ndjson", "csv"]
+
+# Lignes rapatriées par aller-retour du curseur nommé (et par morceau envoyé)
+_ITERSIZE = 2000
+
+# Par jeu : colonnes (alias, expression), FROM, colonne de date filtrable
+# (None = pas de fenêtre) et tri stable pour un export reproductible
+_DATASETS: Dict[str, Dict[str, Any]] = {
+    "interventions": {
+        "columns": [
+            ("id", "i.id"),
+            ("code", "i.code"),
+            ("title", "i.title"),
+            ("type_inter", "i.type_inter"),
+            ("priority", "i.priority"),
+            ("status_actual", "i.status_actual"),
+            ("reported_date", "i.reported_date"),
+            ("tech_initials", "i.tech_initials"),
+            ("machine_code", "m.code"),
+            ("machine_name", "m.name"),
+        ],
+        "from": "intervention i LEFT JOIN machine m ON m.id = i.machine_id",
+        "date_column": "i.reported_date",
+        "order_by": "i.reported_date, i.id",
+    },
+    "purchase-requests": {
+        "columns": [
+            ("id", "pr.id"),
+            ("status", "pr.status"),
+            ("item_label", "pr.item_label"),
+            ("stock_item_ref", "si.ref"),
+            ("quantity", "pr.quantity"),
+            ("unit", "pr.unit"),
+            ("urgency", "pr.urgency"),
+            ("requested_by", "pr.requested_by"),
+            ("workshop", "pr.workshop"),
+            ("intervention_codes", "pri.intervention_codes"),
+            ("created_at", "pr.created_at"),
+            ("updated_at", "pr.updated_at"),
+        ],
+        # Lien intervention via les actions (plus de purchase_request.intervention_id)
+        "from": (
+            "purchase_request pr"
+            " LEFT JOIN stock_item si ON si.id = pr.stock_item_id"
+            " LEFT JOIN LATERAL ("
+            "SELECT string_agg(DISTINCT i.code, ',' ORDER BY i.code) AS intervention_codes"
+            " FROM intervention_action_purchase_request iapr"
+            " JOIN intervention_action ia ON ia.id = iapr.intervention_action_id"
+            " JOIN intervention i ON i.id = ia.intervention_id"
+            " WHERE iapr.purchase_request_id = pr.id"
+            ") pri ON true"
+        ),
+        "date_column": "pr.created_at",
+        "order_by": "pr.created_at, pr.id",
+    },
+    "stock-items": {
+        "columns": [
+            ("id", "si.id"),
+            ("ref", "si.ref"),
+            ("name", "si.name"),
+            ("family_code", "si.family_code"),
+            ("sub_family_code", "si.sub_family_code"),
+            ("spec", "si.spec"),
+            ("dimension", "si.dimension"),
+            ("quantity", "si.quantity"),
+            ("unit", "si.unit"),
+            ("location", "si.location"),
+            ("supplier_refs_count", "si.supplier_refs_count"),
+            ("preferred_supplier_name", "s.name"),
+            ("preferred_supplier_ref", "si.preferred_supplier_ref"),
+            ("preferred_unit_price", "si.preferred_unit_price"),
+            ("preferred_delivery_time_days", "si.preferred_delivery_time_days"),
+        ],
+        "from": "stock_item si LEFT JOIN supplier s ON s.id = si.preferred_supplier_id",
+        "date_column": None,
+        "order_by": "si.ref, si.id",
+    },
+    "supplier-order-lines": {
+        "columns": [
+            ("id", "sol.id"),
+            ("order_number", "so.order_number"),
+            ("supplier_name", "s.name"),
+            ("stock_item_id", "sol.stock_item_id"),
+            ("part_id", "sol.part_id"),
+            ("quantity", "sol.quantity"),
+            ("unit_price", "sol.unit_price"),
+            ("total_price", "sol.total_price"),
+            ("quantity_received", "sol.quantity_received"),
+            ("is_selected", "sol.is_selected"),
+            ("quote_price", "sol.quote_price"),
+            ("lead_time_days", "sol.lead_time_days"),
+            ("purchase_request_count", "COALESCE(f.purchase_request_count, 0)"),
+            ("is_consultation", "COALESCE(f.is_consultation, false)"),
+            ("created_at", "sol.created_at"),
+        ],
+        "from": (
+            "supplier_order_line sol"
+            " JOIN supplier_order so ON so.id = sol.supplier_order_id"
+            " LEFT JOIN supplier s ON s.id = so.supplier_id"
+            " LEFT JOIN supplier_order_line_flags f ON f.supplier_order_line_id = sol.id"
+        ),
+        "date_column": "sol.created_at",
+        "order_by": "sol.created_at, sol.id",
+    },
+    "audit-logs": {
+        "columns": [
+            ("logged_at", "al.logged_at"),
+            ("entity_type", "al.entity_type"),
+            ("entity_id", "al.entity_id"),
+            ("decision_type", "al.decision_type"),
+            ("old_value", "al.old_value"),
+            ("new_value", "al.new_value"),
+            ("reason_code", "arc.code"),
+            ("reason_text", "al.reason_text"),
+            ("changed_by", "al.changed_by"),
+            ("is_system", "al.is_system"),
+        ],
+        "from": "audit_log al LEFT JOIN audit_reason_code arc ON arc.id = al.reason_code_id",
+        "date_column": "al.logged_at",
+        "order_by": "al.logged_at, al.id",
+    },
+}
+
+
+def _csv_value(value: Any) -> Any:
+    """Valeur de cellule CSV : JSON compact pour les objets, vide pour NULL."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value, default=_orjson_default).decode()
+    return value
+
+
+def _release_export(conn, cur) -> None:
+    try:
+        cur.close()
+    except Exception:
+        pass
+    release_connection(conn)
+
+
+class _ExportStream:
+    """
+    Itérateur des morceaux d'un export, propriétaire du curseur et de la connexion.
+
+    Un générateur jamais démarré n'exécute pas son `finally` : la libération
+    est donc portée par cet objet (fin du flux, close() ou weakref.finalize
+    quand la réponse est abandonnée sans avoir été itérée).
+    """
+
+    def __init__(self, conn, cur, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._release = weakref.finalize(self, _release_export, conn, cur)
+
+    def __iter__(self) -> "_ExportStream":
+        return self
+
+    def __next__(self) -> bytes:
+        try:
+            return next(self._chunks)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        self._chunks.close()
+        self._release()
+
+
+class StreamExportRepository:
+    """Exports en flux des grandes listes par curseur nommé"""
+
+    def _get_connection(self):
+        # Lectures seules : réplica si disponible et à jour
+        return get_read_connection()
+
+    def _build_query(
+        self,
+        dataset: str,
+        from_dt: Optional[datetime],
+        to_dt: Optional[datetime],
+    ) -> Tuple[str, List[Any], List[str]]:
+        spec = _DATASETS[dataset]
+        where_clauses: List[str] = []
+        params: List[Any] = []
+        date_column = spec["date_column"]
+        if date_column and from_dt:
+            where_clauses.append(f"{date_column} >= %s")
+            params.append(from_dt)
+        if date_column and to_dt:
+            where_clauses.append(f"{date_column} <= %s")
+            params.append(to_dt)
+        where_sql = ("WHERE " + " AND ".join(where_clauses)) if where_clauses else ""
+        select_sql = ", ".join(f"{expr} AS {alias}" for alias, expr in spec["columns"])
+        query = f"SELECT {select_sql} FROM {spec['from']} {where_sql} ORDER BY {spec['order_by']}"
+        return query, params, [alias for alias, _ in spec["columns"]]
+
+    def stream(
+        self,
+        dataset: str,
+        fmt: str,
+        from_dt: Optional[datetime] = None,
+        to_dt: Optional[datetime] = None,
+    ) -> Iterator[bytes]:
+        """
+        Ouvre le curseur et retourne l'itérateur des morceaux à envoyer
+        (rend la connexion au pool à la fin, à l'abandon ou au ramasse-miettes).
+
+        La requête est lancée ici (erreur SQL → réponse HTTP d'erreur normale) ;
+        les lignes ne sont lues qu'au fil de l'envoi.
+        """
+        query, params, columns = self._build_query(dataset, from_dt, to_dt)
+        conn = self._get_connection()
+        try:
+            cur = conn.cursor(name=f"export_{dataset.replace('-', '_')}")
+            cur.itersize = _ITERSIZE
+            cur.execute(query, params)
+        except Exception as e:
+            release_connection(conn)
+            raise_db_error(e, "export")
+        return _ExportStream(conn, cur, self._iter_chunks(cur, columns, fmt))
+
+    def _iter_chunks(self, cur, columns: List[str], fmt: str) -> Iterator[bytes]:
+        try:
+            if fmt == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer, delimiter=";")
+                writer.writerow(columns)
+            while True:
+                rows = cur.fetchmany(_ITERSIZE)
+                if not rows:
+                    break
+                if fmt == "csv":
+                    writer.writerows([_csv_value(v) for v in row] for row in rows)
+                    yield buffer.getvalue().encode("utf-8")
+                    buffer.seek(0)
+                    buffer.truncate()
+                else:
+                    yield b"".join(
+                        orjson.dumps(dict(zip(columns, row)), default=_orjson_default) + b"\n"
+                        for row in rows)
+            if fmt == "csv" and buffer.tell():
+                # Export vide : l'en-tête seul
+                yield buffer.getvalue().encode("utf-8")
+        except Exception as e:
+            # Statut déjà envoyé : le flux s'interrompt, le client voit un fichier tronqué
+            logger.error("Export interrompu : %s", e)
@@ -1,5 +1,7 @@
 from api.settings import settings
-from api.db import check_connection
+from typing import Dict
+from api.db import check_connection, get_replica_status
+from api.utils.http_cache import get_compression_stats
 from pydantic import BaseModel
 
 __version__ = settings.API_VERSION
@@ -10,7 +12,9 @@ class HealthCheckResponse(BaseModel):
     status: str
     version: str
     database: str
+    database_replica: str
     auth_service: str
+    compression: Dict[str, int]
 
 
 def check_database_connection() -> str:
@@ -40,5 +44,7 @@ async def health_check() -> HealthCheckResponse:
         status=overall_status,
         version=__version__,
         database=db_status,
+        database_replica=get_replica_status(),
         auth_service=auth_status,
+        compression=get_compression_stats(),
     )
@@ -7,6 +7,75 @@ from api.errors.exceptions import ConflictError, DatabaseError, NotFoundError, V
 from api.constants import CLOSED_STATUS_CODE, IN_PROGRESS_STATUS_CODE
 from api.intervention_requests.validators import InterventionRequestValidator
 
+# Cascade de fermeture d'un lot d'interventions :
+#   1. demande 'acceptee' liée directement (intervention_request.intervention_id),
+#      sinon via preventive_occurrence.di_id (DI auto-acceptée) — lien alors corrigé ;
+#   2. demande passée à 'cloturee' et tracée dans request_status_log ;
+#   3. occurrence préventive liée passée à 'completed', par intervention_id ou par
+#      di_id (DI clôturée ci-dessus, sinon n'importe quelle DI de l'intervention :
+#      le trigger trg_sync_status_log_to_intervention peut l'avoir déjà clôturée).
+_CASCADE_CLOSED_SQL = """
+    WITH target AS (
+        SELECT DISTINCT unnest(%s::uuid[]) AS intervention_id
+    ),
+    direct AS (
+        SELECT DISTINCT ON (ir.intervention_id)
+               ir.intervention_id, ir.id AS request_id, ir.statut, false AS relink
+        FROM intervention_request ir
+        JOIN target t ON t.intervention_id = ir.intervention_id
+        WHERE ir.statut = 'acceptee'
+        ORDER BY ir.intervention_id, ir.id
+    ),
+    fallback AS (
+        SELECT DISTINCT ON (po.intervention_id)
+               po.intervention_id, ir.id AS request_id, ir.statut, true AS relink
+        FROM preventive_occurrence po
+        JOIN target t ON t.intervention_id = po.intervention_id
+        JOIN intervention_request ir ON ir.id = po.di_id
+        WHERE ir.statut = 'acceptee'
+          AND po.intervention_id NOT IN (SELECT intervention_id FROM direct)
+        ORDER BY po.intervention_id, ir.id
+    ),
+    linked AS (
+        SELECT DISTINCT ON (request_id) *
+        FROM (SELECT * FROM direct UNION ALL SELECT * FROM fallback) l
+        ORDER BY request_id, relink
+    ),
+    closed AS (
+        UPDATE intervention_request ir
+        SET statut = 'cloturee',
+            intervention_id = CASE WHEN l.relink THEN l.intervention_id ELSE ir.intervention_id END
+        FROM linked l
+        WHERE ir.id = l.request_id
+        RETURNING ir.id, l.intervention_id, l.statut AS status_from
+    ),
+    logged AS (
+        INSERT INTO request_status_log (request_id, status_from, status_to, changed_by, notes)
+        SELECT id, status_from, 'cloturee', NULL,
+               'Clôture automatique suite à la fermeture de l''intervention'
+        FROM closed
+    ),
+    occurrence_request AS (
+        SELECT t.intervention_id,
+               COALESCE(c.id, (
+                   SELECT ir.id FROM intervention_request ir
+                   WHERE ir.intervention_id = t.intervention_id
+                   LIMIT 1
+               )) AS request_id
+        FROM target t
+        LEFT JOIN closed c ON c.intervention_id = t.intervention_id
+    ),
+    completed AS (
+        UPDATE preventive_occurrence po
+        SET status = 'completed'
+        FROM occurrence_request o
+        WHERE po.status NOT IN ('completed', 'skipped')
+          AND (po.intervention_id = o.intervention_id OR po.di_id = o.request_id)
+        RETURNING po.id
+    )
+    SELECT (SELECT count(*) FROM closed), (SELECT count(*) FROM completed)
+"""
+
 # Sous-requête réutilisable pour l'ID du statut fermé
 _CLOSED_SQ = "(SELECT id FROM intervention_status_ref WHERE code = %s LIMIT 1)"
 
@@ -917,95 +986,17 @@ class InterventionRequestRepository:
         conn = self._get_connection()
         try:
             cur = conn.cursor()
-
-            # 1. Clôturer la demande liée.
-            # Tentative 1 : chercher via intervention_request.intervention_id (lien direct).
-            cur.execute(
-                """
-                SELECT id, statut FROM intervention_request
-                WHERE intervention_id = %s AND statut = 'acceptee'
-                LIMIT 1
-                """,
-                (intervention_id,),
-            )
-            row = cur.fetchone()
-
-            # Tentative 2 (fallback) : DI dont intervention_id est NULL (ex. auto-accept)
-            # mais liée via preventive_occurrence.di_id → occurrence.intervention_id.
-            if not row:
-                cur.execute(
-                    """
-                    SELECT ir.id, ir.statut
-                    FROM intervention_request ir
-                    JOIN preventive_occurrence po ON po.di_id = ir.id
-                    WHERE po.intervention_id = %s AND ir.statut = 'acceptee'
-                    LIMIT 1
-                    """,
-                    (intervention_id,),
-                )
-                row = cur.fetchone()
-                if row:
-                    # Corriger le lien manquant pour les prochaines fermetures
-                    cur.execute(
-                        "UPDATE intervention_request SET intervention_id = %s WHERE id = %s",
-                        (intervention_id, str(row[0])),
-                    )
-
-            if row:
-                request_id, current_statut = row[0], row[1]
-
-                cur.execute("SET LOCAL app.skip_request_status_log = 'true'")
-                cur.execute(
-                    "UPDATE intervention_request SET statut = 'cloturee' WHERE id = %s",
-                    (str(request_id),),
-                )
-                cur.execute(
-                    """
-                    INSERT INTO request_status_log (request_id, status_from, status_to, changed_by, notes)
-                    VALUES (%s, %s, %s, NULL, %s)
-                    """,
-                    (str(request_id), current_statut, "cloturee",
-                     "Clôture automatique suite à la fermeture de l'intervention"),
-                )
+            requests_closed, occurrences_completed = self.cascade_interventions_closed(
+                cur, [intervention_id])
+            conn.commit()
+            if requests_closed:
                 logger.info(
-                    "Demande %s automatiquement clôturée (intervention %s fermée)",
-                    request_id, intervention_id,
-                )
-
-            # 2. Passer l'occurrence préventive liée à 'completed'.
-            # Double critère : intervention_id (cas standard) OU di_id (cas où
-            # occurrence.intervention_id est NULL suite à un bug de rattachement).
-            # On récupère le di_id sans filtrer sur le statut de la DI, car le trigger
-            # trg_sync_status_log_to_intervention peut avoir déjà clôturé la DI avant
-            # que cette fonction ne soit appelée — row serait None dans ce cas.
-            closed_request_id = str(row[0]) if row else None
-            if not closed_request_id:
-                cur.execute(
-                    "SELECT id FROM intervention_request WHERE intervention_id = %s LIMIT 1",
-                    (intervention_id,),
-                )
-                di_row = cur.fetchone()
-                closed_request_id = str(di_row[0]) if di_row else None
-
-            cur.execute(
-                """
-                UPDATE preventive_occurrence
-                SET status = 'completed'
-                WHERE status NOT IN ('completed', 'skipped')
-                  AND (
-                      intervention_id = %s
-                      OR (di_id = %s AND %s IS NOT NULL)
-                  )
-                """,
-                (intervention_id, closed_request_id, closed_request_id),
-            )
-            if cur.rowcount:
+                    "Demande automatiquement clôturée (intervention %s fermée)", intervention_id)
+            if occurrences_completed:
                 logger.info(
                     "Occurrence préventive liée à l'intervention %s passée à 'completed'",
                     intervention_id,
                 )
-
-            conn.commit()
         except Exception as e:
             conn.rollback()
             logger.error(
@@ -1015,6 +1006,21 @@ class InterventionRequestRepository:
         finally:
             release_connection(conn)
 
+    def cascade_interventions_closed(self, cur, intervention_ids: List[str]) -> tuple[int, int]:
+        """
+        Cascade de fermeture pour un lot d'interventions, dans la transaction de `cur`
+        (sans commit), en une requête quel que soit le nombre d'interventions.
+
+        Retourne (demandes clôturées, occurrences passées à 'completed').
+        """
+        if not intervention_ids:
+            return 0, 0
+        # Le trigger ne journalise pas : request_status_log est alimenté par _CASCADE_CLOSED_SQL
+        cur.execute("SET LOCAL app.skip_request_status_log = 'true'")
+        cur.execute(_CASCADE_CLOSED_SQL, (list(intervention_ids),))
+        requests_closed, occurrences_completed = cur.fetchone()
+        return int(requests_closed), int(occurrences_completed)
+
     # ──────────────────────────────────────────────────────────────
     # Réparation manuelle des DIs orphelines
     # ──────────────────────────────────────────────────────────────
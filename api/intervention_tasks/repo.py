@@ -2,7 +2,7 @@ import hashlib
 import json
 import logging
 import math
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
 from uuid import uuid4
 
@@ -10,7 +10,7 @@ from uuid import uuid4
 from api.constants import CLOSED_STATUS_CODE
 from api.db import get_connection, release_connection
 from api.errors.exceptions import ConflictError, NotFoundError, ValidationError, raise_db_error
-from api.intervention_tasks.schemas import InterventionTaskIn, InterventionTaskPatch
+from api.intervention_tasks.schemas import InterventionTaskBulkPatch, InterventionTaskIn, InterventionTaskPatch
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +53,15 @@ def _audit_task(cur, task_id: str, decision_type: str,
         except Exception:
             pass
 
+# Écriture groupée des entrées d'audit d'un lot de tâches (une par champ modifié)
+_AUDIT_TASKS_SQL = """
+    SELECT count(public.fn_audit_log_decision(
+        'task', a.task_id, a.decision_type, a.old_value, a.new_value,
+        %s::varchar, %s::text, %s::uuid, false))
+    FROM unnest(%s::uuid[], %s::varchar[], %s::jsonb[], %s::jsonb[])
+        AS a(task_id, decision_type, old_value, new_value)
+"""
+
 _TASK_SELECT = """
     SELECT
         it.id, it.intervention_id, it.label, it.origin, it.status,
@@ -473,6 +482,151 @@ class InterventionTaskRepository:
 
         return self.get_by_id(task_id)
 
+    def bulk_patch(self, data: InterventionTaskBulkPatch, closed_by: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Applique un lot de modifications (statut, affectation, échéance, ordre)
+        en une transaction : tout ou rien.
+
+        Mêmes règles que patch() tâche par tâche, vérifiées pour tout le lot en
+        une requête ; une requête de mise à jour et une écriture d'audit groupée.
+        """
+        ids = [str(item.id) for item in data.items]
+        conn = self._get_connection()
+        try:
+            cur = conn.cursor()
+            # Verrou dans l'ordre des id : pas d'interblocage entre lots concurrents
+            cur.execute(
+                """
+                SELECT it.id::text, it.label, it.status, it.skip_reason,
+                       it.assigned_to::text, it.due_date, it.sort_order,
+                       i.code, i.status_actual
+                FROM intervention_task it
+                LEFT JOIN intervention i ON i.id = it.intervention_id
+                WHERE it.id = ANY(%s::uuid[])
+                ORDER BY it.id
+                FOR UPDATE OF it
+                """,
+                (ids,),
+            )
+            current = {row[0]: row for row in cur.fetchall()}
+            missing = [i for i in ids if i not in current]
+            if missing:
+                raise NotFoundError(f"Tâche(s) non trouvée(s) : {', '.join(missing[:10])}")
+            closed = sorted({
+                row[7] for row in current.values()
+                if str(row[8] or "").strip().lower() == CLOSED_STATUS_CODE
+            })
+            if closed:
+                raise ValidationError(
+                    "Intervention fermée : aucune modification des tâches n'est autorisée "
+                    f"({', '.join(closed[:10])})"
+                )
+
+            fields = ("label", "status", "skip_reason", "assigned_to", "due_date", "sort_order")
+            updates: List[tuple] = []
+            changes: List[tuple] = []       # (task_id, champ, ancienne valeur, nouvelle valeur)
+            for item in data.items:
+                task_id = str(item.id)
+                old = dict(zip(fields, current[task_id][1:7]))
+                new = dict(old)
+                for field in ("label", "status", "skip_reason", "due_date", "sort_order"):
+                    value = getattr(item, field)
+                    if value is not None:
+                        new[field] = value
+                if item.assigned_to is not None:
+                    new["assigned_to"] = str(item.assigned_to)
+                if item.due_date_shift_days and old["due_date"] is not None:
+                    new["due_date"] = old["due_date"] + timedelta(days=item.due_date_shift_days)
+
+                changed = [f for f in fields if new[f] != old[f]]
+                if not changed:
+                    continue
+                closes = "status" in changed and new["status"] in ("done", "skipped")
+                updates.append((task_id, *(new[f] for f in fields), closes))
+                changes.extend((task_id, f, old[f], new[f]) for f in changed)
+
+            if updates:
+                cur.execute(
+                    """
+                    UPDATE intervention_task it
+                    SET label = n.label,
+                        status = n.status,
+                        skip_reason = n.skip_reason,
+                        assigned_to = n.assigned_to,
+                        due_date = n.due_date,
+                        sort_order = n.sort_order,
+                        closed_by = CASE WHEN n.closes THEN %s::uuid ELSE it.closed_by END,
+                        updated_at = NOW()
+                    FROM unnest(%s::uuid[], %s::text[], %s::text[], %s::text[],
+                                %s::uuid[], %s::date[], %s::int[], %s::bool[])
+                        AS n(id, label, status, skip_reason, assigned_to, due_date, sort_order, closes)
+                    WHERE it.id = n.id
+                    """,
+                    (closed_by, *map(list, zip(*updates))),
+                )
+                self._audit_changes(cur, changes, data.reason_code, data.reason_text, closed_by)
+
+            cur.execute(f"{_TASK_SELECT} WHERE it.id = ANY(%s::uuid[])", (ids,))
+            cols = [d[0] for d in cur.description]
+            by_id = {str(r[0]): _map_task(dict(zip(cols, r))) for r in cur.fetchall()}
+            conn.commit()
+            return {
+                "updated": len(updates),
+                "unchanged": len(ids) - len(updates),
+                "items": [by_id[i] for i in ids],
+            }
+        except (NotFoundError, ValidationError, ConflictError):
+            conn.rollback()
+            raise
+        except Exception as e:
+            conn.rollback()
+            raise_db_error(e, "mise à jour groupée des tâches")
+        finally:
+            release_connection(conn)
+
+    def _audit_changes(self, cur, changes: List[tuple], reason_code: str,
+                       reason_text: Optional[str], changed_by: Optional[str]) -> None:
+        """Une entrée d'audit par champ modifié, écrites en une requête.
+        Comme _audit_task, un échec est loggé sans interrompre la mutation.
+        """
+        user_ids = sorted({str(v) for _, f, old, new in changes if f == "assigned_to"
+                           for v in (old, new) if v})
+        users_by_id: Dict[str, Dict[str, Any]] = {}
+        if user_ids:
+            cur.execute(
+                "SELECT id, initial, first_name, last_name FROM tunnel_user WHERE id = ANY(%s::uuid[])",
+                (user_ids,),
+            )
+            users_by_id = {str(r[0]): {"id": str(r[0]), "initials": r[1], "first_name": r[2], "last_name": r[3]}
+                           for r in cur.fetchall()}
+
+        def _audit_value(field: str, value: Any) -> Any:
+            if field == "assigned_to":
+                return users_by_id.get(str(value)) if value else None
+            if field == "due_date":
+                return str(value) if value else None
+            return value
+
+        try:
+            cur.execute("SAVEPOINT _audit_sp")
+            cur.execute(
+                _AUDIT_TASKS_SQL,
+                (
+                    reason_code, reason_text, changed_by,
+                    [task_id for task_id, _, _, _ in changes],
+                    [f"{field}_changed" for _, field, _, _ in changes],
+                    [json.dumps({field: _audit_value(field, old)}) for _, field, old, _ in changes],
+                    [json.dumps({field: _audit_value(field, new)}) for _, field, _, new in changes],
+                ),
+            )
+            cur.execute("RELEASE SAVEPOINT _audit_sp")
+        except Exception as exc:
+            logger.error("audit des tâches (lot de %d modifications) : %s", len(changes), exc)
+            try:
+                cur.execute("ROLLBACK TO SAVEPOINT _audit_sp")
+            except Exception:
+                pass
+
     # ── Suppression ───────────────────────────────────────────────
 
     def delete(self, task_id: str, deleted_by: Optional[str] = None, reason_code: str = "TASK_DELETED") -> None:
@@ -6,13 +6,14 @@ from api.auth.permissions import require_authenticated
 from api.errors.exceptions import ValidationError
 from api.intervention_tasks.repo import InterventionTaskRepository
 from api.intervention_tasks.schemas import (
+    InterventionTaskBulkPatch,
     InterventionTaskDelete,
     InterventionTaskIn,
     InterventionTaskOut,
     InterventionTaskPatch,
     TaskProgressOut,
 )
-from api.utils.response import single
+from api.utils.response import FastJSONResponse, single
 
 router = APIRouter(
     prefix="/intervention-tasks",
@@ -21,7 +22,7 @@ router = APIRouter(
 )
 
 
-@router.get("")
+@router.get("", response_class=FastJSONResponse)
 def list_tasks(
     intervention_id: Optional[str] = Query(None, description="Filtrer par intervention"),
     machine_id: Optional[str] = Query(None, description="Filtrer par équipement (machine_id)"),
@@ -65,7 +66,7 @@ def list_tasks(
     # Import lazy pour éviter la circularité avec audits.repo
     from api.utils.audit import get_audit_rules
     result["audit"] = get_audit_rules("task")
-    return result
+    return FastJSONResponse(result)
 
 
 @router.get("/progress")
@@ -103,6 +104,20 @@ def create_task(request: Request, data: InterventionTaskIn):
     return single(repo.create(data, created_by=user_id or None))
 
 
+@router.patch("")
+def bulk_patch_tasks(request: Request, data: InterventionTaskBulkPatch):
+    """
+    Met à jour un lot de tâches en une transaction (tout ou rien) : statut,
+    affectation, échéance (date ou décalage en jours), ordre.
+
+    Mêmes règles que `PATCH /intervention-tasks/{id}` ; une entrée d'audit
+    par champ modifié, avec le `reason_code` du lot.
+    """
+    user_id = str(getattr(request.state, "user_id", None) or "")
+    repo = InterventionTaskRepository()
+    return single(repo.bulk_patch(data, closed_by=user_id or None))
+
+
 @router.patch("/{task_id}")
 def patch_task(request: Request, task_id: str, data: InterventionTaskPatch):
     """
@@ -1,5 +1,5 @@
 from datetime import date, datetime
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, ConfigDict, Field, model_validator
@@ -67,6 +67,44 @@ class InterventionTaskPatch(BaseModel):
         return self
 
 
+class InterventionTaskBulkItem(BaseModel):
+    id: UUID
+    label: Optional[str] = None
+    status: Optional[str] = Field(
+        default=None,
+        pattern="^(todo|done|skipped)$",
+        description="Mêmes transitions que PATCH /intervention-tasks/{id}",
+    )
+    skip_reason: Optional[str] = None
+    assigned_to: Optional[UUID] = None
+    due_date: Optional[date] = None
+    due_date_shift_days: Optional[int] = Field(
+        default=None, ge=-366, le=366,
+        description="Décale l'échéance existante de N jours (sans effet si pas d'échéance)",
+    )
+    sort_order: Optional[int] = None
+
+    @model_validator(mode="after")
+    def validate_item(self) -> "InterventionTaskBulkItem":
+        if self.status == "skipped" and not (self.skip_reason or "").strip():
+            raise ValueError("skip_reason obligatoire si status=skipped")
+        if self.due_date is not None and self.due_date_shift_days is not None:
+            raise ValueError("due_date et due_date_shift_days sont exclusifs")
+        return self
+
+
+class InterventionTaskBulkPatch(BaseModel):
+    items: List[InterventionTaskBulkItem] = Field(..., min_length=1, max_length=500)
+    reason_code: str = Field(..., description="Code raison obligatoire pour l'audit. Voir GET /audit/reasons.")
+    reason_text: Optional[str] = Field(default=None, description="Texte libre obligatoire si reason_code=OTHER.")
+
+    @model_validator(mode="after")
+    def validate_unique_ids(self) -> "InterventionTaskBulkPatch":
+        if len({item.id for item in self.items}) != len(self.items):
+            raise ValueError("Une même tâche ne peut apparaître qu'une fois dans le lot")
+        return self
+
+
 class InterventionTaskDelete(BaseModel):
     reason_code: str = Field(..., description="Code raison obligatoire pour l'audit. Voir GET /audit/reasons.")
     reason_text: Optional[str] = Field(default=None, description="Texte libre obligatoire si reason_code=OTHER.")
@@ -937,6 +937,110 @@ class InterventionRepository:
                 exc_info=True,
             )
 
+    def close_many(
+        self,
+        intervention_ids: List[str],
+        reason_code: str,
+        reason_text: str | None = None,
+        changed_by: str | None = None,
+    ) -> Dict[str, Any]:
+        """
+        Ferme un lot d'interventions et applique la cascade (demandes, occurrences
+        préventives) en une transaction : tout ou rien.
+
+        Les interventions déjà fermées sont ignorées. Intervention inconnue ou
+        tâche non-optionnelle en attente : rien n'est fermé.
+        """
+        ids = list(dict.fromkeys(str(i) for i in intervention_ids))
+        conn = self._get_connection()
+        try:
+            with conn.cursor() as cur:
+                # Verrou dans l'ordre des id : pas d'interblocage entre lots concurrents
+                cur.execute(
+                    """
+                    SELECT id::text, code, status_actual
+                    FROM intervention
+                    WHERE id = ANY(%s::uuid[])
+                    ORDER BY id
+                    FOR UPDATE
+                    """,
+                    (ids,),
+                )
+                found = {row[0]: row for row in cur.fetchall()}
+                missing = [i for i in ids if i not in found]
+                if missing:
+                    raise NotFoundError(
+                        f"Intervention(s) non trouvée(s) : {', '.join(missing[:10])}")
+
+                to_close = [i for i in ids if found[i][2] != CLOSED_STATUS_CODE]
+                cur.execute(
+                    """
+                    SELECT i.code, COUNT(*)
+                    FROM intervention_task it
+                    JOIN intervention i ON i.id = it.intervention_id
+                    WHERE it.intervention_id = ANY(%s::uuid[])
+                      AND it.status IN ('todo', 'in_progress')
+                      AND it.optional = FALSE
+                    GROUP BY i.code
+                    ORDER BY i.code
+                    """,
+                    (to_close,),
+                )
+                blocking = cur.fetchall()
+                if blocking:
+                    detail = ", ".join(f"{code} ({count})" for code, count in blocking[:10])
+                    raise ValidationError(
+                        f"Impossible de fermer : tâche(s) non-optionnelle(s) en attente sur {detail}."
+                    )
+
+                requests_closed = occurrences_completed = 0
+                if to_close:
+                    cur.execute(
+                        """
+                        WITH closed AS (
+                            UPDATE intervention i
+                            SET status_actual = %s
+                            FROM unnest(%s::uuid[], %s::text[]) AS prev(id, status_actual)
+                            WHERE i.id = prev.id
+                            RETURNING i.id, prev.status_actual AS status_from
+                        )
+                        SELECT public.fn_audit_log_decision(
+                            'intervention', id, 'status_actual_changed',
+                            jsonb_build_object('status_actual', status_from),
+                            jsonb_build_object('status_actual', %s::text),
+                            %s, %s, %s::uuid, false)
+                        FROM closed
+                        """,
+                        (
+                            CLOSED_STATUS_CODE,
+                            to_close,
+                            [found[i][2] for i in to_close],
+                            CLOSED_STATUS_CODE,
+                            reason_code,
+                            reason_text,
+                            changed_by,
+                        ),
+                    )
+                    from api.intervention_requests.repo import InterventionRequestRepository
+                    requests_closed, occurrences_completed = \
+                        InterventionRequestRepository().cascade_interventions_closed(cur, to_close)
+            conn.commit()
+        except (NotFoundError, ValidationError):
+            conn.rollback()
+            raise
+        except Exception as e:
+            conn.rollback()
+            raise_db_error(e, "fermeture groupée des interventions")
+        finally:
+            release_connection(conn)
+
+        return {
+            "closed": [{"id": i, "code": found[i][1]} for i in to_close],
+            "already_closed": [{"id": i, "code": found[i][1]} for i in ids if i not in to_close],
+            "requests_closed": requests_closed,
+            "occurrences_completed": occurrences_completed,
+        }
+
     def force_close_request(self, intervention_id: str) -> Dict[str, Any]:
         """Force la clôture de la demande liée à une intervention fermée.
 
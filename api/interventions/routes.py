@@ -2,7 +2,8 @@ from fastapi import APIRouter, Request, Query, Depends
 from typing import List, Dict, Any, Optional
 from api.interventions.repo import InterventionRepository
 from api.intervention_actions.repo import InterventionActionRepository
-from api.interventions.schemas import InterventionOut, InterventionIn, InterventionCreate, InterventionStats
+from api.interventions.schemas import (
+    InterventionOut, InterventionIn, InterventionCreate, InterventionStats, InterventionBatchClose)
 from api.interventions.validators import InterventionValidator
 from api.intervention_actions.schemas import InterventionActionOut
 from api.intervention_status_log.schemas import InterventionStatusLogOut
@@ -11,7 +12,8 @@ from api.equipements.schemas import EquipementDetail
 from api.constants import INTERVENTION_TYPES
 from api.errors.exceptions import ValidationError
 from api.auth.permissions import require_authenticated
-from api.utils.response import single, referentiel, paginated
+from api.utils.response import FastJSONResponse, single, referentiel, paginated
+from api.utils.http_cache import http_cache
 
 # Résolution des références circulaires : InterventionOut.request référence
 # InterventionRequestListItem (intervention_requests.schemas → interventions.schemas)
@@ -49,7 +51,7 @@ def list_intervention_types():
     return referentiel(INTERVENTION_TYPES)
 
 
-@router.get("")
+@router.get("", response_class=FastJSONResponse, dependencies=[Depends(http_cache)])
 def list_interventions(
     request: Request,
     skip: int = Query(0, ge=0),
@@ -100,7 +102,7 @@ def list_interventions(
         printed=printed,
         tech_id=tech_id,
     )
-    return paginated(items, total=total, offset=skip, limit=limit, audit_entity="intervention")
+    return FastJSONResponse(paginated(items, total=total, offset=skip, limit=limit, audit_entity="intervention"))
 
 
 @router.get("/{intervention_id}")
@@ -132,6 +134,24 @@ def create_intervention(data: InterventionCreate, request: Request):
     return single(repo.add(payload))
 
 
+@router.post("/close")
+def close_interventions(data: InterventionBatchClose, request: Request):
+    """
+    Ferme un lot d'interventions en une transaction (tout ou rien), avec la
+    cascade de fermeture : demandes liées clôturées, occurrences préventives terminées.
+
+    **Audit obligatoire** : le champ `reason_code` est requis (voir `GET /audit/reasons`).
+    `reason_text` est obligatoire si `reason_code=OTHER`.
+    """
+    repo = InterventionRepository()
+    return single(repo.close_many(
+        [str(i) for i in data.intervention_ids],
+        reason_code=data.reason_code,
+        reason_text=data.reason_text,
+        changed_by=getattr(request.state, "user_id", None),
+    ))
+
+
 @router.put("/{intervention_id}")
 def update_intervention(intervention_id: str, data: InterventionIn, request: Request):
     """
@@ -65,6 +65,19 @@ class InterventionIn(BaseModel):
         from_attributes = True
 
 
+class InterventionBatchClose(BaseModel):
+    """Fermeture groupée d'interventions (fin de poste)"""
+    intervention_ids: List[UUID] = Field(..., min_length=1, max_length=200)
+    reason_code: str = Field(
+        ...,
+        description="Code raison obligatoire pour l'audit (ex: CLIENT_REQUEST, OTHER). Voir GET /audit/reasons.",
+    )
+    reason_text: Optional[str] = Field(
+        default=None,
+        description="Texte libre obligatoire si reason_code=OTHER.",
+    )
+
+
 class InterventionStats(BaseModel):
     """Stats calculées pour une intervention"""
     action_count: int = 0
@@ -1,4 +1,254 @@
+"""
+Limiteur de débit slowapi à compteurs partagés entre workers.
+
+Stockage par défaut `tunnel-postgres://` : fenêtre glissante approchée
+(compteur de la fenêtre fixe courante + part au prorata de la précédente)
+dont les compteurs vivent dans la table UNLOGGED `rate_limit_counter`
+(migration 015). Chaque process décide localement sur le dernier état
+partagé connu + ses propres hits ; un thread pousse les hits en attente et
+relit les compteurs des autres workers toutes les RATE_LIMIT_FLUSH_INTERVAL
+secondes en une seule requête (upsert ensembliste). Le dépassement possible
+entre workers est borné aux hits d'un intervalle de flush.
+
+Base injoignable : le comptage reste local au process (protection dégradée,
+jamais de requête refusée à tort). `RATE_LIMIT_STORAGE_URI=memory://`
+restaure le stockage mémoire de slowapi (un seul worker).
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import psycopg2
+from limits.storage import MovingWindowSupport, Storage
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
-limiter = Limiter(key_func=get_remote_address)
+from api.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_FLUSH_SQL = """
+    WITH ins AS (
+        INSERT INTO rate_limit_counter (key, bucket, hits, expires_at)
+        SELECT k, b, h, to_timestamp(e)
+        FROM unnest(%s::text[], %s::bigint[], %s::int[], %s::float8[]) AS p(k, b, h, e)
+        ON CONFLICT (key, bucket) DO UPDATE
+            SET hits = rate_limit_counter.hits + EXCLUDED.hits
+        RETURNING key, bucket, hits
+    )
+    SELECT key, bucket, hits FROM ins
+    UNION ALL
+    SELECT c.key, c.bucket, c.hits
+    FROM rate_limit_counter c
+    JOIN unnest(%s::text[], %s::bigint[]) AS a(key, bucket)
+      ON c.key = a.key AND c.bucket IN (a.bucket - 1, a.bucket)
+    WHERE NOT EXISTS (SELECT 1 FROM ins WHERE ins.key = c.key AND ins.bucket = c.bucket)
+"""
+
+_PURGE_INTERVAL = 60.0
+_RETRY_DELAY = 5.0
+
+Bucket = Tuple[str, int]
+
+
+class PostgresSlidingWindowStorage(Storage, MovingWindowSupport):
+    """Stockage `limits` : fenêtre glissante, compteurs partagés via PostgreSQL."""
+
+    STORAGE_SCHEME = ["tunnel-postgres"]
+
+    def __init__(self, uri: Optional[str] = None, flush_interval: float = 0.5, **options):
+        super().__init__(uri, **options)
+        self._flush_interval = float(flush_interval)
+        self._state_lock = threading.Lock()
+        self._pending: Dict[Bucket, int] = {}    # hits locaux non encore poussés
+        self._inflight: Dict[Bucket, int] = {}   # hits en cours de flush
+        self._shared: Dict[Bucket, int] = {}     # dernier état partagé relu
+        self._expiry: Dict[str, int] = {}        # clé -> durée de fenêtre (s)
+        self._healthy = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_exceptions(self):
+        return psycopg2.Error
+
+    # ── Comptage local ───────────────────────────────────────────────────────
+
+    def _count(self, bucket: Bucket) -> int:
+        return (self._shared.get(bucket, 0) + self._inflight.get(bucket, 0)
+                + self._pending.get(bucket, 0))
+
+    def _weighted(self, key: str, expiry: int, now: float) -> Tuple[int, float]:
+        """(fenêtre courante, nombre de hits pondéré sur la dernière `expiry` secondes)."""
+        current = int(now // expiry)
+        elapsed = (now % expiry) / expiry
+        previous = self._count((key, current - 1))
+        return current, previous * (1 - elapsed) + self._count((key, current))
+
+    def acquire_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+        self._ensure_flusher()
+        with self._state_lock:
+            current, hits = self._weighted(key, expiry, time.time())
+            if hits + amount > limit:
+                return False
+            self._pending[(key, current)] = self._pending.get((key, current), 0) + amount
+            self._expiry[key] = expiry
+            return True
+
+    def get_moving_window(self, key: str, limit: int, expiry: int) -> Tuple[int, int]:
+        with self._state_lock:
+            current, hits = self._weighted(key, expiry, time.time())
+        return current * expiry, int(hits)
+
+    # Stratégies à fenêtre fixe : même compteurs, fenêtre courante seule
+
+    def incr(self, key: str, expiry: int, elastic_expiry: bool = False, amount: int = 1) -> int:
+        self._ensure_flusher()
+        with self._state_lock:
+            current = int(time.time() // expiry)
+            self._pending[(key, current)] = self._pending.get((key, current), 0) + amount
+            self._expiry[key] = expiry
+            return self._count((key, current))
+
+    def get(self, key: str) -> int:
+        expiry = self._expiry.get(key)
+        if not expiry:
+            return 0
+        with self._state_lock:
+            return self._count((key, int(time.time() // expiry)))
+
+    def get_expiry(self, key: str) -> int:
+        expiry = self._expiry.get(key, 1)
+        return (int(time.time() // expiry) + 1) * expiry
+
+    def check(self) -> bool:
+        return self._healthy
+
+    def reset(self) -> Optional[int]:
+        with self._state_lock:
+            self._pending.clear()
+            self._inflight.clear()
+            self._shared.clear()
+            self._expiry.clear()
+        return self._execute("DELETE FROM rate_limit_counter")
+
+    def clear(self, key: str) -> None:
+        with self._state_lock:
+            for store in (self._pending, self._inflight, self._shared):
+                for bucket in [b for b in store if b[0] == key]:
+                    del store[bucket]
+        self._execute("DELETE FROM rate_limit_counter WHERE key = %s", (key,))
+
+    # ── Synchronisation avec PostgreSQL ──────────────────────────────────────
+
+    def _execute(self, sql: str, params: tuple = ()) -> Optional[int]:
+        # Import lazy : le limiteur est importé par les routes avant l'init du pool
+        from api.db import open_dedicated_connection
+        conn = None
+        try:
+            conn = open_dedicated_connection()
+            with conn.cursor() as cur:
+                cur.execute(sql, params)
+                return cur.rowcount
+        except Exception as e:
+            logger.warning("Limiteur : %s impossible — %s", sql.split()[0], e)
+            return None
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _ensure_flusher(self) -> None:
+        if self._thread is not None:
+            return
+        with self._state_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._flush_loop, name="rate-limit-flush", daemon=True)
+                self._thread.start()
+
+    def _take_batch(self, now: float) -> Tuple[Dict[Bucket, int], list]:
+        """Déplace les hits en attente vers _inflight et liste les fenêtres à relire."""
+        with self._state_lock:
+            self._inflight, self._pending = self._pending, {}
+            recent = {
+                key for key, bucket in (*self._inflight, *self._shared)
+                if key in self._expiry and bucket >= int(now // self._expiry[key]) - 1
+            }
+            active = []
+            for key, expiry in list(self._expiry.items()):
+                if key in recent:
+                    active.append((key, int(now // expiry)))
+                else:
+                    # Clé inactive depuis deux fenêtres : oubliée
+                    del self._expiry[key]
+            return dict(self._inflight), active
+
+    def _flush(self, conn) -> None:
+        now = time.time()
+        batch, active = self._take_batch(now)
+        if not batch and not active:
+            return
+        keys = [k for k, _ in batch]
+        buckets = [b for _, b in batch]
+        expires = [(b + 2) * self._expiry.get(k, 60) for k, b in batch]
+        try:
+            with conn.cursor() as cur:
+                cur.execute(_FLUSH_SQL, (
+                    keys, buckets, list(batch.values()), expires,
+                    [k for k, _ in active], [b for _, b in active],
+                ))
+                rows = cur.fetchall()
+        except Exception:
+            # Hits remis en attente (fenêtres encore utiles uniquement)
+            with self._state_lock:
+                for bucket, hits in self._inflight.items():
+                    expiry = self._expiry.get(bucket[0])
+                    if expiry and bucket[1] >= int(now // expiry) - 1:
+                        self._pending[bucket] = self._pending.get(bucket, 0) + hits
+                self._inflight = {}
+            raise
+        with self._state_lock:
+            self._shared = {(key, bucket): hits for key, bucket, hits in rows}
+            self._inflight = {}
+
+    def _flush_loop(self) -> None:
+        # Import lazy : le limiteur est importé par les routes avant l'init du pool
+        from api.db import open_dedicated_connection
+        conn = None
+        last_purge = 0.0
+        while True:
+            # Base injoignable : nouvel essai espacé plutôt qu'à chaque intervalle
+            time.sleep(self._flush_interval if self._healthy else _RETRY_DELAY)
+            try:
+                if conn is None or conn.closed:
+                    conn = open_dedicated_connection()
+                self._flush(conn)
+                if time.monotonic() - last_purge >= _PURGE_INTERVAL:
+                    last_purge = time.monotonic()
+                    with conn.cursor() as cur:
+                        cur.execute("DELETE FROM rate_limit_counter WHERE expires_at < now()")
+                if not self._healthy:
+                    logger.info("Limiteur : compteurs partagés de nouveau synchronisés")
+                self._healthy = True
+            except Exception as e:
+                if self._healthy:
+                    logger.warning("Limiteur : base injoignable, comptage local au process — %s", e)
+                self._healthy = False
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+                    conn = None
+
+
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=settings.RATE_LIMIT_STORAGE_URI,
+    storage_options={"flush_interval": settings.RATE_LIMIT_FLUSH_INTERVAL}
+    if settings.RATE_LIMIT_STORAGE_URI.startswith("tunnel-postgres") else {},
+    strategy="moving-window",
+)
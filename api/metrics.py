@@ -0,0 +1,193 @@
+"""
+Instrumentation base de données par requête + exposition Prometheus.
+
+Chaque connexion du pool est une `InstrumentedConnection` : ses curseurs
+chronomètrent chaque execute et l'imputent à la requête HTTP en cours
+(ContextVar positionnée par `MetricsMiddleware`). `get_connection` y ajoute
+le temps d'attente du pool. Au-delà de SLOW_QUERY_MS, la requête est aussi
+confiée à api/slow_queries.py (empreinte + plan).
+
+Par requête :
+    - en-tête `Server-Timing` (db, pool, app) lisible dans l'onglet réseau ;
+    - histogrammes par gabarit de route (`/interventions/{intervention_id}`)
+      exposés au format texte Prometheus sur GET /metrics.
+
+Limite : le travail lancé via `loop.run_in_executor` ne copie pas le contexte
+et n'est donc pas imputé ; les routes sync et `run_in_threadpool` le sont.
+"""
+
+import threading
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import psycopg2.extensions
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.routing import Match
+
+from api import slow_queries
+from api.utils.http_cache import get_compression_stats
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class RequestDbStats:
+    """Compteurs DB de la requête HTTP en cours."""
+
+    __slots__ = ("path", "statements", "db_time", "pool_wait")
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.statements = 0
+        self.db_time = 0.0
+        self.pool_wait = 0.0
+
+
+_current: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db_stats", default=None)
+
+
+def record_pool_wait(seconds: float) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.pool_wait += seconds
+
+
+def _record_statement(cursor, query, params, seconds: float) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_time += seconds
+    if seconds >= slow_queries.THRESHOLD_S:
+        slow_queries.record(cursor, query, params, seconds, stats.path if stats else None)
+
+
+@lru_cache(maxsize=None)
+def _timed_cursor(base: type) -> type:
+    """Sous-classe chronométrée du curseur demandé (défaut, RealDictCursor…)."""
+
+    class TimedCursor(base):
+        def execute(self, query, vars=None):
+            started = time.perf_counter()
+            try:
+                return super().execute(query, vars)
+            finally:
+                _record_statement(self, query, vars, time.perf_counter() - started)
+
+        def executemany(self, query, vars_list):
+            started = time.perf_counter()
+            try:
+                return super().executemany(query, vars_list)
+            finally:
+                _record_statement(self, query, None, time.perf_counter() - started)
+
+    TimedCursor.__name__ = f"Timed{base.__name__}"
+    return TimedCursor
+
+
+class InstrumentedConnection(psycopg2.extensions.connection):
+    """Connexion dont les curseurs imputent leurs requêtes à la requête HTTP courante."""
+
+    def cursor(self, *args, **kwargs):
+        base = kwargs.pop("cursor_factory", None) or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs["cursor_factory"] = _timed_cursor(base)
+        return super().cursor(*args, **kwargs)
+
+
+class Histogram:
+    """Histogramme Prometheus cumulatif, étiqueté par (method, route)."""
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        # (method, route) -> [compteurs par bucket..., +Inf], somme
+        self._series: Dict[Tuple[str, str], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, labels: Tuple[str, str], value: float) -> None:
+        counts, total = self._series.setdefault(
+            labels, ([0] * (len(self.buckets) + 1), [0.0]))
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        counts[-1] += 1
+        total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for (method, route), (counts, total) in sorted(self._series.items()):
+            labels = f'method="{method}",route="{_escape(route)}"'
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound:g}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {counts[-1]}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total[0]:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {counts[-1]}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+_lock = threading.Lock()
+_histograms = {
+    "duration": Histogram("gmao_http_request_duration_seconds",
+                          "Durée totale de la requête HTTP", DURATION_BUCKETS),
+    "statements": Histogram("gmao_db_statements_per_request",
+                            "Requêtes SQL exécutées par requête HTTP", STATEMENT_BUCKETS),
+    "db_time": Histogram("gmao_db_time_seconds",
+                         "Temps passé dans PostgreSQL par requête HTTP", DURATION_BUCKETS),
+    "pool_wait": Histogram("gmao_db_pool_wait_seconds",
+                           "Attente d'une connexion du pool par requête HTTP", DURATION_BUCKETS),
+}
+
+
+def _route_template(request: Request) -> str:
+    """Gabarit de la route (`/interventions/{intervention_id}`), cardinalité bornée."""
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(route, "path", UNMATCHED_ROUTE)
+    return UNMATCHED_ROUTE
+
+
+def render_metrics() -> str:
+    """Histogrammes par route + compteurs de compression, format texte Prometheus."""
+    with _lock:
+        lines = [line for h in _histograms.values() for line in h.render()]
+    for key, value in get_compression_stats().items():
+        name = f"gmao_compression_{key}_total"
+        lines += [f"# TYPE {name} counter", f"{name} {value}"]
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware(BaseHTTPMiddleware):
+    """Mesure durée, requêtes SQL et attente pool ; ajoute l'en-tête Server-Timing."""
+
+    async def dispatch(self, request: Request, call_next):
+        stats = RequestDbStats(request.url.path)
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            _current.reset(token)
+        elapsed = time.perf_counter() - started
+
+        labels = (request.method, _route_template(request))
+        with _lock:
+            _histograms["duration"].observe(labels, elapsed)
+            _histograms["statements"].observe(labels, stats.statements)
+            _histograms["db_time"].observe(labels, stats.db_time)
+            _histograms["pool_wait"].observe(labels, stats.pool_wait)
+
+        response.headers["Server-Timing"] = (
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.statements} req. SQL", '
+            f"pool;dur={stats.pool_wait * 1000:.1f}, "
+            f"app;dur={elapsed * 1000:.1f}"
+        )
+        return response
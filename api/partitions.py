@@ -0,0 +1,35 @@
+"""
+Maintenance des tables journal partitionnées par mois (migration 017).
+
+`audit_log`, `auth_attempt` et `security_log` sont découpées en partitions
+mensuelles ; la politique de chaque table (rétention en mois, archivage ou
+suppression, partitions créées à l'avance) vit dans `partition_policy`.
+
+`run_partition_maintenance()` appelle la fonction SQL idempotente
+`fn_partition_maintenance()` : création des partitions à venir, puis
+détachement des partitions hors rétention (déplacées dans le schéma
+`archive` ou supprimées). Exécutée au démarrage de l'API et par
+scripts/partition_maintenance.py.
+"""
+
+import logging
+from typing import Any, Dict, List
+
+from api.db import db_connection
+
+logger = logging.getLogger(__name__)
+
+
+def run_partition_maintenance() -> List[Dict[str, Any]]:
+    """Applique partition_policy ; retourne les partitions créées / archivées / supprimées."""
+    with db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT parent_table, partition_name, action FROM fn_partition_maintenance()")
+            actions = [
+                {"table": table, "partition": partition, "action": action}
+                for table, partition, action in cur.fetchall()
+            ]
+        conn.commit()
+    for a in actions:
+        logger.info("Partitions : %s %s (%s)", a["partition"], a["action"], a["table"])
+    return actions
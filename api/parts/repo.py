@@ -34,7 +34,7 @@ class PartRepository:
 
                 if search:
                     where_clauses.append(
-                        "(p.internal_ref ILIKE %s OR pmr.manufacturer_ref ILIKE %s OR pmr.label ILIKE %s)"
+                        "(p.internal_ref ILIKE %s OR p.preferred_manufacturer_ref ILIKE %s OR p.preferred_label ILIKE %s)"
                     )
                     pattern = f"%{search}%"
                     params.extend([pattern, pattern, pattern])
@@ -46,17 +46,9 @@ class PartRepository:
                     SELECT
                         p.id, p.internal_ref, p.family_code, p.sub_family_code,
                         p.unit, p.location, p.qty_in_stock,
-                        pmr.manufacturer_name  AS preferred_manufacturer_name,
-                        pmr.manufacturer_ref   AS preferred_manufacturer_ref,
-                        pmr.label              AS preferred_label
+                        p.preferred_manufacturer_name, p.preferred_manufacturer_ref,
+                        p.preferred_label
                     FROM part p
-                    LEFT JOIN LATERAL (
-                        SELECT manufacturer_name, manufacturer_ref, label
-                        FROM part_manufacturer_ref
-                        WHERE part_id = p.id
-                        ORDER BY is_preferred DESC, created_at ASC
-                        LIMIT 1
-                    ) pmr ON true
                     {where_sql}
                     ORDER BY p.internal_ref ASC
                     LIMIT %s OFFSET %s
@@ -96,7 +88,7 @@ class PartRepository:
 
                 if search:
                     where_clauses.append(
-                        "(p.internal_ref ILIKE %s OR pmr.manufacturer_ref ILIKE %s OR pmr.label ILIKE %s)"
+                        "(p.internal_ref ILIKE %s OR p.preferred_manufacturer_ref ILIKE %s OR p.preferred_label ILIKE %s)"
                     )
                     pattern = f"%{search}%"
                     params.extend([pattern, pattern, pattern])
@@ -107,13 +99,6 @@ class PartRepository:
                     f"""
                     SELECT COUNT(*)
                     FROM part p
-                    LEFT JOIN LATERAL (
-                        SELECT manufacturer_name, manufacturer_ref, label
-                        FROM part_manufacturer_ref
-                        WHERE part_id = p.id
-                        ORDER BY is_preferred DESC, created_at ASC
-                        LIMIT 1
-                    ) pmr ON true
                     {where_sql}
                     """,
                     params,
@@ -5,7 +5,8 @@ from uuid import uuid4
 
 
 from api.db import get_connection, release_connection
-from api.errors.exceptions import NotFoundError, ValidationError, raise_db_error
+from api.errors.exceptions import ConflictError, NotFoundError, ValidationError, raise_db_error
+from api.preventive_plans.repo import plan_catalogue
 
 logger = logging.getLogger(__name__)
 
@@ -195,17 +196,23 @@ class PreventiveOccurrenceRepository:
         Chaque machine est traitée dans sa propre transaction.
         """
         today = date.today()
-        plans = self._load_active_plans()
+        try:
+            plans = plan_catalogue.active()
+        except Exception as e:
+            raise_db_error(e, "chargement des plans préventifs actifs")
 
         generated = 0
         skipped_conflicts = 0
         skipped_active = 0
         errors: List[str] = []
+        # Plusieurs plans peuvent viser la même classe : machines chargées une fois
+        machines_by_class: Dict[str, Optional[List[Dict[str, Any]]]] = {}
 
         for plan in plans:
-            plan_id = str(plan["id"])
-            machines = self._load_machines_for_class(
-                str(plan["equipement_class_id"]))
+            class_id = str(plan["equipement_class_id"])
+            if class_id not in machines_by_class:
+                machines_by_class[class_id] = self._load_machines_for_class(class_id)
+            machines = machines_by_class[class_id]
             if machines is None:
                 errors.append(
                     f"Plan {plan['label']}: erreur chargement machines")
@@ -236,27 +243,6 @@ class PreventiveOccurrenceRepository:
             "errors": errors,
         }
 
-    def _load_active_plans(self) -> List[Dict[str, Any]]:
-        """Charge tous les plans actifs depuis la DB"""
-        conn = self._get_connection()
-        try:
-            cur = conn.cursor()
-            cur.execute(
-                """
-                SELECT id, label, trigger_type, periodicity_days,
-                       hours_threshold, auto_accept, equipement_class_id
-                FROM preventive_plan
-                WHERE active = true
-                """
-            )
-            rows = cur.fetchall()
-            cols = [d[0] for d in cur.description]
-            return [dict(zip(cols, row)) for row in rows]
-        except Exception as e:
-            raise_db_error(e, "chargement des plans préventifs actifs")
-        finally:
-            release_connection(conn)
-
     def _load_machines_for_class(self, class_id: str) -> Optional[List[Dict[str, Any]]]:
         """Charge les machines d'une classe d'équipement"""
         conn = self._get_connection()
@@ -395,34 +381,27 @@ class PreventiveOccurrenceRepository:
                 (di_id, occurrence_id),
             )
 
-            # Générer les intervention_task liées (une par step de gamme du plan)
-            cur.execute(
-                """
-                SELECT id FROM preventive_plan_gamme_step
-                WHERE plan_id = %s
-                ORDER BY sort_order ASC
-                """,
-                (plan_id,),
-            )
-            steps = cur.fetchall()
-            for step_row in steps:
-                step_id = str(step_row[0])
+            # Générer les intervention_task liées (une par step de gamme du plan),
+            # en une requête à partir des steps du catalogue
+            step_ids = [str(step["id"]) for step in plan["steps"]]
+            if step_ids:
                 cur.execute(
                     """
                     INSERT INTO intervention_task
                         (gamme_step_id, occurrence_id, intervention_id, label, origin, status,
                          optional, sort_order)
                     SELECT
-                        %s, %s, NULL, pgs.label, 'plan', 'todo', pgs.optional, pgs.sort_order
+                        pgs.id, %s, NULL, pgs.label, 'plan', 'todo', pgs.optional, pgs.sort_order
                     FROM preventive_plan_gamme_step pgs
-                    WHERE pgs.id = %s
+                    WHERE pgs.id = ANY(%s::uuid[])
+                    ORDER BY pgs.sort_order ASC
                     ON CONFLICT (gamme_step_id, occurrence_id) DO NOTHING
                     """,
-                    (step_id, occurrence_id, step_id),
+                    (occurrence_id, step_ids),
                 )
             logger.info(
                 "Tâches préventives : %s tâche(s) générée(s) pour l'occurrence %s",
-                len(steps), occurrence_id,
+                len(step_ids), occurrence_id,
             )
 
             conn.commit()
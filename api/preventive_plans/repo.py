@@ -1,14 +1,39 @@
 import logging
-from typing import Any, Dict, List
+import threading
+from typing import Any, Dict, List, Optional
 from uuid import uuid4
 
 
-from api.db import get_connection, release_connection
-from api.errors.exceptions import NotFoundError, raise_db_error
+from api.db import db_connection, get_connection, release_connection
+from api.errors.exceptions import ConflictError, NotFoundError, ValidationError, raise_db_error
 from api.preventive_plans.schemas import GammeStepIn, PreventivePlanIn, PreventivePlanUpdate
 
 logger = logging.getLogger(__name__)
 
+# Plans avec leurs steps agrégés (triés par sort_order) : une seule requête,
+# quel que soit le nombre de plans. `{where}` : filtre optionnel sur pp.
+_PLAN_SELECT_SQL = """
+    SELECT
+        pp.id, pp.code, pp.label, pp.equipement_class_id,
+        ec.label AS equipement_class_label,
+        pp.trigger_type, pp.periodicity_days, pp.hours_threshold,
+        pp.auto_accept, pp.active, pp.created_at, pp.updated_at,
+        COALESCE(st.steps, '[]'::json) AS steps
+    FROM preventive_plan pp
+    LEFT JOIN equipement_class ec ON ec.id = pp.equipement_class_id
+    LEFT JOIN LATERAL (
+        SELECT json_agg(
+                   json_build_object(
+                       'id', s.id, 'plan_id', s.plan_id, 'label', s.label,
+                       'sort_order', s.sort_order, 'optional', s.optional)
+                   ORDER BY s.sort_order ASC) AS steps
+        FROM preventive_plan_gamme_step s
+        WHERE s.plan_id = pp.id
+    ) st ON true
+    {where}
+    ORDER BY pp.code ASC
+"""
+
 
 class PreventivePlanRepository:
     """Requêtes pour le domaine plans de maintenance préventive"""
@@ -110,25 +135,10 @@ class PreventivePlanRepository:
         try:
             cur = conn.cursor()
             where = "WHERE pp.active = true" if active_only else ""
-            cur.execute(
-                f"""
-                SELECT
-                    pp.id, pp.code, pp.label, pp.equipement_class_id,
-                    ec.label AS equipement_class_label,
-                    pp.trigger_type, pp.periodicity_days, pp.hours_threshold,
-                    pp.auto_accept, pp.active, pp.created_at, pp.updated_at
-                FROM preventive_plan pp
-                LEFT JOIN equipement_class ec ON ec.id = pp.equipement_class_id
-                {where}
-                ORDER BY pp.code ASC
-                """
-            )
+            cur.execute(_PLAN_SELECT_SQL.replace("{where}", where))
             rows = cur.fetchall()
             cols = [d[0] for d in cur.description]
-            plans = [dict(zip(cols, row)) for row in rows]
-            for plan in plans:
-                plan["steps"] = self._fetch_steps(cur, str(plan["id"]))
-            return plans
+            return [dict(zip(cols, row)) for row in rows]
         except Exception as e:
             raise_db_error(e, "liste des plans préventifs")
         finally:
@@ -139,26 +149,14 @@ class PreventivePlanRepository:
         conn = self._get_connection()
         try:
             cur = conn.cursor()
-            cur.execute(
-                """
-                SELECT
-                    pp.id, pp.code, pp.label, pp.equipement_class_id,
-                    ec.label AS equipement_class_label,
-                    pp.trigger_type, pp.periodicity_days, pp.hours_threshold,
-                    pp.auto_accept, pp.active, pp.created_at, pp.updated_at
-                FROM preventive_plan pp
-                LEFT JOIN equipement_class ec ON ec.id = pp.equipement_class_id
-                WHERE pp.id = %s
-                """,
-                (plan_id,),
-            )
+            cur.execute(_PLAN_SELECT_SQL.replace("{where}", "WHERE pp.id = %s"), (plan_id,))
             row = cur.fetchone()
             if not row:
                 raise NotFoundError(f"Plan préventif {plan_id} non trouvé")
             cols = [d[0] for d in cur.description]
-            plan = dict(zip(cols, row))
-            plan["steps"] = self._fetch_steps(cur, plan_id)
-            return plan
+            return dict(zip(cols, row))
+        except NotFoundError:
+            raise
         except Exception as e:
             raise_db_error(e, "récupération du plan préventif")
         finally:
@@ -309,3 +307,46 @@ class PreventivePlanRepository:
             raise_db_error(e, "remplacement des steps")
         finally:
             release_connection(conn)
+
+
+class PreventivePlanCatalogue:
+    """
+    Catalogue des plans (avec steps) en mémoire, pour la génération des occurrences.
+
+    Estampillé par `preventive_plan_catalogue_version` (migration 021),
+    incrémentée par trigger à chaque écriture sur les plans ou leurs steps :
+    une lecture par clé suffit pour savoir si la copie est à jour, quel que
+    soit le worker à l'origine de la modification. Les plans retournés sont
+    partagés : à ne pas modifier.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._plans: List[Dict[str, Any]] = []
+
+    def get(self) -> List[Dict[str, Any]]:
+        """Tous les plans, actifs ou non, rechargés si la version a changé."""
+        with db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT version FROM preventive_plan_catalogue_version")
+                # Version lue avant les plans : une écriture concurrente provoque
+                # au pire un rechargement de plus, jamais une copie périmée conservée
+                version = cur.fetchone()[0]
+                if version == self._version:
+                    return self._plans
+                with self._lock:
+                    if version != self._version:
+                        cur.execute(_PLAN_SELECT_SQL.replace("{where}", ""))
+                        cols = [d[0] for d in cur.description]
+                        self._plans = [dict(zip(cols, row)) for row in cur.fetchall()]
+                        self._version = version
+                        logger.debug("Catalogue des plans préventifs chargé (version %s, %d plans)",
+                                     version, len(self._plans))
+                    return self._plans
+
+    def active(self) -> List[Dict[str, Any]]:
+        return [plan for plan in self.get() if plan["active"]]
+
+
+plan_catalogue = PreventivePlanCatalogue()
@@ -15,7 +15,7 @@ from api.purchase_requests.schemas import (
 )
 from api.errors.exceptions import ValidationError
 from api.constants import DERIVED_STATUS_CONFIG
-from api.utils.response import single, referentiel
+from api.utils.response import FastJSONResponse, single, referentiel
 
 logger = logging.getLogger(__name__)
 
@@ -96,7 +96,7 @@ def get_purchase_requests_stats(
     ))
 
 
-@router.get("/list")
+@router.get("/list", response_class=FastJSONResponse)
 def list_purchase_requests_optimized(
     skip: int = Query(0, ge=0, description="Nombre d'éléments à sauter"),
     limit: int = Query(100, ge=1, le=1000,
@@ -126,7 +126,7 @@ def list_purchase_requests_optimized(
         urgency=urgency,
         exclude_statuses=exclude_list
     )
-    return single(data, audit_entity="purchase_request")
+    return FastJSONResponse(single(data, audit_entity="purchase_request"))
 
 
 @router.get("/detail/{request_id}")
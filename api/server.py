@@ -0,0 +1,63 @@
+"""
+Point d'entrée de production : plusieurs workers uvicorn sous un superviseur.
+
+    python -m api.server [--workers N] [--host H] [--port P]
+
+Le superviseur (ce processus) :
+- exécute une seule fois les travaux de démarrage globaux (catalogue
+  d'endpoints, maintenance des partitions) avec un pool minimal, refermé
+  avant le lancement des workers ;
+- transmet aux workers API_WORKERS et RUN_STARTUP_TASKS=false par
+  l'environnement ; chaque worker dimensionne son pool sur sa part de
+  DB_CONNECTION_BUDGET (voir _pool_bounds dans api/app.py) ;
+- relance les workers morts (supervision uvicorn).
+
+En développement, `uvicorn api.app:app --reload` reste l'usage (un processus,
+travaux de démarrage dans le lifespan).
+"""
+import argparse
+import logging
+import os
+
+import uvicorn
+
+from api.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serveur API multi-workers")
+    parser.add_argument("--workers", type=int, default=settings.API_WORKERS)
+    parser.add_argument("--host", default=settings.API_HOST)
+    parser.add_argument("--port", type=int, default=settings.API_PORT)
+    args = parser.parse_args()
+    workers = max(args.workers, 1)
+
+    # Les workers (processus lancés par spawn) relisent les settings depuis l'environnement
+    os.environ["API_WORKERS"] = str(workers)
+    settings.API_WORKERS = workers
+
+    # Import après la mise à jour des settings : app.py configure le logging
+    from api.app import _pool_bounds, run_startup_tasks
+    from api.db import close_pool, init_pool
+
+    _pool_bounds()  # budget insuffisant : échec ici plutôt que dans chaque worker
+    init_pool(settings.DATABASE_URL, 1, 2)
+    try:
+        run_startup_tasks()
+    finally:
+        close_pool()
+    os.environ["RUN_STARTUP_TASKS"] = "false"
+
+    logger.info("Démarrage de %d workers sur %s:%d", workers, args.host, args.port)
+    uvicorn.run(
+        "api.app:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,40 @@ class Settings(BaseSettings):
     )
     DB_POOL_MIN: int = int(os.getenv("DB_POOL_MIN", "2"))
     DB_POOL_MAX: int = int(os.getenv("DB_POOL_MAX", "10"))
+    # Budget global de connexions au primaire, réparti entre les workers
+    # (0 = désactivé : chaque worker prend DB_POOL_MIN / DB_POOL_MAX, voir worker_pool_bounds)
+    DB_CONNECTION_BUDGET: int = int(os.getenv("DB_CONNECTION_BUDGET", "0"))
+
+    # Serveur de production (python -m api.server, voir api/server.py)
+    API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
+    API_PORT: int = int(os.getenv("API_PORT", "8000"))
+    API_WORKERS: int = int(os.getenv("API_WORKERS", "1"))
+    # false = catalogue d'endpoints et partitions déjà traités par le superviseur
+    RUN_STARTUP_TASKS: bool = os.getenv("RUN_STARTUP_TASKS", "true").lower() == "true"
+
+    # Réplica en lecture seule (vide = désactivé, voir get_read_connection dans api/db.py)
+    DATABASE_REPLICA_URL: str = os.getenv("DATABASE_REPLICA_URL", "")
+    DB_REPLICA_POOL_MIN: int = int(os.getenv("DB_REPLICA_POOL_MIN", "1"))
+    DB_REPLICA_POOL_MAX: int = int(os.getenv("DB_REPLICA_POOL_MAX", "10"))
+    DB_REPLICA_MAX_LAG_SECONDS: float = float(
+        os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "10"))
+    DB_REPLICA_LAG_CHECK_INTERVAL: float = float(
+        os.getenv("DB_REPLICA_LAG_CHECK_INTERVAL", "5"))
+
+    # Compression des réponses JSON (routes opt-in, voir api/utils/http_cache.py)
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+    # Limiteur de débit : compteurs partagés entre workers (voir api/limiter.py)
+    RATE_LIMIT_STORAGE_URI: str = os.getenv(
+        "RATE_LIMIT_STORAGE_URI", "tunnel-postgres://")
+    RATE_LIMIT_FLUSH_INTERVAL: float = float(
+        os.getenv("RATE_LIMIT_FLUSH_INTERVAL", "0.5"))
+
+    # Capture des requêtes lentes + EXPLAIN (0 = désactivé, voir api/slow_queries.py)
+    SLOW_QUERY_MS: int = int(os.getenv("SLOW_QUERY_MS", "0"))
+    SLOW_QUERY_STORE_SIZE: int = int(os.getenv("SLOW_QUERY_STORE_SIZE", "200"))
+    SLOW_QUERY_EXPLAIN_INTERVAL: int = int(
+        os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "300"))
 
     # JWT souverain
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "")
@@ -37,7 +71,7 @@ class Settings(BaseSettings):
 
     # API
     API_TITLE: str = "GMAO API"
-    API_VERSION: str = "4.0.4"
+    API_VERSION: str = "4.15.0"
     API_ENV: str = os.getenv("API_ENV", "development")
     AUTH_DISABLED: bool = os.getenv("AUTH_DISABLED", "false").lower() == "true"
     FRONTEND_URL: str = os.getenv("FRONTEND_URL", "http://localhost:5173")
@@ -64,6 +98,10 @@ class Settings(BaseSettings):
         "EXPORT_QR_BASE_URL",
         "http://localhost:5173/interventions"
     )
+    EXPORT_QR_EQUIPEMENT_BASE_URL: str = os.getenv(
+        "EXPORT_QR_EQUIPEMENT_BASE_URL",
+        "http://localhost:5173/equipements"
+    )
     EXPORT_QR_LOGO_PATH: str = os.getenv(
         "EXPORT_QR_LOGO_PATH",
         "config/templates/logo.png"
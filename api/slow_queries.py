@@ -0,0 +1,219 @@
+"""
+Capture des requêtes SQL lentes avec leur plan d'exécution (opt-in).
+
+Activée par SLOW_QUERY_MS > 0 : toute requête exécutée par un curseur du pool
+(voir TimedCursor dans api/metrics.py) qui dépasse le seuil est enregistrée
+dans une mémoire bornée (SLOW_QUERY_STORE_SIZE entrées, process local) :
+
+    - empreinte SQL (littéraux et paramètres remplacés par `?`) ;
+    - forme des paramètres (types, longueurs, tailles de tableaux), jamais les valeurs ;
+    - plan `EXPLAIN (ANALYZE, BUFFERS)` capturé juste après, hors requête HTTP,
+      réduit à sa structure (voir _scrub_plan) : les conditions et expressions
+      du plan (Index Cond, Filter, Output…) contiennent les valeurs liées et
+      sont retirées ; une erreur n'est stockée que par son type.
+
+Le plan est rejoué par un thread dédié sur sa propre connexion, dans une
+transaction READ ONLY annulée ensuite : une écriture (INSERT/UPDATE/DELETE,
+nextval…) échoue et retombe sur un EXPLAIN simple, sans exécution.
+Une même empreinte n'est ré-expliquée qu'après SLOW_QUERY_EXPLAIN_INTERVAL secondes.
+
+Lecture : GET /admin/slow-queries.
+"""
+
+import hashlib
+import logging
+import math
+import queue
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import psycopg2
+from psycopg2.errors import ReadOnlySqlTransaction
+
+from api.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Seuil en secondes, comparé à chaque execute (inf = désactivé)
+THRESHOLD_S = settings.SLOW_QUERY_MS / 1000 if settings.SLOW_QUERY_MS > 0 else math.inf
+
+_EXPLAIN_QUEUE_SIZE = 50
+
+_COMMENT = re.compile(r"--[^\n]*")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PARAM = re.compile(r"%\(\w+\)s|%s")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+# Champs texte conservés dans le plan : noms de nœuds et d'objets, jamais d'expressions
+_PLAN_TEXT_KEYS = frozenset({
+    "Node Type", "Parent Relationship", "Relation Name", "Schema", "Alias",
+    "Index Name", "Join Type", "Strategy", "Partial Mode", "Scan Direction",
+    "Operation", "Command", "Sort Method", "Sort Space Type", "Subplan Name",
+    "CTE Name", "Function Name",
+})
+
+_lock = threading.Lock()
+_store: deque = deque(maxlen=settings.SLOW_QUERY_STORE_SIZE)
+_last_explained: Dict[str, float] = {}
+_explain_queue: "queue.Queue[tuple]" = queue.Queue(maxsize=_EXPLAIN_QUEUE_SIZE)
+_worker: Optional[threading.Thread] = None
+
+
+def fingerprint(sql: str) -> tuple[str, str]:
+    """Retourne (empreinte courte, SQL normalisé) : deux appels de même forme → même empreinte."""
+    normalized = _COMMENT.sub(" ", sql)
+    normalized = _STRING.sub("?", normalized)
+    normalized = _PARAM.sub("?", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _IN_LIST.sub("(?...)", normalized)
+    normalized = _SPACES.sub(" ", normalized).strip()
+    return hashlib.md5(normalized.encode()).hexdigest()[:16], normalized
+
+
+def _shape(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, (list, tuple)):
+        inner = "|".join(sorted({_shape(v) for v in value})) or "vide"
+        return f"array[{len(value)}]<{inner}>"
+    if isinstance(value, str):
+        return f"str({len(value)})"
+    return type(value).__name__
+
+
+def param_shapes(params: Any) -> Any:
+    """Forme des paramètres liés (types et tailles), sans leurs valeurs."""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: _shape(value) for key, value in params.items()}
+    return [_shape(value) for value in params]
+
+
+def record(cursor, query: Any, params: Any, seconds: float, route: Optional[str]) -> None:
+    """Enregistre une requête lente ; appelé par TimedCursor au-delà de THRESHOLD_S."""
+    try:
+        sql = query if isinstance(query, str) else (
+            query.decode() if isinstance(query, bytes) else query.as_string(cursor))
+    except Exception:
+        return
+    if sql.lstrip()[:7].upper() == "EXPLAIN":
+        return
+
+    fp, normalized = fingerprint(sql)
+    entry = {
+        "fingerprint": fp,
+        "sql": normalized,
+        "param_shapes": param_shapes(params),
+        "duration_ms": round(seconds * 1000, 1),
+        "route": route,
+        "captured_at": datetime.now(timezone.utc),
+        "plan": None,
+        "analyzed": False,
+        "plan_error": None,
+    }
+    now = time.monotonic()
+    with _lock:
+        explain = now - _last_explained.get(fp, -math.inf) >= settings.SLOW_QUERY_EXPLAIN_INTERVAL
+        if explain:
+            _last_explained[fp] = now
+        _store.appendleft(entry)
+    if not explain:
+        entry["plan_error"] = "plan déjà capturé récemment pour cette empreinte"
+        return
+
+    try:
+        # Valeurs réelles nécessaires au plan : transitoires, jamais stockées
+        literal_sql = cursor.mogrify(query, params).decode()
+        _ensure_worker()
+        _explain_queue.put_nowait((entry, literal_sql))
+    except queue.Full:
+        entry["plan_error"] = "file EXPLAIN saturée"
+    except Exception as e:
+        # Le message peut citer le SQL avec ses valeurs : type seul
+        entry["plan_error"] = type(e).__name__
+
+
+def get_entries() -> List[Dict[str, Any]]:
+    """Entrées capturées, la plus récente en premier."""
+    with _lock:
+        return [dict(e) for e in _store]
+
+
+def clear() -> int:
+    with _lock:
+        count = len(_store)
+        _store.clear()
+        _last_explained.clear()
+    return count
+
+
+def _ensure_worker() -> None:
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    with _lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_explain_loop, name="slow-query-explain", daemon=True)
+            _worker.start()
+
+
+def _scrub_plan(node: Any) -> Any:
+    """Structure du plan : nombres, booléens et champs de _PLAN_TEXT_KEYS, récursivement."""
+    if isinstance(node, list):
+        return [_scrub_plan(item) for item in node if isinstance(item, (dict, list))]
+    scrubbed = {}
+    for key, value in node.items():
+        if isinstance(value, (dict, list)):
+            scrubbed[key] = _scrub_plan(value)
+        elif isinstance(value, (bool, int, float)) or (key in _PLAN_TEXT_KEYS and isinstance(value, str)):
+            scrubbed[key] = value
+    return scrubbed
+
+
+def _explain(conn, sql: str) -> tuple[Any, bool]:
+    """EXPLAIN ANALYZE en lecture seule, EXPLAIN simple si la requête écrit."""
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SET TRANSACTION READ ONLY")
+            cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")
+            return cur.fetchone()[0], True
+    except ReadOnlySqlTransaction:
+        conn.rollback()
+        with conn.cursor() as cur:
+            cur.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+            return cur.fetchone()[0], False
+    finally:
+        conn.rollback()
+
+
+def _explain_loop() -> None:
+    # Import lazy pour éviter la circularité avec db au niveau module
+    from api.db import open_dedicated_connection
+
+    conn = None
+    while True:
+        entry, sql = _explain_queue.get()
+        try:
+            if conn is None or conn.closed:
+                conn = open_dedicated_connection()
+                conn.autocommit = False
+            plan, analyzed = _explain(conn, sql)
+            with _lock:
+                entry["plan"], entry["analyzed"] = _scrub_plan(plan), analyzed
+        except Exception as e:
+            # Message d'erreur PostgreSQL non repris : il peut citer les valeurs
+            logger.warning("EXPLAIN requête lente %s impossible : %s", entry["fingerprint"], type(e).__name__)
+            with _lock:
+                entry["plan_error"] = type(e).__name__
+            if conn is not None and not conn.closed:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    conn.close()
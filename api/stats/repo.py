@@ -2,7 +2,7 @@ from typing import Dict, Any, List, Tuple
 from datetime import date, timedelta
 from calendar import monthrange
 
-from api.db import get_connection, release_connection
+from api.db import get_read_connection, release_connection
 from api.errors.exceptions import DatabaseError
 from api.stats.schemas import (
     ServiceStatusResponse,
@@ -55,7 +55,8 @@ class StatsRepository:
     """Requêtes pour les statistiques du service"""
 
     def _get_connection(self):
-        return get_connection()
+        # Lectures seules : réplica si disponible et à jour
+        return get_read_connection()
 
     def get_service_status(self, start_date: date, end_date: date) -> ServiceStatusResponse:
         """Calcule les métriques de santé du service (8 calculs en SQL)"""
@@ -7,8 +7,9 @@ from api.errors.exceptions import ValidationError
 from api.limiter import limiter
 
 from api.auth.permissions import require_authenticated
+from api.utils.http_cache import http_cache
 
-router = APIRouter(prefix="/stats", tags=["stats"], dependencies=[Depends(require_authenticated)])
+router = APIRouter(prefix="/stats", tags=["stats"], dependencies=[Depends(require_authenticated), Depends(http_cache)])
 
 
 @router.get("/service-status", response_model=ServiceStatusResponse)
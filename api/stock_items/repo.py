@@ -36,28 +36,18 @@ class StockItemRepository:
 
         if search:
             search_pattern = f"%{search}%"
+            # supplier_refs_search : références fournisseurs et fabricants
+            # maintenues par trigger (migration 022), sans sous-requête par ligne
             where_clauses.append(
                 f"({a}name ILIKE %s OR {a}ref ILIKE %s"
-                f" OR EXISTS ("
-                f"SELECT 1 FROM stock_item_supplier sis2"
-                f" WHERE sis2.stock_item_id = {a}id AND sis2.supplier_ref ILIKE %s"
-                f")"
-                f" OR EXISTS ("
-                f"SELECT 1 FROM stock_item_supplier sis3"
-                f" JOIN manufacturer_item mi ON mi.id = sis3.manufacturer_item_id"
-                f" WHERE sis3.stock_item_id = {a}id AND mi.manufacturer_ref ILIKE %s"
-                f"))"
+                f" OR {a}supplier_refs_search ILIKE %s)"
             )
-            params.extend([search_pattern, search_pattern, search_pattern, search_pattern])
+            params.extend([search_pattern, search_pattern, search_pattern])
 
         if has_supplier is True:
-            where_clauses.append(
-                f"EXISTS (SELECT 1 FROM stock_item_supplier sis WHERE sis.stock_item_id = {a}id)"
-            )
+            where_clauses.append(f"{a}supplier_refs_count > 0")
         elif has_supplier is False:
-            where_clauses.append(
-                f"NOT EXISTS (SELECT 1 FROM stock_item_supplier sis WHERE sis.stock_item_id = {a}id)"
-            )
+            where_clauses.append(f"{a}supplier_refs_count = 0")
 
         where_sql = ("WHERE " + " AND ".join(where_clauses)
                      ) if where_clauses else ""
@@ -116,17 +106,15 @@ class StockItemRepository:
                     si.id, si.name, si.ref, si.family_code, si.sub_family_code,
                     si.spec, si.dimension, si.quantity, si.unit, si.location,
                     si.supplier_refs_count,
-                    pref.id              AS pref_id,
-                    pref.supplier_id     AS pref_supplier_id,
-                    s.name               AS pref_supplier_name,
-                    pref.supplier_ref    AS pref_supplier_ref,
-                    pref.unit_price      AS pref_unit_price,
-                    pref.delivery_time_days AS pref_delivery_time_days,
+                    si.preferred_supplier_ref_id    AS pref_id,
+                    si.preferred_supplier_id        AS pref_supplier_id,
+                    s.name                          AS pref_supplier_name,
+                    si.preferred_supplier_ref       AS pref_supplier_ref,
+                    si.preferred_unit_price         AS pref_unit_price,
+                    si.preferred_delivery_time_days AS pref_delivery_time_days,
                     mref.manufacturer_refs
                 FROM stock_item si
-                LEFT JOIN stock_item_supplier pref
-                    ON pref.stock_item_id = si.id AND pref.is_preferred = true
-                LEFT JOIN supplier s ON s.id = pref.supplier_id
+                LEFT JOIN supplier s ON s.id = si.preferred_supplier_id
                 LEFT JOIN LATERAL (
                     SELECT COALESCE(
                         json_agg(
@@ -195,17 +183,9 @@ class StockItemRepository:
                 search_pattern = f"%{search}%"
                 where_sql = (
                     "WHERE (si.name ILIKE %s OR si.ref ILIKE %s"
-                    " OR EXISTS ("
-                    "SELECT 1 FROM stock_item_supplier sis2"
-                    " WHERE sis2.stock_item_id = si.id AND sis2.supplier_ref ILIKE %s"
-                    ")"
-                    " OR EXISTS ("
-                    "SELECT 1 FROM stock_item_supplier sis3"
-                    " JOIN manufacturer_item mi ON mi.id = sis3.manufacturer_item_id"
-                    " WHERE sis3.stock_item_id = si.id AND mi.manufacturer_ref ILIKE %s"
-                    "))"
+                    " OR si.supplier_refs_search ILIKE %s)"
                 )
-                params.extend([search_pattern, search_pattern, search_pattern, search_pattern])
+                params.extend([search_pattern, search_pattern, search_pattern])
 
             query = f"""
                 SELECT
@@ -466,9 +446,13 @@ class StockItemRepository:
             release_connection(conn)
 
     def update_quantity(self, item_id: str, quantity: int) -> Dict[str, Any]:
-        """Met à jour uniquement la quantité d'un article"""
-        self.get_by_id(item_id)
+        """
+        Met à jour uniquement la quantité d'un article (inventaire).
 
+        L'écart est journalisé comme ajustement par le trigger
+        trg_stock_item_quantity_ledger ; pour des entrées/sorties relatives,
+        utiliser POST /stock-movements.
+        """
         conn = self._get_connection()
         try:
             cur = conn.cursor()
@@ -480,11 +464,16 @@ class StockItemRepository:
                 """,
                 (quantity, item_id)
             )
+            if cur.rowcount == 0:
+                conn.rollback()
+                raise NotFoundError(f"Article {item_id} non trouvé")
             conn.commit()
-            return self.get_by_id(item_id)
+        except NotFoundError:
+            raise
         except Exception as e:
             conn.rollback()
             raise DatabaseError(
                 f"Erreur lors de la mise à jour de la quantité: {str(e)}") from e
         finally:
             release_connection(conn)
+        return self.get_by_id(item_id)
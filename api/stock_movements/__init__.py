@@ -0,0 +1 @@
+"""Module journal des mouvements de stock"""
@@ -0,0 +1,170 @@
+"""Repository du journal des mouvements de stock"""
+import logging
+from typing import Any, Dict, List, Optional
+
+from api.db import get_connection, release_connection
+from api.errors.exceptions import NotFoundError, ValidationError, raise_db_error
+
+logger = logging.getLogger(__name__)
+
+# Lot de mouvements en une requête :
+#   - verrouille les articles concernés dans l'ordre des id (pas d'interblocage entre lots) ;
+#   - applique les deltas agrégés par article (quantity += …, reserved_quantity += …) ;
+#   - journalise chaque mouvement dans l'ordre reçu.
+# `tunnel.stock_ledger` évite que le trigger de saisie directe journalise une seconde fois.
+_APPLY_SQL = """
+    WITH req AS (
+        SELECT *
+        FROM unnest(%s::uuid[], %s::text[], %s::int[], %s::text[], %s::text[]) WITH ORDINALITY
+            AS m(stock_item_id, movement_type, delta, reference, note, ord)
+    ),
+    totals AS (
+        SELECT stock_item_id,
+               COALESCE(sum(delta) FILTER (WHERE movement_type <> 'reservation'), 0) AS on_hand_delta,
+               COALESCE(sum(delta) FILTER (WHERE movement_type = 'reservation'), 0) AS reserved_delta
+        FROM req
+        GROUP BY stock_item_id
+    ),
+    flag AS (
+        SELECT set_config('tunnel.stock_ledger', 'on', true)
+    ),
+    locked AS (
+        SELECT si.id
+        FROM stock_item si, flag
+        WHERE si.id IN (SELECT stock_item_id FROM totals)
+        ORDER BY si.id
+        FOR UPDATE OF si
+    ),
+    updated AS (
+        UPDATE stock_item si
+        SET quantity = COALESCE(si.quantity, 0) + t.on_hand_delta,
+            reserved_quantity = si.reserved_quantity + t.reserved_delta
+        FROM totals t
+        JOIN locked l ON l.id = t.stock_item_id
+        WHERE si.id = t.stock_item_id
+        RETURNING si.id, si.ref, si.quantity, si.reserved_quantity
+    ),
+    logged AS (
+        INSERT INTO stock_movement
+            (stock_item_id, movement_type, delta, reference, note, created_by)
+        SELECT r.stock_item_id, r.movement_type, r.delta, r.reference, r.note, %s::uuid
+        FROM req r
+        JOIN updated u ON u.id = r.stock_item_id
+        ORDER BY r.ord
+    )
+    SELECT t.stock_item_id, u.ref, u.quantity, u.reserved_quantity
+    FROM totals t
+    LEFT JOIN updated u ON u.id = t.stock_item_id
+    ORDER BY u.ref NULLS FIRST
+"""
+
+
+class StockMovementRepository:
+    """Requêtes pour le journal stock_movement"""
+
+    def _get_connection(self):
+        return get_connection()
+
+    def apply(self, movements: List[Dict[str, Any]], created_by: Optional[str],
+              allow_negative: bool = False) -> Dict[str, Any]:
+        """
+        Applique un lot de mouvements de façon atomique, en une requête.
+
+        Les deltas sont relatifs : deux lots concurrents sur un même article
+        s'additionnent (pas de dernier-écrivain-gagnant). Rien n'est appliqué si
+        un article est inconnu, si une quantité réservée devient négative, ou
+        (sauf allow_negative) si le stock devient négatif ou si la réservation
+        dépasse le stock (disponible = quantity - reserved_quantity < 0).
+        """
+        conn = self._get_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    _APPLY_SQL,
+                    (
+                        [str(m["stock_item_id"]) for m in movements],
+                        [m["movement_type"] for m in movements],
+                        [m["delta"] for m in movements],
+                        [m.get("reference") for m in movements],
+                        [m.get("note") for m in movements],
+                        created_by or None,
+                    ),
+                )
+                rows = cur.fetchall()
+
+            missing = [str(r[0]) for r in rows if r[2] is None]
+            if missing:
+                conn.rollback()
+                raise NotFoundError(f"Article(s) non trouvé(s) : {', '.join(missing[:10])}")
+            negative = [r[1] for r in rows if r[3] < 0 or (r[2] < 0 and not allow_negative)]
+            if negative:
+                conn.rollback()
+                raise ValidationError(
+                    f"Stock insuffisant après mouvements : {', '.join(negative[:10])}")
+            over_reserved = [r[1] for r in rows if r[3] > r[2] and not allow_negative]
+            if over_reserved:
+                conn.rollback()
+                raise ValidationError(
+                    f"Réservation supérieure au stock disponible : {', '.join(over_reserved[:10])}")
+            conn.commit()
+
+            return {
+                "applied": len(movements),
+                "items": [
+                    {
+                        "stock_item_id": item_id,
+                        "ref": ref,
+                        "quantity": quantity,
+                        "reserved_quantity": reserved,
+                        "available_quantity": quantity - reserved,
+                    }
+                    for item_id, ref, quantity, reserved in rows
+                ],
+            }
+        except (NotFoundError, ValidationError):
+            raise
+        except Exception as e:
+            conn.rollback()
+            raise_db_error(e, "mouvements de stock")
+        finally:
+            release_connection(conn)
+
+    def get_list(self, stock_item_id: Optional[str] = None,
+                 movement_type: Optional[str] = None,
+                 limit: int = 100, offset: int = 0) -> tuple[List[Dict[str, Any]], int]:
+        """Mouvements les plus récents d'abord, avec le total pour la pagination"""
+        conn = self._get_connection()
+        try:
+            wheres, params = [], []
+            if stock_item_id:
+                wheres.append("sm.stock_item_id = %s::uuid")
+                params.append(stock_item_id)
+            if movement_type:
+                wheres.append("sm.movement_type = %s")
+                params.append(movement_type)
+            where_sql = ("WHERE " + " AND ".join(wheres)) if wheres else ""
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"""
+                    SELECT sm.id, sm.stock_item_id, si.ref AS stock_item_ref,
+                           sm.movement_type, sm.delta, sm.reference, sm.note,
+                           sm.created_by, sm.created_at,
+                           COUNT(*) OVER () AS total
+                    FROM stock_movement sm
+                    JOIN stock_item si ON si.id = sm.stock_item_id
+                    {where_sql}
+                    ORDER BY sm.created_at DESC, sm.id
+                    LIMIT %s OFFSET %s
+                    """,
+                    params + [limit, offset],
+                )
+                cols = [d[0] for d in cur.description]
+                rows = [dict(zip(cols, r)) for r in cur.fetchall()]
+            total = rows[0].pop("total") if rows else 0
+            for row in rows[1:]:
+                row.pop("total")
+            return rows, total
+        except Exception as e:
+            raise_db_error(e, "journal des mouvements de stock")
+        finally:
+            release_connection(conn)
@@ -0,0 +1,41 @@
+"""Routes du journal des mouvements de stock"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Request
+
+from api.auth.permissions import require_authenticated
+from api.stock_movements.repo import StockMovementRepository
+from api.stock_movements.schemas import MovementType, StockMovementBatchIn
+from api.utils.response import paginated, single
+
+router = APIRouter(prefix="/stock-movements", tags=["stock-movements"],
+                   dependencies=[Depends(require_authenticated)])
+
+
+@router.get("")
+def list_stock_movements(
+    stock_item_id: Optional[str] = Query(None, description="Filtrer par article"),
+    movement_type: Optional[MovementType] = Query(None, description="Filtrer par type"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """Journal des mouvements, les plus récents d'abord"""
+    items, total = StockMovementRepository().get_list(
+        stock_item_id=stock_item_id, movement_type=movement_type, limit=limit, offset=skip)
+    return paginated(items, total=total, offset=skip, limit=limit)
+
+
+@router.post("", status_code=201)
+def apply_stock_movements(payload: StockMovementBatchIn, request: Request):
+    """
+    Applique un lot de mouvements (entrées, sorties, ajustements, réservations)
+    en une seule transaction : tout ou rien.
+
+    Exemple : réception complète d'une commande fournisseur en un appel.
+    Retourne les niveaux de stock résultants des articles touchés.
+    """
+    return single(StockMovementRepository().apply(
+        [m.model_dump() for m in payload.movements],
+        created_by=getattr(request.state, "user_id", None),
+        allow_negative=payload.allow_negative,
+    ))
@@ -0,0 +1,35 @@
+from typing import List, Literal, Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field, model_validator
+
+MovementType = Literal["receipt", "issue", "adjustment", "reservation"]
+
+
+class StockMovementIn(BaseModel):
+    """Un mouvement : delta signé sur le stock (ou sur la quantité réservée)"""
+    stock_item_id: UUID
+    movement_type: MovementType
+    delta: int = Field(..., description="Entrée > 0, sortie < 0 ; réservation < 0 = libération")
+    reference: Optional[str] = Field(
+        default=None, max_length=200, description="Ex. ligne de commande fournisseur, intervention")
+    note: Optional[str] = Field(default=None, max_length=500)
+
+    @model_validator(mode="after")
+    def check_sign(self):
+        if self.delta == 0:
+            raise ValueError("delta ne peut pas être nul")
+        if self.movement_type == "receipt" and self.delta < 0:
+            raise ValueError("Une entrée (receipt) doit avoir un delta positif")
+        if self.movement_type == "issue" and self.delta > 0:
+            raise ValueError("Une sortie (issue) doit avoir un delta négatif")
+        return self
+
+
+class StockMovementBatchIn(BaseModel):
+    """Lot de mouvements appliqué atomiquement (tout ou rien)"""
+    movements: List[StockMovementIn] = Field(..., min_length=1, max_length=2000)
+    allow_negative: bool = Field(
+        default=False,
+        description="Autorise un stock négatif ou une réservation supérieure au stock "
+                    "(disponible négatif) après application")
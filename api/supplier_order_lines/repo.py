@@ -77,39 +77,25 @@ class SupplierOrderLineRepository:
         return line_dict
 
     def _compute_consultation_fields(self, line_id: str, conn) -> tuple[bool, bool]:
-        """Calcule is_consultation et consultation_resolved pour une ligne."""
+        """
+        Lit is_consultation et consultation_resolved pour une ligne.
+
+        Les indicateurs sont maintenus par trigger dans supplier_order_line_flags
+        (migration 023) ; sans ligne de flags, la ligne n'a pas de DA liée.
+        """
         cur = conn.cursor()
         cur.execute(
             """
-            SELECT
-                EXISTS (
-                    SELECT 1 FROM supplier_order_line_purchase_request solpr2
-                    JOIN supplier_order_line sol2 ON sol2.id = solpr2.supplier_order_line_id
-                    WHERE solpr2.purchase_request_id IN (
-                        SELECT purchase_request_id FROM supplier_order_line_purchase_request
-                        WHERE supplier_order_line_id = %s
-                    )
-                    AND sol2.supplier_order_id != (
-                        SELECT supplier_order_id FROM supplier_order_line WHERE id = %s
-                    )
-                ) AS is_consultation,
-                EXISTS (
-                    SELECT 1 FROM supplier_order_line_purchase_request solpr3
-                    JOIN supplier_order_line sol3 ON sol3.id = solpr3.supplier_order_line_id
-                    WHERE solpr3.purchase_request_id IN (
-                        SELECT purchase_request_id FROM supplier_order_line_purchase_request
-                        WHERE supplier_order_line_id = %s
-                    )
-                    AND sol3.is_selected = true
-                ) AS has_selected_sister
+            SELECT is_consultation, consultation_resolved
+            FROM supplier_order_line_flags
+            WHERE supplier_order_line_id = %s
             """,
-            (line_id, line_id, line_id)
+            (line_id,)
         )
         row = cur.fetchone()
-        is_consultation = bool(row[0])
-        has_selected_sister = bool(row[1])
-        consultation_resolved = has_selected_sister if is_consultation else True
-        return is_consultation, consultation_resolved
+        if not row:
+            return False, True
+        return bool(row[0]), bool(row[1])
 
     def _get_linked_purchase_requests(self, line_id: str, conn) -> List[Dict[str, Any]]:
         """Récupère les demandes d'achat liées à une ligne"""
@@ -178,27 +164,11 @@ class SupplierOrderLineRepository:
                     sol.quantity_received, sol.is_selected,
                     si.name as stock_item_name, si.ref as stock_item_ref,
                     COALESCE(pmr_pref.label, pmr_pref.manufacturer_ref, pt.internal_ref) AS part_display_name,
-                    (SELECT COUNT(*) FROM supplier_order_line_purchase_request
-                     WHERE supplier_order_line_id = sol.id) as purchase_request_count,
-                    EXISTS (
-                        SELECT 1 FROM supplier_order_line_purchase_request solpr2
-                        JOIN supplier_order_line sol2 ON sol2.id = solpr2.supplier_order_line_id
-                        WHERE solpr2.purchase_request_id IN (
-                            SELECT purchase_request_id FROM supplier_order_line_purchase_request
-                            WHERE supplier_order_line_id = sol.id
-                        )
-                        AND sol2.supplier_order_id != sol.supplier_order_id
-                    ) AS is_consultation,
-                    EXISTS (
-                        SELECT 1 FROM supplier_order_line_purchase_request solpr3
-                        JOIN supplier_order_line sol3 ON sol3.id = solpr3.supplier_order_line_id
-                        WHERE solpr3.purchase_request_id IN (
-                            SELECT purchase_request_id FROM supplier_order_line_purchase_request
-                            WHERE supplier_order_line_id = sol.id
-                        )
-                        AND sol3.is_selected = true
-                    ) AS has_selected_sister
+                    COALESCE(f.purchase_request_count, 0) AS purchase_request_count,
+                    COALESCE(f.is_consultation, false) AS is_consultation,
+                    COALESCE(f.consultation_resolved, true) AS consultation_resolved
                 FROM supplier_order_line sol
+                LEFT JOIN supplier_order_line_flags f ON f.supplier_order_line_id = sol.id
                 LEFT JOIN stock_item si ON sol.stock_item_id = si.id
                 LEFT JOIN part pt ON sol.part_id = pt.id
                 LEFT JOIN LATERAL (
@@ -217,10 +187,6 @@ class SupplierOrderLineRepository:
             lines = [self._convert_decimals(dict(zip(cols, row))) for row in rows]
             for line in lines:
                 line['is_fully_received'] = (line.get('quantity_received') or 0) >= (line.get('quantity') or 1)
-                is_consultation = bool(line.pop('is_consultation', False))
-                has_selected_sister = bool(line.pop('has_selected_sister', False))
-                line['is_consultation'] = is_consultation
-                line['consultation_resolved'] = has_selected_sister if is_consultation else True
             return lines
         except Exception as e:
             raise_db_error(e, "opération")
@@ -270,7 +236,15 @@ class SupplierOrderLineRepository:
         try:
             cur = conn.cursor()
             cur.execute(
-                "SELECT * FROM supplier_order_line WHERE supplier_order_id = %s ORDER BY created_at ASC",
+                """
+                SELECT sol.*,
+                       COALESCE(f.is_consultation, false) AS is_consultation,
+                       COALESCE(f.consultation_resolved, true) AS consultation_resolved
+                FROM supplier_order_line sol
+                LEFT JOIN supplier_order_line_flags f ON f.supplier_order_line_id = sol.id
+                WHERE sol.supplier_order_id = %s
+                ORDER BY sol.created_at ASC
+                """,
                 (supplier_order_id,)
             )
             rows = cur.fetchall()
@@ -283,9 +257,6 @@ class SupplierOrderLineRepository:
                 line['purchase_requests'] = self._get_linked_purchase_requests(
                     str(line['id']), conn)
                 line['is_fully_received'] = (line.get('quantity_received') or 0) >= (line.get('quantity') or 1)
-                is_consultation, consultation_resolved = self._compute_consultation_fields(str(line['id']), conn)
-                line['is_consultation'] = is_consultation
-                line['consultation_resolved'] = consultation_resolved
                 results.append(line)
 
             return results
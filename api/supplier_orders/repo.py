@@ -106,35 +106,12 @@ class SupplierOrderRepository:
                     -- Champs V4 (part)
                     pt.internal_ref as part_internal_ref,
                     pt.unit as part_unit,
-                    COALESCE(
-                        (SELECT pmr.label FROM part_manufacturer_ref pmr
-                         WHERE pmr.part_id = pt.id AND pmr.is_preferred = true LIMIT 1),
-                        (SELECT pmr.label FROM part_manufacturer_ref pmr
-                         WHERE pmr.part_id = pt.id LIMIT 1)
-                    ) as part_display_name,
-                    COALESCE(
-                        (SELECT psr.supplier_ref FROM part_supplier_ref psr
-                         JOIN part_manufacturer_ref pmr ON pmr.id = psr.part_manufacturer_ref_id
-                         WHERE pmr.part_id = pt.id AND psr.supplier_id = so.supplier_id LIMIT 1),
-                        (SELECT psr.supplier_ref FROM part_supplier_ref psr
-                         JOIN part_manufacturer_ref pmr ON pmr.id = psr.part_manufacturer_ref_id
-                         WHERE pmr.part_id = pt.id AND psr.is_preferred = true LIMIT 1)
-                    ) as part_supplier_ref,
-                    COALESCE(
-                        (SELECT pmr.manufacturer_name FROM part_manufacturer_ref pmr
-                         WHERE pmr.part_id = pt.id AND pmr.is_preferred = true LIMIT 1),
-                        (SELECT pmr.manufacturer_name FROM part_manufacturer_ref pmr
-                         WHERE pmr.part_id = pt.id LIMIT 1)
-                    ) as part_manufacturer_name,
-                    COALESCE(
-                        (SELECT pmr.manufacturer_ref FROM part_manufacturer_ref pmr
-                         WHERE pmr.part_id = pt.id AND pmr.is_preferred = true LIMIT 1),
-                        (SELECT pmr.manufacturer_ref FROM part_manufacturer_ref pmr
-                         WHERE pmr.part_id = pt.id LIMIT 1)
-                    ) as part_manufacturer_ref,
-
-                    (SELECT COUNT(*) FROM supplier_order_line_purchase_request
-                     WHERE supplier_order_line_id = sol.id) as purchase_request_count
+                    pt.preferred_label as part_display_name,
+                    psr.supplier_ref as part_supplier_ref,
+                    pt.preferred_manufacturer_name as part_manufacturer_name,
+                    pt.preferred_manufacturer_ref as part_manufacturer_ref,
+
+                    COALESCE(f.purchase_request_count, 0) as purchase_request_count
                 FROM supplier_order_line sol
                 JOIN supplier_order so ON sol.supplier_order_id = so.id
                 -- Legacy
@@ -143,8 +120,18 @@ class SupplierOrderRepository:
                     ON sis.stock_item_id = sol.stock_item_id
                     AND sis.supplier_id = so.supplier_id
                 LEFT JOIN manufacturer_item mi ON sis.manufacturer_item_id = mi.id
-                -- V4
+                -- V4 : référence chez le fournisseur de la commande, à défaut la préférée
                 LEFT JOIN part pt ON pt.id = sol.part_id
+                LEFT JOIN LATERAL (
+                    SELECT psr.supplier_ref
+                    FROM part_supplier_ref psr
+                    JOIN part_manufacturer_ref pmr ON pmr.id = psr.part_manufacturer_ref_id
+                    WHERE pmr.part_id = pt.id
+                      AND (psr.supplier_id = so.supplier_id OR psr.is_preferred = true)
+                    ORDER BY (psr.supplier_id = so.supplier_id) DESC
+                    LIMIT 1
+                ) psr ON true
+                LEFT JOIN supplier_order_line_flags f ON f.supplier_order_line_id = sol.id
                 WHERE sol.supplier_order_id = %s
                 ORDER BY sol.created_at ASC
                 """,
@@ -488,32 +475,10 @@ class SupplierOrderRepository:
                     -- Champs V4 (part)
                     pt.internal_ref as part_internal_ref,
                     pt.unit as part_unit,
-                    COALESCE(
-                        (SELECT pmr.label FROM part_manufacturer_ref pmr
-                         WHERE pmr.part_id = pt.id AND pmr.is_preferred = true LIMIT 1),
-                        (SELECT pmr.label FROM part_manufacturer_ref pmr
-                         WHERE pmr.part_id = pt.id LIMIT 1)
-                    ) as part_display_name,
-                    COALESCE(
-                        (SELECT psr.supplier_ref FROM part_supplier_ref psr
-                         JOIN part_manufacturer_ref pmr ON pmr.id = psr.part_manufacturer_ref_id
-                         WHERE pmr.part_id = pt.id AND psr.supplier_id = so.supplier_id LIMIT 1),
-                        (SELECT psr.supplier_ref FROM part_supplier_ref psr
-                         JOIN part_manufacturer_ref pmr ON pmr.id = psr.part_manufacturer_ref_id
-                         WHERE pmr.part_id = pt.id AND psr.is_preferred = true LIMIT 1)
-                    ) as part_supplier_ref,
-                    COALESCE(
-                        (SELECT pmr.manufacturer_name FROM part_manufacturer_ref pmr
-                         WHERE pmr.part_id = pt.id AND pmr.is_preferred = true LIMIT 1),
-                        (SELECT pmr.manufacturer_name FROM part_manufacturer_ref pmr
-                         WHERE pmr.part_id = pt.id LIMIT 1)
-                    ) as part_manufacturer_name,
-                    COALESCE(
-                        (SELECT pmr.manufacturer_ref FROM part_manufacturer_ref pmr
-                         WHERE pmr.part_id = pt.id AND pmr.is_preferred = true LIMIT 1),
-                        (SELECT pmr.manufacturer_ref FROM part_manufacturer_ref pmr
-                         WHERE pmr.part_id = pt.id LIMIT 1)
-                    ) as part_manufacturer_ref
+                    pt.preferred_label as part_display_name,
+                    psr.supplier_ref as part_supplier_ref,
+                    pt.preferred_manufacturer_name as part_manufacturer_name,
+                    pt.preferred_manufacturer_ref as part_manufacturer_ref
                 FROM supplier_order_line sol
                 JOIN supplier_order so ON sol.supplier_order_id = so.id
                 -- Legacy
@@ -522,8 +487,17 @@ class SupplierOrderRepository:
                     ON sis.stock_item_id = sol.stock_item_id
                     AND sis.supplier_id = so.supplier_id
                 LEFT JOIN manufacturer_item mi ON sis.manufacturer_item_id = mi.id
-                -- V4
+                -- V4 : référence chez le fournisseur de la commande, à défaut la préférée
                 LEFT JOIN part pt ON pt.id = sol.part_id
+                LEFT JOIN LATERAL (
+                    SELECT psr.supplier_ref
+                    FROM part_supplier_ref psr
+                    JOIN part_manufacturer_ref pmr ON pmr.id = psr.part_manufacturer_ref_id
+                    WHERE pmr.part_id = pt.id
+                      AND (psr.supplier_id = so.supplier_id OR psr.is_preferred = true)
+                    ORDER BY (psr.supplier_id = so.supplier_id) DESC
+                    LIMIT 1
+                ) psr ON true
                 WHERE sol.supplier_order_id = %s
                 ORDER BY sol.created_at ASC
                 """,
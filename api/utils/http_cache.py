@@ -0,0 +1,126 @@
+"""Compression et validateurs HTTP (ETag / 304) pour les grosses réponses JSON.
+
+Opt-in par route via la dépendance `http_cache` :
+
+    @router.get("", dependencies=[Depends(http_cache)])
+
+Le middleware `CompressionETagMiddleware` ne traite que les GET 200 des routes
+marquées : ETag faible calculé sur le corps, 304 si le client l'a déjà,
+puis compression brotli (si le module `brotli` est installé) ou gzip au-delà
+de `COMPRESSION_MIN_SIZE` octets.
+"""
+import gzip
+import hashlib
+import logging
+import threading
+from typing import Dict
+
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
+
+from api.settings import settings
+
+try:
+    import brotli
+except ImportError:  # brotli optionnel : gzip seul
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, int] = {
+    "responses": 0,
+    "not_modified": 0,
+    "compressed": 0,
+    "bytes_in": 0,
+    "bytes_out": 0,
+}
+
+
+def http_cache(request: Request) -> None:
+    """Dépendance FastAPI : active ETag + compression pour la route."""
+    request.state.http_cache = True
+
+
+def get_compression_stats() -> Dict[str, int]:
+    """Compteurs depuis le démarrage ; bytes_saved = octets non transmis."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["bytes_saved"] = stats["bytes_in"] - stats["bytes_out"]
+    return stats
+
+
+def _record(body_size: int, sent_size: int, compressed: bool = False, not_modified: bool = False) -> None:
+    with _stats_lock:
+        _stats["responses"] += 1
+        _stats["bytes_in"] += body_size
+        _stats["bytes_out"] += sent_size
+        _stats["compressed"] += int(compressed)
+        _stats["not_modified"] += int(not_modified)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Comparaison faible (RFC 9110) : W/"x" et "x" sont équivalents."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def _pick_encoding(accept_encoding: str) -> str | None:
+    accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class CompressionETagMiddleware(BaseHTTPMiddleware):
+    """ETag faible + 304 + compression sur les routes marquées par `http_cache`."""
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        if (
+            request.method != "GET"
+            or response.status_code != 200
+            or not getattr(request.state, "http_cache", False)
+        ):
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        etag = f'W/"{hashlib.md5(body).hexdigest()}"'
+        headers = [
+            (k, v) for k, v in response.raw_headers
+            if k not in (b"content-length", b"etag", b"content-encoding")
+        ]
+
+        if _etag_matches(request.headers.get("if-none-match", ""), etag):
+            _record(len(body), 0, not_modified=True)
+            not_modified = Response(status_code=304)
+            not_modified.raw_headers = [(k, v) for k, v in headers if k != b"content-type"]
+            not_modified.headers["ETag"] = etag
+            return not_modified
+
+        content = body
+        encoding = None
+        if len(body) >= settings.COMPRESSION_MIN_SIZE:
+            encoding = _pick_encoding(request.headers.get("accept-encoding", ""))
+            if encoding == "br":
+                content = brotli.compress(body, quality=4)
+            elif encoding == "gzip":
+                content = gzip.compress(body, compresslevel=6)
+        _record(len(body), len(content), compressed=encoding is not None)
+
+        new_response = Response(content=content, status_code=200)
+        new_response.raw_headers = headers + [(b"content-length", str(len(content)).encode())]
+        new_response.headers["ETag"] = etag
+        new_response.headers["Cache-Control"] = "private, no-cache"
+        new_response.headers["Vary"] = "Accept-Encoding"
+        if encoding:
+            new_response.headers["Content-Encoding"] = encoding
+        return new_response
@@ -1,5 +1,5 @@
 """Schémas standards pour la pagination et les réponses unitaires"""
-from typing import Any, Generic, Optional, TypeVar, List
+from typing import Any, Dict, Generic, Optional, TypeVar, List
 from pydantic import BaseModel, Field
 from math import ceil
 
@@ -38,16 +38,16 @@ def create_pagination_meta(
     offset: int,
     limit: int,
     count: int
-) -> PaginationMeta:
-    """Crée les métadonnées de pagination"""
+) -> Dict[str, int]:
+    """Crée les métadonnées de pagination (dict au format PaginationMeta, sans instancier le modèle)"""
     page = (offset // limit) + 1 if limit > 0 else 1
     total_pages = ceil(total / limit) if limit > 0 else 1
 
-    return PaginationMeta(
-        total=total,
-        page=page,
-        page_size=limit,
-        total_pages=total_pages,
-        offset=offset,
-        count=count
-    )
+    return {
+        "total": total,
+        "page": page,
+        "page_size": limit,
+        "total_pages": total_pages,
+        "offset": offset,
+        "count": count,
+    }
@@ -4,10 +4,37 @@ Trois formats standards :
 - single()     → { data, audit? }          GET /{id}, POST, PUT, PATCH
 - paginated()  → { items, pagination, facets?, audit? }  GET / (liste paginée)
 - referentiel() → liste plate              GET /statuses, /types, etc.
+
+Listes chaudes : `return FastJSONResponse(paginated(...))` sérialise directement
+avec orjson, sans revalidation Pydantic ni jsonable_encoder (données déjà
+façonnées par le repo).
 """
+from decimal import Decimal
 from typing import Any, Dict, List, Optional
 
-from api.utils.pagination import PaginationMeta, create_pagination_meta
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from api.utils.pagination import create_pagination_meta
+
+
+def _orjson_default(obj: Any) -> Any:
+    """Types non natifs pour orjson, convertis comme jsonable_encoder."""
+    if isinstance(obj, Decimal):
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type non sérialisable : {type(obj).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """Réponse JSON orjson pour les listes volumineuses (opt-in par route)."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
 
 
 def single(data: Any, audit_entity: Optional[str] = None) -> Dict[str, Any]:
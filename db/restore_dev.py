@@ -1,7 +1,18 @@
 """
 Restauration de la base dev à partir du backup prod.
 Usage: python db/restore_dev.py
+       python db/restore_dev.py --copy backup_20261019_080000 [--jobs 4]
+
+Avec --copy : répertoire produit par scripts/db_backup.py --copy (schema.sql,
+manifest.json, data/<table>.copy[.gz]) chargé par COPY FROM STDIN en flux,
+tables en parallèle, puis séquences repositionnées sur leurs valeurs d'origine.
 """
+import argparse
+import gzip
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import psycopg2
 import sys
 import os
@@ -178,9 +189,84 @@ def restore_functions_and_triggers():
         conn.close()
 
 
+def _copy_in(backup_dir: str, table: dict) -> tuple[str, int, float]:
+    """Charge un fichier COPY dans sa table (une connexion par worker)."""
+    started = time.perf_counter()
+    path = os.path.join(backup_dir, table["file"])
+    opener = gzip.open if path.endswith(".gz") else open
+    col_list = ", ".join(f'"{c}"' for c in table["columns"])
+    conn = psycopg2.connect(
+        host=DB_HOST, port=DB_PORT, user=DB_USER, password=DB_PASSWORD, database=DB_NAME
+    )
+    try:
+        with conn.cursor() as cur, opener(path, "rb") as f:
+            cur.copy_expert(f'COPY public."{table["name"]}" ({col_list}) FROM STDIN', f)
+            rows = cur.rowcount
+        conn.commit()
+        return table["name"], rows, time.perf_counter() - started
+    finally:
+        conn.close()
+
+
+def restore_copy(backup_dir: str, jobs: int = 1):
+    """Restauration d'un backup --copy : schéma, données en flux, séquences."""
+    with open(os.path.join(backup_dir, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    with open(os.path.join(backup_dir, "schema.sql"), encoding="utf-8") as f:
+        schema_sql = f.read()
+
+    create_sequences(extract_sequences(schema_sql))
+
+    print(f"[3/5] Schéma + données COPY ({len(manifest['tables'])} tables, {jobs} worker(s))...")
+    conn = psycopg2.connect(
+        host=DB_HOST, port=DB_PORT, user=DB_USER, password=DB_PASSWORD, database=DB_NAME
+    )
+    try:
+        with conn.cursor() as cur:
+            cur.execute(schema_sql)
+        conn.commit()
+    finally:
+        conn.close()
+
+    # Pas de clés étrangères ni de triggers à ce stade : ordre des tables libre
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            futures = [pool.submit(_copy_in, backup_dir, t) for t in manifest["tables"]]
+            for i, future in enumerate(as_completed(futures), 1):
+                name, rows, elapsed = future.result()
+                print(f"      [{i}/{len(futures)}] {name}: {rows:,} lignes en {elapsed:.1f}s")
+    except Exception as e:
+        print(f"ERREUR lors de l'import COPY : {e}", file=sys.stderr)
+        sys.exit(1)
+
+    sequences = manifest.get("sequences") or {}
+    print(f"[4/5] Repositionnement de {len(sequences)} séquence(s)...")
+    conn = psycopg2.connect(
+        host=DB_HOST, port=DB_PORT, user=DB_USER, password=DB_PASSWORD, database=DB_NAME
+    )
+    try:
+        with conn.cursor() as cur:
+            for seq, value in sequences.items():
+                cur.execute(
+                    "SELECT setval(to_regclass(%s), %s) WHERE to_regclass(%s) IS NOT NULL",
+                    (f'public."{seq}"', value, f'public."{seq}"'),
+                )
+        conn.commit()
+    finally:
+        conn.close()
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Restauration de la base dev")
+    parser.add_argument("--copy", metavar="DIR", help="Répertoire produit par db_backup.py --copy")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Tables chargées en parallèle (--copy)")
+    args = parser.parse_args()
+
     print("=== Restauration base DEV depuis backup PROD ===")
     drop_and_recreate()
-    restore()
+    if args.copy:
+        restore_copy(args.copy, jobs=args.jobs)
+    else:
+        restore()
     restore_functions_and_triggers()
     print("=== Restauration terminée ===")
@@ -0,0 +1,356 @@
+"""Banc de performance reproductible : usine synthétique + chemins chauds.
+
+Deux sous-commandes :
+
+    seed   Remplit une base PostgreSQL LOCALE avec une usine synthétique
+           (machines, interventions, actions, tâches, demandes d'achat,
+           audit_log) générée en SQL ensembliste (generate_series + setseed),
+           donc identique d'une exécution à l'autre pour une même graine.
+    run    Chronomètre les requêtes chaudes des repos (mêmes fonctions que
+           les routes) et affiche p50/p95/p99 + nombre de requêtes SQL.
+    purge  Supprime les données synthétiques (préfixe BENCH-).
+
+Les triggers sont désactivés pendant le seed/purge
+(session_replication_role = replica, rôle superutilisateur requis) : le
+volume généré ne doit pas déclencher suggestions préventives, heures
+machine ni notifications. À n'utiliser que sur une base jetable.
+
+Usage :
+    python scripts/bench_plant.py seed --yes [--scale 1.0] [--seed 0.42]
+    python scripts/bench_plant.py run [--iterations 20] [--json resultats.json]
+    python scripts/bench_plant.py purge --yes
+
+La base ciblée est DATABASE_URL (voir api/settings.py).
+"""
+import argparse
+import json
+import sys
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2.extras import RealDictCursor
+
+# Ajouter la racine du projet au path
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from api.db import close_pool, db_connection, init_pool  # noqa: E402
+from api.settings import settings  # noqa: E402
+
+PREFIX = "BENCH-"
+
+# Volumes pour --scale 1.0 (multipliés par l'échelle)
+BASE_MACHINES = 2000
+BASE_INTERVENTIONS = 100_000
+ACTIONS_PER_INTERVENTION = 2
+TASKS_PER_INTERVENTION = 2
+AUDITS_PER_INTERVENTION = 2
+
+
+# ── Comptage des requêtes ─────────────────────────────────────────────────────
+
+_query_count = 0
+
+
+@lru_cache(maxsize=None)
+def _counting_cursor(base: type) -> type:
+    """Sous-classe du curseur demandé (défaut, RealDictCursor…) qui compte les execute."""
+
+    class CountingCursor(base):
+        def execute(self, query, vars=None):
+            global _query_count
+            _query_count += 1
+            return super().execute(query, vars)
+
+        def executemany(self, query, vars_list):
+            global _query_count
+            _query_count += 1
+            return super().executemany(query, vars_list)
+
+    CountingCursor.__name__ = f"Counting{base.__name__}"
+    return CountingCursor
+
+
+class CountingConnection(psycopg2.extensions.connection):
+    """Connexion psycopg2 dont tous les curseurs incrémentent _query_count."""
+
+    def cursor(self, *args, **kwargs):
+        base = kwargs.pop("cursor_factory", None) or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs["cursor_factory"] = _counting_cursor(base)
+        return super().cursor(*args, **kwargs)
+
+
+# ── Génération de l'usine ─────────────────────────────────────────────────────
+
+SEED_STATEMENTS = [
+    # Machines : 1/20 de machines mères, les autres rattachées à une mère
+    """
+    INSERT INTO machine (id, code, name, affectation, is_mere, statut_id)
+    SELECT gen_random_uuid(), %(prefix)s || lpad(g::text, 6, '0'),
+           'Machine synthétique ' || g, 'Atelier ' || (g %% 12), g <= %(meres)s, 3
+    FROM generate_series(1, %(machines)s) g
+    """,
+    """
+    CREATE TEMP TABLE _bench_machine ON COMMIT DROP AS
+    SELECT row_number() OVER (ORDER BY code) AS n, id
+    FROM machine WHERE code LIKE %(prefix)s || '%%'
+    """,
+    """
+    UPDATE machine m SET equipement_mere = p.id
+    FROM _bench_machine c, _bench_machine p
+    WHERE m.id = c.id AND c.n > %(meres)s AND p.n = 1 + c.n %% %(meres)s
+    """,
+    # Interventions réparties sur toutes les machines et sur deux ans
+    """
+    CREATE TEMP TABLE _bench_intervention ON COMMIT DROP AS
+    SELECT g AS n, gen_random_uuid() AS id
+    FROM generate_series(1, %(interventions)s) g
+    """,
+    """
+    INSERT INTO intervention (id, code, title, machine_id, type_inter, priority,
+                              reported_by, tech_initials, status_actual,
+                              printed_fiche, reported_date)
+    SELECT i.id, %(prefix)s || i.n, 'Intervention synthétique ' || i.n, m.id,
+           (ARRAY['CUR','PRE','REA','BAT','PRO','COF','PIL','MES'])[1 + i.n %% 8],
+           (ARRAY['faible','normal','important','urgent'])[1 + i.n %% 4],
+           'bench', 'BX', s.ids[1 + i.n %% cardinality(s.ids)],
+           i.n %% 5 = 0, current_date - (i.n %% 730)
+    FROM _bench_intervention i
+    JOIN _bench_machine m ON m.n = 1 + i.n %% %(machines)s
+    CROSS JOIN (SELECT array_agg(id ORDER BY id) AS ids FROM intervention_status_ref) s
+    """,
+    """
+    INSERT INTO intervention_action (id, intervention_id, description, time_spent,
+                                     action_subcategory, complexity_score, created_at)
+    SELECT gen_random_uuid(), i.id, 'Action synthétique ' || k,
+           round((0.25 + random() * 4)::numeric, 2),
+           sc.ids[1 + (i.n + k) %% cardinality(sc.ids)],
+           1 + (i.n + k) %% 5,
+           now() - make_interval(days => (i.n %% 730)::int, hours => k)
+    FROM _bench_intervention i
+    CROSS JOIN generate_series(1, %(actions)s) k
+    CROSS JOIN (SELECT array_agg(id ORDER BY id) AS ids FROM action_subcategory) sc
+    """,
+    """
+    INSERT INTO intervention_task (intervention_id, label, origin, status, skip_reason,
+                                   optional, due_date, sort_order)
+    SELECT i.id, 'Tâche synthétique ' || k, 'tech',
+           (ARRAY['todo','in_progress','done','skipped'])[1 + (i.n + k) %% 4],
+           CASE WHEN (i.n + k) %% 4 = 3 THEN 'bench' END,
+           k %% 3 = 0, current_date - (i.n %% 730) + 7, k
+    FROM _bench_intervention i
+    CROSS JOIN generate_series(1, %(tasks)s) k
+    """,
+    # Demandes d'achat : plus de colonne intervention_id (migration 006), le
+    # lien passe par une action de l'intervention ; correspondance DA →
+    # intervention tenue dans _bench_pr
+    """
+    CREATE TEMP TABLE _bench_pr ON COMMIT DROP AS
+    SELECT gen_random_uuid() AS id, i.id AS intervention_id, i.n
+    FROM _bench_intervention i
+    WHERE i.n %% %(pr_every)s = 0
+    """,
+    """
+    INSERT INTO purchase_request (id, status, item_label, quantity, unit, requested_by,
+                                  urgency, created_at)
+    SELECT p.id, 'open', 'Pièce synthétique ' || (p.n %% 500), 1 + p.n %% 10, 'pcs', 'bench',
+           (ARRAY['normal','high','critical'])[1 + p.n %% 3],
+           now() - make_interval(days => (p.n %% 730)::int)
+    FROM _bench_pr p
+    """,
+    """
+    INSERT INTO intervention_action_purchase_request (intervention_action_id, purchase_request_id)
+    SELECT DISTINCT ON (p.id) a.id, p.id
+    FROM _bench_pr p
+    JOIN intervention_action a ON a.intervention_id = p.intervention_id
+    ORDER BY p.id, a.created_at
+    """,
+    """
+    INSERT INTO audit_log (entity_type, entity_id, decision_type, old_value, new_value,
+                           is_system, logged_at)
+    SELECT 'intervention', i.id, 'status_change',
+           jsonb_build_object('status', 'ouvert'), jsonb_build_object('status', 'en_cours'),
+           k %% 2 = 0, now() - make_interval(days => (i.n %% 730)::int, mins => k)
+    FROM _bench_intervention i
+    CROSS JOIN generate_series(1, %(audits)s) k
+    """,
+]
+
+PURGE_STATEMENTS = [
+    """
+    DELETE FROM audit_log WHERE entity_id IN (
+        SELECT id FROM intervention WHERE code LIKE %(prefix)s || '%%')
+    """,
+    """
+    DELETE FROM intervention_action_purchase_request WHERE purchase_request_id IN (
+        SELECT id FROM purchase_request WHERE requested_by = 'bench')
+    """,
+    "DELETE FROM purchase_request WHERE requested_by = 'bench'",
+    """
+    DELETE FROM intervention_task WHERE intervention_id IN (
+        SELECT id FROM intervention WHERE code LIKE %(prefix)s || '%%')
+    """,
+    """
+    DELETE FROM intervention_action WHERE intervention_id IN (
+        SELECT id FROM intervention WHERE code LIKE %(prefix)s || '%%')
+    """,
+    "DELETE FROM intervention WHERE code LIKE %(prefix)s || '%%'",
+    "DELETE FROM machine WHERE code LIKE %(prefix)s || '%%'",
+]
+
+
+def _run_statements(statements: List[str], params: Dict, before: str | None = None) -> None:
+    with db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SET LOCAL session_replication_role = replica")
+        if before:
+            cur.execute(before, params)
+        for sql in statements:
+            started = time.perf_counter()
+            cur.execute(sql, params)
+            label = " ".join(sql.split())[:70]
+            print(f"  {cur.rowcount:>9} lignes  {time.perf_counter() - started:6.1f}s  {label}")
+        conn.commit()
+
+
+def seed(scale: float, seed_value: float) -> None:
+    machines = max(20, int(BASE_MACHINES * scale))
+    params = {
+        "prefix": PREFIX,
+        "machines": machines,
+        "meres": max(1, machines // 20),
+        "interventions": max(1, int(BASE_INTERVENTIONS * scale)),
+        "actions": ACTIONS_PER_INTERVENTION,
+        "tasks": TASKS_PER_INTERVENTION,
+        "audits": AUDITS_PER_INTERVENTION,
+        "pr_every": 1,
+        "seed": seed_value,
+    }
+    print(f"Génération de l'usine synthétique (échelle {scale}, graine {seed_value})")
+    _run_statements(SEED_STATEMENTS, params, before="SELECT setseed(%(seed)s)")
+    with db_connection() as conn:
+        conn.autocommit = True
+        cur = conn.cursor()
+        for table in ("machine", "intervention", "intervention_action",
+                      "intervention_task", "purchase_request", "audit_log"):
+            cur.execute(f"ANALYZE {table}")
+        conn.autocommit = False
+
+
+def purge() -> None:
+    print("Suppression des données synthétiques")
+    _run_statements(PURGE_STATEMENTS, {"prefix": PREFIX})
+
+
+# ── Mesures ───────────────────────────────────────────────────────────────────
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """Percentile au rang le plus proche (pas d'interpolation)."""
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _scenarios() -> Dict[str, Callable[[], object]]:
+    from api.equipements.repo import EquipementRepository
+    from api.interventions.repo import InterventionRepository
+    from api.purchase_requests.repo import PurchaseRequestRepository
+    from api.stats.repo import StatsRepository
+
+    with db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT id FROM machine WHERE code LIKE %s ORDER BY code LIMIT 500",
+            (PREFIX + "%",),
+        )
+        machine_ids = [str(row[0]) for row in cur.fetchall()]
+    if not machine_ids:
+        raise SystemExit("Aucune machine synthétique : lancer d'abord `seed`.")
+
+    equipements = EquipementRepository()
+
+    def health_map():
+        with db_connection() as conn:
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            return equipements.get_health_map(cur, machine_ids)
+
+    return {
+        "InterventionRepository.get_all": lambda: InterventionRepository().get_all(limit=100),
+        "EquipementRepository.get_health_map": health_map,
+        "StatsRepository.get_qualite_donnees": lambda: StatsRepository().get_qualite_donnees(),
+        "PurchaseRequestRepository.get_list": lambda: PurchaseRequestRepository().get_list(limit=100),
+    }
+
+
+def run(iterations: int, warmup: int, output: str | None) -> None:
+    global _query_count
+    results = {}
+    print(f"{'Scénario':<40} {'p50':>9} {'p95':>9} {'p99':>9} {'requêtes':>9}")
+    for name, fn in _scenarios().items():
+        for _ in range(warmup):
+            fn()
+        timings = []
+        queries = []
+        for _ in range(iterations):
+            _query_count = 0
+            started = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - started) * 1000)
+            queries.append(_query_count)
+        timings.sort()
+        results[name] = {
+            "p50_ms": round(_percentile(timings, 50), 2),
+            "p95_ms": round(_percentile(timings, 95), 2),
+            "p99_ms": round(_percentile(timings, 99), 2),
+            "queries": max(queries),
+            "iterations": iterations,
+        }
+        r = results[name]
+        print(f"{name:<40} {r['p50_ms']:>7.1f}ms {r['p95_ms']:>7.1f}ms "
+              f"{r['p99_ms']:>7.1f}ms {r['queries']:>9}")
+
+    if output:
+        Path(output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Résultats écrits dans {output}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Banc de performance sur usine synthétique")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_seed = sub.add_parser("seed", help="Génère l'usine synthétique")
+    p_seed.add_argument("--scale", type=float, default=1.0,
+                        help=f"Échelle (1.0 = {BASE_MACHINES} machines, {BASE_INTERVENTIONS} interventions)")
+    p_seed.add_argument("--seed", type=float, default=0.42, help="Graine setseed() entre -1 et 1")
+    p_seed.add_argument("--yes", action="store_true", help="Confirme l'écriture dans la base")
+
+    p_run = sub.add_parser("run", help="Chronomètre les requêtes chaudes")
+    p_run.add_argument("--iterations", type=int, default=20)
+    p_run.add_argument("--warmup", type=int, default=2)
+    p_run.add_argument("--json", dest="output", help="Fichier de résultats JSON")
+
+    p_purge = sub.add_parser("purge", help="Supprime les données synthétiques")
+    p_purge.add_argument("--yes", action="store_true", help="Confirme la suppression")
+
+    args = parser.parse_args()
+    if args.command in ("seed", "purge") and not args.yes:
+        parser.error(f"`{args.command}` modifie {settings.DATABASE_URL.rsplit('@', 1)[-1]} : ajouter --yes")
+
+    init_pool(settings.DATABASE_URL, minconn=1, maxconn=2, retries=1,
+              connection_factory=CountingConnection)
+    try:
+        if args.command == "seed":
+            seed(args.scale, args.seed)
+        elif args.command == "purge":
+            purge()
+        else:
+            run(args.iterations, args.warmup, args.output)
+    finally:
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
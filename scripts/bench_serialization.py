@@ -0,0 +1,121 @@
+"""Micro-benchmark : sérialisation d'une page de 1 000 interventions.
+
+Compare le chemin FastAPI par défaut (jsonable_encoder + json.dumps, ce que fait
+JSONResponse pour un dict retourné par la route) au chemin léger
+FastJSONResponse (orjson direct sur les dicts déjà façonnés par le repo).
+
+Aucune base de données requise : les lignes sont synthétiques mais reprennent
+la forme exacte de InterventionRepository.get_all (Decimal, UUID, dates,
+objets equipements/health/stats imbriqués).
+
+Usage :
+    python scripts/bench_serialization.py [nombre_interventions]
+"""
+import statistics
+import sys
+import timeit
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+# Ajouter la racine du projet au path
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from api.audits.schemas import AuditRules  # noqa: E402
+from api.utils.response import FastJSONResponse, paginated  # noqa: E402
+
+REPEAT = 7
+
+
+def _fake_intervention(i: int) -> dict:
+    today = date(2026, 10, 19)
+    return {
+        "id": uuid.uuid4(),
+        "code": f"CN{i % 300:03d}-CUR-20261019-QC",
+        "title": f"Intervention de test n°{i}",
+        "type_inter": "CUR",
+        "priority": ("urgent", "important", "normale", "faible")[i % 4],
+        "reported_by": "Atelier",
+        "tech_initials": "QC",
+        "tech_id": uuid.uuid4(),
+        "status_actual": "ouvert",
+        "updated_by": None,
+        "printed_fiche": False,
+        "reported_date": today - timedelta(days=i % 90),
+        "plan_id": None,
+        "next_due_date": today + timedelta(days=i % 10),
+        "overdue": i % 7 == 0,
+        "request": {
+            "id": uuid.uuid4(),
+            "code": f"DI-2026-{i:05d}",
+            "demandeur_nom": "Opérateur",
+            "statut": "acceptee",
+            "created_at": datetime(2026, 10, 1, 8, 0, tzinfo=timezone.utc),
+        },
+        "equipements": {
+            "id": uuid.uuid4(),
+            "code": f"CN{i % 300:03d}",
+            "name": f"Centre d'usinage {i % 300}",
+            "health": {
+                "level": "warning",
+                "reason": "1 intervention urgente",
+                "open_interventions_count": 2,
+                "urgent_count": 1,
+                "open_requests_count": 1,
+                "new_requests_count": 0,
+                "request_status_counts": {"acceptee": 1},
+                "open_tasks_count": 3,
+                "overdue_tasks_count": 1,
+                "unassigned_tasks_count": 0,
+                "open_purchase_requests_count": 1,
+                "purchase_request_status_counts": {"ORDERED": 1},
+                "has_affectation": True,
+                "rules_triggered": ["URGENT_OPEN"],
+            },
+            "parent": None,
+            "equipement_class": {"id": uuid.uuid4(), "code": "CNC", "label": "Commande numérique"},
+        },
+        "stats": {
+            "action_count": 4,
+            "total_time": Decimal("3.75"),
+            "avg_complexity": 2.5,
+            "purchase_count": 1,
+            "tasks": {"total": 5, "todo": 2, "in_progress": 1, "done": 2, "skipped": 0, "blocking_pending": 3},
+            "purchase_requests": {"total": 1, "received": 0, "ordered": 1},
+        },
+    }
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    items = [_fake_intervention(i) for i in range(count)]
+    payload = paginated(items, total=count * 5, offset=0, limit=count)
+    payload["audit"] = AuditRules(required=True, silent=True, default_reason_code="ROUTINE")
+
+    default_body = JSONResponse(jsonable_encoder(payload)).body
+    fast_body = FastJSONResponse(payload).body
+    assert len(default_body) > 0 and len(fast_body) > 0
+
+    candidates = {
+        "jsonable_encoder + json (défaut)": lambda: JSONResponse(jsonable_encoder(payload)),
+        "FastJSONResponse (orjson)": lambda: FastJSONResponse(payload),
+    }
+
+    print(f"Sérialisation de {count} interventions — {len(fast_body):,} octets JSON")
+    results = {}
+    for label, fn in candidates.items():
+        timings = timeit.repeat(fn, number=1, repeat=REPEAT)
+        results[label] = statistics.median(timings)
+        print(f"  {label:<34} médiane {results[label] * 1000:8.2f} ms  (min {min(timings) * 1000:.2f} ms)")
+
+    baseline, fast = results.values()
+    print(f"  Gain : x{baseline / fast:.1f}")
+
+
+if __name__ == "__main__":
+    main()
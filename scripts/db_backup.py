@@ -7,12 +7,23 @@ Usage:
     python db_backup.py                    # Backup complet
     python db_backup.py --tables table1 table2  # Tables spécifiques
     python db_backup.py --output backup.sql     # Fichier de sortie
+    python db_backup.py --copy --jobs 4         # Streaming COPY (répertoire, gzip)
+
+Mode --copy : un répertoire contenant schema.sql, manifest.json et un fichier
+COPY par table (data/<table>.copy.gz), écrit en flux (COPY ... TO STDOUT) sans
+jamais charger une table en mémoire. Les workers parallèles partagent le même
+instantané (pg_export_snapshot) : sauvegarde cohérente, comme pg_dump -j.
+Restauration : python db/restore_dev.py --copy <répertoire>.
 """
 
 import argparse
+import gzip
+import json
 import os
 import sys
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 
@@ -20,13 +31,20 @@ from db_connection import get_cursor, get_dict_cursor, get_connection, get_conne
 
 
 def get_all_tables() -> list[str]:
-    """Récupère la liste de toutes les tables du schéma public."""
+    """Récupère la liste de toutes les tables du schéma public.
+
+    Les partitions (audit_log_p2026_10…) sont exclues : leurs lignes sont
+    lues via la table partitionnée parente.
+    """
     with get_cursor() as cursor:
         cursor.execute("""
-            SELECT tablename 
-            FROM pg_tables 
-            WHERE schemaname = 'public'
-            ORDER BY tablename
+            SELECT c.relname
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'public'
+              AND c.relkind IN ('r', 'p')
+              AND NOT c.relispartition
+            ORDER BY c.relname
         """)
         return [row[0] for row in cursor.fetchall()]
 
@@ -350,12 +368,111 @@ def full_backup_python(tables: list[str] = None, output_file: str = None) -> str
     return str(output_path)
 
 
+def _copy_table(table: str, columns: list[str], snapshot: str, path: Path, compress: bool) -> tuple[str, int, float]:
+    """Écrit une table en flux dans `path` depuis l'instantané partagé."""
+    started = time.perf_counter()
+    conn = get_connection()
+    conn.set_session(isolation_level='REPEATABLE READ', readonly=True)
+    try:
+        with conn.cursor() as cursor:
+            # Première instruction de la transaction : adopte l'instantané maître
+            cursor.execute("SET TRANSACTION SNAPSHOT %s", (snapshot,))
+            col_list = ', '.join(f'"{c}"' for c in columns)
+            opener = gzip.open if compress else open
+            with opener(path, 'wb') as f:
+                # COPY (SELECT …) : accepté aussi par les tables partitionnées
+                cursor.copy_expert(f'COPY (SELECT {col_list} FROM public."{table}") TO STDOUT', f)
+            rows = cursor.rowcount
+        conn.rollback()
+        return table, rows, time.perf_counter() - started
+    finally:
+        conn.close()
+
+
+def full_backup_copy(tables: list[str] = None, output_dir: str = None,
+                     jobs: int = 1, compress: bool = True) -> str:
+    """
+    Sauvegarde en flux : schéma + un fichier COPY par table, tables en parallèle.
+
+    Args:
+        tables: Liste des tables à sauvegarder (None = toutes)
+        output_dir: Répertoire de sortie (None = auto-généré)
+        jobs: Nombre de tables copiées en parallèle (une connexion chacune)
+        compress: Compression gzip des fichiers de données
+    """
+    if tables is None:
+        tables = get_all_tables()
+    if output_dir is None:
+        output_dir = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+    output_path = Path(__file__).parent.parent / output_dir
+    (output_path / "data").mkdir(parents=True, exist_ok=True)
+    suffix = ".copy.gz" if compress else ".copy"
+    print(f"Sauvegarde COPY de {len(tables)} tables ({jobs} worker(s)) vers {output_path}...")
+
+    # Connexion maîtresse : porte l'instantané tant que les workers copient
+    master = get_connection()
+    master.set_session(isolation_level='REPEATABLE READ', readonly=True)
+    try:
+        with master.cursor() as cursor:
+            cursor.execute("SELECT pg_export_snapshot()")
+            snapshot = cursor.fetchone()[0]
+            cursor.execute("""
+                SELECT sequencename, last_value
+                FROM pg_sequences
+                WHERE schemaname = 'public' AND last_value IS NOT NULL
+            """)
+            sequences = dict(cursor.fetchall())
+
+        schema = ["-- SCHEMA BACKUP (COPY)", f"-- Généré le {datetime.now().isoformat()}", ""]
+        columns = {}
+        for table in tables:
+            columns[table] = get_table_columns(table)
+            schema += [f"-- Table: {table}", get_table_definition(table), ""]
+        (output_path / "schema.sql").write_text("\n".join(schema), encoding="utf-8")
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            futures = [
+                pool.submit(_copy_table, table, columns[table], snapshot,
+                            output_path / "data" / f"{table}{suffix}", compress)
+                for table in tables if columns[table]
+            ]
+            for i, future in enumerate(as_completed(futures), 1):
+                table, rows, elapsed = future.result()
+                results[table] = rows
+                print(f"  [{i}/{len(futures)}] {table}: {rows:,} lignes en {elapsed:.1f}s")
+    finally:
+        master.rollback()
+        master.close()
+
+    manifest = {
+        "format": "copy-text",
+        "created_at": datetime.now().isoformat(),
+        "compression": "gzip" if compress else None,
+        "tables": [
+            {"name": t, "file": f"data/{t}{suffix}", "columns": columns[t], "rows": results[t]}
+            for t in tables if t in results
+        ],
+        "sequences": sequences,
+    }
+    (output_path / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+    size = sum(f.stat().st_size for f in output_path.rglob("*") if f.is_file())
+    print(f"\n✓ Sauvegarde créée: {output_path}")
+    print(f"  Taille: {size:,} octets")
+    return str(output_path)
+
+
 def main():
     parser = argparse.ArgumentParser(description='Sauvegarde de la base de données')
     parser.add_argument('--tables', '-t', nargs='+', help='Tables à sauvegarder')
     parser.add_argument('--output', '-o', help='Fichier de sortie')
     parser.add_argument('--list', '-l', action='store_true', help='Lister les tables')
     parser.add_argument('--python', '-p', action='store_true', help='Utiliser le backup Python (données uniquement)')
+    parser.add_argument('--copy', '-c', action='store_true', help='Sauvegarde en flux COPY (répertoire)')
+    parser.add_argument('--jobs', '-j', type=int, default=1, help='Tables copiées en parallèle (mode --copy)')
+    parser.add_argument('--no-compress', action='store_true', help='Fichiers COPY non compressés (mode --copy)')
     
     args = parser.parse_args()
     
@@ -366,7 +483,10 @@ def main():
             print(f"  - {t}")
         return
     
-    if args.python:
+    if args.copy:
+        full_backup_copy(tables=args.tables, output_dir=args.output,
+                         jobs=args.jobs, compress=not args.no_compress)
+    elif args.python:
         full_backup_python(tables=args.tables, output_file=args.output)
     else:
         full_backup_pgdump(output_file=args.output, tables=args.tables)
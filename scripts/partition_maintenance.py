@@ -0,0 +1,109 @@
+"""Maintenance des journaux partitionnés (audit_log, auth_attempt, security_log).
+
+Crée les partitions mensuelles à venir et détache celles qui sortent de la
+rétention (déplacées dans le schéma `archive` ou supprimées selon
+`partition_policy`). Idempotent : à planifier en cron, par exemple le 1er
+de chaque mois (l'API l'exécute aussi à chaque démarrage).
+
+Usage :
+    python scripts/partition_maintenance.py
+    python scripts/partition_maintenance.py --show
+    python scripts/partition_maintenance.py --set audit_log=36 --set auth_attempt=1:drop
+    python scripts/partition_maintenance.py --set security_log=none
+
+`--set TABLE=MOIS[:archive|drop]` modifie la politique avant d'appliquer la
+maintenance ; `none` = conservation illimitée.
+
+La base ciblée est DATABASE_URL (voir api/settings.py).
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Ajouter la racine du projet au path
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from api.db import close_pool, db_connection, init_pool  # noqa: E402
+from api.partitions import run_partition_maintenance  # noqa: E402
+from api.settings import settings  # noqa: E402
+
+
+def _parse_policy(value: str) -> tuple[str, int | None, bool | None]:
+    """`audit_log=24:archive` → ("audit_log", 24, True)."""
+    try:
+        table, rule = value.split("=", 1)
+        months, _, mode = rule.partition(":")
+        retention = None if months.lower() == "none" else int(months)
+        if retention is not None and retention <= 0:
+            raise ValueError
+        if mode not in ("", "archive", "drop"):
+            raise ValueError
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"'{value}' : format attendu TABLE=MOIS[:archive|drop] (MOIS > 0 ou none)")
+    return table.strip(), retention, None if not mode else mode == "archive"
+
+
+def show_policy() -> None:
+    with db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT p.table_name, p.retention_months, p.archive, p.premake_months,
+                       count(inh.inhrelid) AS partitions,
+                       pg_size_pretty(sum(pg_total_relation_size(inh.inhrelid))::bigint) AS size
+                FROM partition_policy p
+                LEFT JOIN pg_inherits inh ON inh.inhparent = ('public.' || p.table_name)::regclass
+                GROUP BY p.table_name, p.retention_months, p.archive, p.premake_months
+                ORDER BY p.table_name
+            """)
+            rows = cur.fetchall()
+    print(f"{'table':<14} {'rétention':>10} {'au-delà':>9} {'avance':>7} {'partitions':>11} {'taille':>10}")
+    for table, retention, archive, premake, partitions, size in rows:
+        retention_label = f"{retention} mois" if retention else "illimitée"
+        print(f"{table:<14} {retention_label:>10} {'archive' if archive else 'drop':>9} "
+              f"{premake:>7} {partitions:>11} {size or '-':>10}")
+
+
+def set_policy(table: str, retention: int | None, archive: bool | None) -> None:
+    with db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE partition_policy
+                SET retention_months = %s,
+                    archive = COALESCE(%s, archive)
+                WHERE table_name = %s
+                """,
+                (retention, archive, table),
+            )
+            if cur.rowcount == 0:
+                raise SystemExit(f"Table inconnue dans partition_policy : {table}")
+        conn.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Maintenance des journaux partitionnés")
+    parser.add_argument("--show", action="store_true", help="Affiche la politique et la taille actuelle")
+    parser.add_argument("--set", dest="policies", action="append", default=[], type=_parse_policy,
+                        metavar="TABLE=MOIS[:archive|drop]", help="Modifie la rétention d'une table")
+    args = parser.parse_args()
+
+    init_pool(settings.DATABASE_URL, 1, 2)
+    try:
+        if args.show:
+            show_policy()
+            return
+        for table, retention, archive in args.policies:
+            set_policy(table, retention, archive)
+        actions = run_partition_maintenance()
+        if not actions:
+            print("Rien à faire : partitions à jour")
+        for a in actions:
+            print(f"  {a['action']:<9} {a['partition']}")
+    finally:
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()